@@ -1,5 +1,229 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.contrib.admin.utils import NestedObjects
+from django.contrib.admin.views.main import ChangeList
+from django.contrib.auth import get_user_model
+from django.contrib.auth.admin import UserAdmin
+from django.db import router
+from django.utils.text import capfirst
 
-from .models import Note
+from .bulk import (
+    delete_note_rows, delete_users, selection_lookups, transfer_note_rows,
+)
+from .jobs import enqueue, is_large
+from .models import Job, Note, NoteTag
+from .pagination import EstimatedCountPaginator
 
-admin.site.register(Note)
+
+class NoteChangeList(ChangeList):
+    """Список заметок в админке без загрузки текста."""
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer('text', 'text_html')
+
+
+class AuthorFilter(admin.ListFilter):
+    """Фильтр по имени автора из поля ввода.
+
+    Обычный фильтр по связи выводит всех пользователей списком,
+    что при большом их числе неприменимо.
+    """
+    title = 'автор'
+    parameter_name = 'author'
+    template = 'admin/notes/author_filter.html'
+
+    def __init__(self, request, params, model, model_admin):
+        super().__init__(request, params, model, model_admin)
+        self.value = params.pop(self.parameter_name, '').strip()
+
+    def has_output(self):
+        return True
+
+    def expected_parameters(self):
+        return [self.parameter_name]
+
+    def queryset(self, request, queryset):
+        if self.value:
+            return queryset.filter(author__username=self.value)
+        return queryset
+
+    def choices(self, changelist):
+        yield {
+            'value': self.value,
+            'params': [
+                (name, value) for name, value in changelist.params.items()
+                if name != self.parameter_name
+            ],
+            'reset_query_string': changelist.get_query_string(
+                remove=[self.parameter_name]
+            ),
+        }
+
+
+@admin.register(Note)
+class NoteAdmin(admin.ModelAdmin):
+    list_display = ('id', 'title', 'slug', 'author', 'updated')
+    list_display_links = ('id', 'title')
+    list_select_related = ('author',)
+    list_filter = (AuthorFilter,)
+    search_fields = ('title', '=slug')
+    raw_id_fields = ('author',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = ('delete_notes', 'transfer_to_me')
+
+    def get_changelist(self, request, **kwargs):
+        return NoteChangeList
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        # Стандартное удаление загружает каждую заметку ради сигналов.
+        actions.pop('delete_selected', None)
+        return actions
+
+    def enqueue_selection(self, request, queryset, name, what, **payload):
+        """Ставит задачу над выборкой в очередь; False, если не вышло.
+
+        В задачу идёт не список id, а описание выборки (bulk).
+        """
+        lookups = selection_lookups(queryset)
+        if lookups is None:
+            self.message_user(
+                request,
+                f'{what} заметок в фоне возможно только по авторам или '
+                f'диапазону id: уберите поиск или выберите меньше заметок.',
+                messages.ERROR,
+            )
+            return False
+        enqueue(name, lookups=lookups, **payload)
+        self.message_user(
+            request, f'{what} заметок поставлено в очередь.',
+            messages.SUCCESS,
+        )
+        return True
+
+    @admin.action(
+        description='Удалить выбранные заметки', permissions=('delete',)
+    )
+    def delete_notes(self, request, queryset):
+        """Удаляет заметки без загрузки каждой ради сигналов.
+
+        Большие выборки удаляются фоновой задачей (notes.jobs).
+        """
+        if is_large(queryset.count()):
+            self.enqueue_selection(
+                request, queryset, 'notes.delete_notes', 'Удаление'
+            )
+            return
+        ids = list(queryset.values_list('pk', flat=True))
+        deleted = delete_note_rows(Note.objects.filter(pk__in=ids))
+        self.message_user(
+            request, f'Удалено заметок: {deleted}.', messages.SUCCESS
+        )
+
+    @admin.action(
+        description='Передать выбранные заметки мне', permissions=('change',)
+    )
+    def transfer_to_me(self, request, queryset):
+        """Передаёт заметки текущему пользователю.
+
+        Большие выборки передаются фоновой задачей (notes.jobs).
+        """
+        if is_large(queryset.count()):
+            self.enqueue_selection(
+                request, queryset, 'notes.transfer_notes', 'Передача',
+                author_id=request.user.pk,
+            )
+            return
+        ids = list(queryset.values_list('pk', flat=True))
+        updated = transfer_note_rows(
+            Note.objects.filter(pk__in=ids), request.user.pk
+        )
+        self.message_user(
+            request, f'Передано заметок: {updated}.', messages.SUCCESS
+        )
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name', 'status', 'attempts', 'run_after',
+                    'finished')
+    list_filter = ('status', 'name')
+    readonly_fields = ('name', 'payload', 'attempts', 'max_attempts',
+                       'locked_at', 'error', 'created', 'finished')
+
+
+User = get_user_model()
+admin.site.unregister(User)
+
+
+class UserCollector(NestedObjects):
+    """Собирает удаляемое вместе с пользователями, кроме их заметок.
+
+    Заметки и метки на них удаляются пачками (notes.bulk), поэтому
+    построчно не загружаются.
+    """
+
+    def related_objects(self, related_model, related_fields, objs):
+        queryset = super().related_objects(
+            related_model, related_fields, objs
+        )
+        if related_model in (Note, NoteTag):
+            return queryset.none()
+        return queryset
+
+
+@admin.register(User)
+class NoteUserAdmin(UserAdmin):
+    """Пользователи, которые удаляются вместе с заметками пачками.
+
+    Стандартное удаление собирает все заметки пользователя в памяти
+    и удаляет их одной транзакцией (notes.bulk.delete_user).
+    """
+
+    def get_deleted_objects(self, objs, request):
+        # Страница подтверждения показывает число заметок, а не их список;
+        # остальное удаляемое, защищённое и права проверяются как обычно.
+        objs = list(objs)
+        collector = UserCollector(using=router.db_for_write(User))
+        collector.collect(objs)
+        perms_needed = set()
+
+        def format_callback(obj):
+            opts = obj._meta
+            model_admin = self.admin_site._registry.get(type(obj))
+            if model_admin and not model_admin.has_delete_permission(
+                request, obj
+            ):
+                perms_needed.add(opts.verbose_name)
+            return f'{capfirst(opts.verbose_name)}: {obj}'
+
+        to_delete = collector.nested(format_callback)
+        protected = [format_callback(obj) for obj in collector.protected]
+        model_count = {
+            model._meta.verbose_name_plural: len(model_objs)
+            for model, model_objs in collector.model_objs.items()
+        }
+        notes = Note.objects.filter(author__in=objs).count()
+        if notes:
+            model_count[Note._meta.verbose_name_plural] = notes
+            if not self.admin_site._registry[Note].has_delete_permission(
+                request
+            ):
+                perms_needed.add(Note._meta.verbose_name)
+        return to_delete, model_count, perms_needed, protected
+
+    def delete_model(self, request, obj):
+        self.delete_users(request, [obj.pk])
+
+    def delete_queryset(self, request, queryset):
+        self.delete_users(request, list(queryset.values_list('pk', flat=True)))
+
+    def delete_users(self, request, user_ids):
+        queued = delete_users(user_ids)
+        if queued:
+            self.message_user(
+                request,
+                f'Пользователи с большим числом заметок ({len(queued)}) '
+                'отключены и будут удалены фоновой задачей.',
+                messages.WARNING,
+            )
@@ -0,0 +1,241 @@
+import json
+from http import HTTPStatus
+
+from django.conf import settings
+from django.core.exceptions import BadRequest, ValidationError
+from django.forms.models import model_to_dict
+from django.http import Http404, HttpResponse, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views import generic
+
+from yanote.backends.transaction import write_atomic
+
+from .forms import NoteForm
+from .pagination import paginate_keyset, parse_page_size
+from .views import NoteBase
+
+
+class ApiError(Exception):
+
+    def __init__(self, status, payload):
+        super().__init__(status, payload)
+        self.status = status
+        self.payload = payload
+
+
+def note_to_dict(note):
+    return {
+        'id': note.pk,
+        'title': note.title,
+        'text': note.text,
+        'slug': note.slug,
+        'created': note.created,
+        'updated': note.updated,
+    }
+
+
+class NoteApiBase(NoteBase, generic.View):
+    """Базовый класс JSON API заметок."""
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        except ApiError as error:
+            return JsonResponse(error.payload, status=error.status)
+        except Http404:
+            return JsonResponse(
+                {'error': 'Заметка не найдена.'}, status=HTTPStatus.NOT_FOUND
+            )
+        except BadRequest as error:
+            return JsonResponse(
+                {'error': str(error)}, status=HTTPStatus.BAD_REQUEST
+            )
+
+    def handle_no_permission(self):
+        return JsonResponse(
+            {'error': 'Требуется авторизация.'},
+            status=HTTPStatus.UNAUTHORIZED,
+        )
+
+    def read_json(self):
+        try:
+            return json.loads(self.request.body)
+        except ValueError:
+            raise ApiError(
+                HTTPStatus.BAD_REQUEST, {'error': 'Тело запроса - не JSON.'}
+            )
+
+    def save_note(self, data, note=None):
+        """Проверяет данные через NoteForm и сохраняет заметку."""
+        if not isinstance(data, dict):
+            raise ApiError(
+                HTTPStatus.BAD_REQUEST, {'error': 'Ожидается объект заметки.'}
+            )
+        if note is not None:
+            # PATCH: незаданные поля берём из заметки.
+            data = {
+                **model_to_dict(note, fields=NoteForm._meta.fields), **data
+            }
+        if isinstance(data.get('tags'), list):
+            tags = list(map(str, data['tags']))
+            # Форма делит строку меток по запятым: такая метка стала бы
+            # несколькими.
+            if any(',' in tag for tag in tags):
+                raise ApiError(HTTPStatus.BAD_REQUEST, {
+                    'error': 'Метка в списке не может содержать запятую.'
+                })
+            data = {**data, 'tags': ','.join(tags)}
+        form = NoteForm(data=data, instance=note)
+        if not form.is_valid():
+            raise ApiError(
+                HTTPStatus.BAD_REQUEST, {'errors': form.errors.get_json_data()}
+            )
+        note = form.save(commit=False)
+        note.author = self.request.user
+        try:
+            note.save()
+        except ValidationError as error:
+            # slug заняли параллельно после проверки формы.
+            form.add_error(None, error)
+            raise ApiError(
+                HTTPStatus.CONFLICT, {'errors': form.errors.get_json_data()}
+            )
+        form.save_m2m()
+        return note
+
+    def get_batch(self, *lists):
+        """Проверяет списки пачки; лимит - на все элементы вместе."""
+        for items in lists:
+            if not isinstance(items, list):
+                raise ApiError(
+                    HTTPStatus.BAD_REQUEST, {'error': 'Ожидается список.'}
+                )
+        if sum(map(len, lists)) > settings.NOTES_API_BATCH_LIMIT:
+            raise ApiError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {
+                'error': 'В пачке больше {} элементов.'.format(
+                    settings.NOTES_API_BATCH_LIMIT
+                ),
+            })
+        return lists
+
+    def run_batch(self, items, operation):
+        """Выполняет операцию над пачкой в одной транзакции.
+
+        Ошибка в любом элементе откатывает всю пачку; в ответе
+        указывается номер элемента.
+        """
+        results = []
+        with write_atomic():
+            for index, item in enumerate(items):
+                try:
+                    results.append(operation(item))
+                except ApiError as error:
+                    raise ApiError(
+                        error.status, {'index': index, **error.payload}
+                    )
+        return results
+
+
+class NoteListApi(NoteApiBase):
+    """GET - список с курсорной пагинацией, POST - создание заметок.
+
+    POST принимает объект заметки или список объектов.
+    """
+
+    def get(self, request, *args, **kwargs):
+        page, next_cursor = paginate_keyset(
+            self.get_queryset(),
+            after=request.GET.get('after'),
+            page_size=parse_page_size(
+                request.GET.get('size'),
+                settings.NOTES_PAGE_SIZE,
+                settings.NOTES_API_BATCH_LIMIT,
+            ),
+        )
+        return JsonResponse({
+            'results': [note_to_dict(note) for note in page],
+            'next': next_cursor,
+        })
+
+    def post(self, request, *args, **kwargs):
+        data = self.read_json()
+        if isinstance(data, list):
+            self.get_batch(data)
+            notes = self.run_batch(data, self.save_note)
+            return JsonResponse(
+                {'results': [note_to_dict(note) for note in notes]},
+                status=HTTPStatus.CREATED,
+            )
+        return JsonResponse(
+            note_to_dict(self.save_note(data)), status=HTTPStatus.CREATED
+        )
+
+
+class NoteDetailApi(NoteApiBase):
+    """GET, PATCH и DELETE одной заметки по slug."""
+
+    def get_object(self):
+        return get_object_or_404(self.get_queryset(), slug=self.kwargs['slug'])
+
+    def get(self, request, *args, **kwargs):
+        return JsonResponse(note_to_dict(self.get_object()))
+
+    def patch(self, request, *args, **kwargs):
+        note = self.save_note(self.read_json(), self.get_object())
+        return JsonResponse(note_to_dict(note))
+
+    def delete(self, request, *args, **kwargs):
+        self.get_object().delete()
+        return HttpResponse(status=HTTPStatus.NO_CONTENT)
+
+
+class NoteBatchApi(NoteApiBase):
+    """Пакетные операции в одной транзакции.
+
+    Тело: {"create": [{...}], "update": [{"id": 1, ...}], "delete": [1, 2]}.
+    """
+
+    def get_notes(self, ids):
+        """Заметки пачки одним запросом."""
+        # bool - подкласс int, но id заметки не бывает true.
+        if not all(
+            isinstance(pk, int) and not isinstance(pk, bool) for pk in ids
+        ):
+            raise ApiError(HTTPStatus.BAD_REQUEST, {'error': 'Неверный id.'})
+        notes = self.get_queryset().in_bulk(ids)
+        missing = [pk for pk in ids if pk not in notes]
+        if missing:
+            raise ApiError(HTTPStatus.NOT_FOUND, {
+                'error': 'Заметки не найдены.', 'ids': missing,
+            })
+        return notes
+
+    def post(self, request, *args, **kwargs):
+        data = self.read_json()
+        if not isinstance(data, dict):
+            raise ApiError(
+                HTTPStatus.BAD_REQUEST, {'error': 'Ожидается объект.'}
+            )
+        create, update, delete = self.get_batch(
+            data.get('create', []),
+            data.get('update', []),
+            data.get('delete', []),
+        )
+        with write_atomic():
+            created = self.run_batch(create, self.save_note)
+            notes = self.get_notes([
+                item.get('id') if isinstance(item, dict) else None
+                for item in update
+            ])
+            updated = self.run_batch(update, lambda item: self.save_note(
+                {key: value for key, value in item.items() if key != 'id'},
+                notes[item['id']],
+            ))
+            self.get_queryset().filter(
+                pk__in=self.get_notes(delete)
+            ).delete()
+        return JsonResponse({
+            'created': [note_to_dict(note) for note in created],
+            'updated': [note_to_dict(note) for note in updated],
+            'deleted': delete,
+        })
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class NotesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'notes'
+
+    def ready(self):
+        from . import checks, signals  # noqa: F401
+        # Задачи очереди регистрируются при импорте своих модулей.
+        from . import bulk  # noqa: F401
@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+
+
+def user_cache():
+    return caches[settings.NOTES_AUTH_CACHE['ALIAS']]
+
+
+def user_cache_key(user_id):
+    return f'notes:auth:user:{user_id}'
+
+
+def forget_user(user_id):
+    user_cache().delete(user_cache_key(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend, который берёт пользователя сессии из кэша.
+
+    Любая запись пользователя (смена пароля, last_login, удаление)
+    и выход из системы сбрасывают запись (notes.signals); изменения
+    в обход save() живут не дольше NOTES_AUTH_CACHE['TIMEOUT']. Кэш
+    должен быть общим для всех процессов (проверка notes.E001).
+    """
+
+    def get_user(self, user_id):
+        key = user_cache_key(user_id)
+        user = user_cache().get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                user_cache().set(
+                    key, user, settings.NOTES_AUTH_CACHE['TIMEOUT']
+                )
+        return user
@@ -0,0 +1,126 @@
+"""Нагрузочный тест ASGI: синхронные и асинхронные представления заметок.
+
+Поднимает тестовую базу, создаёт пользователей с заметками и гоняет
+конкурентные запросы через полный стек ASGI (middleware, сессии, шаблоны)
+в обоих режимах NOTES_ASYNC_VIEWS.
+
+Запуск: python -m notes.benchmarks.asgi_load [--concurrency 50] ...
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import statistics
+import time
+
+
+def setup_django():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanote.settings')
+    import django
+    django.setup()
+
+
+def seed(users, notes_per_user):
+    from django.contrib.auth import get_user_model
+    from django.test import Client
+
+    from notes.models import Note
+
+    cookies = []
+    for index in range(users):
+        user = get_user_model().objects.create(username=f'load-{index}')
+        Note.objects.bulk_create(
+            Note(
+                title=f'Заметка {index}-{number}',
+                text='Текст заметки ' * 20,
+                slug=f'load-{index}-{number}',
+                author=user,
+            )
+            for number in range(notes_per_user)
+        )
+        client = Client()
+        client.force_login(user)
+        cookies.append((client.cookies, f'load-{index}-0'))
+    return cookies
+
+
+def use_async_views(enabled):
+    from django.conf import settings
+    from django.urls import clear_url_caches
+
+    settings.NOTES_ASYNC_VIEWS = enabled
+    import notes.urls
+    import yanote.urls
+    importlib.reload(notes.urls)
+    importlib.reload(yanote.urls)
+    clear_url_caches()
+
+
+async def run_load(sessions, concurrency, requests_per_worker):
+    from django.test import AsyncClient
+    from django.urls import reverse
+
+    latencies = []
+
+    async def worker(number):
+        session_cookies, slug = sessions[number % len(sessions)]
+        client = AsyncClient()
+        client.cookies = session_cookies
+        urls = (reverse('notes:list'), reverse('notes:detail', args=(slug,)))
+        for index in range(requests_per_worker):
+            start = time.perf_counter()
+            response = await client.get(urls[index % len(urls)])
+            latencies.append(time.perf_counter() - start)
+            assert response.status_code == 200, response.status_code
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(number) for number in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'requests_per_sec': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(statistics.median(latencies) * 1000, 2),
+        'p95_ms': round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--requests', type=int, default=20,
+                        help='Запросов на одного конкурентного клиента.')
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--notes', type=int, default=200)
+    args = parser.parse_args(argv)
+
+    setup_django()
+    from django.db import connection
+    from django.test.utils import (
+        setup_test_environment, teardown_test_environment,
+    )
+
+    from notes.cache import get_note_cache
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        sessions = seed(args.users, args.notes)
+        results = {}
+        for mode, enabled in (('sync', False), ('async', True)):
+            use_async_views(enabled)
+            # Каждый режим стартует с холодным кэшем заметок.
+            get_note_cache().clear()
+            results[mode] = asyncio.run(
+                run_load(sessions, args.concurrency, args.requests)
+            )
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+    print(json.dumps(results, indent=2))
+    return results
+
+
+if __name__ == '__main__':
+    main()
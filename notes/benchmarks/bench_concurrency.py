@@ -0,0 +1,134 @@
+# Параллельные писатели и читатели на файловой SQLite: pytest notes/benchmarks
+import threading
+import time
+
+import pytest
+
+from django.contrib.auth import get_user_model
+from django.db import connection, connections
+from django.test.client import Client
+from django.urls import reverse
+
+from notes.bulk import delete_user
+from notes.cache import get_note_cache
+from notes.models import Note
+from .conftest import WRITE_TEXT
+
+WRITERS = 4
+READERS = 4
+REQUESTS_PER_THREAD = 15
+DOOMED_NOTES = 5000
+
+
+def run_client(username, action, errors, statuses):
+    try:
+        user = get_user_model().objects.get(username=username)
+        client = Client()
+        client.force_login(user)
+        for number in range(REQUESTS_PER_THREAD):
+            statuses.append(action(client, number))
+    except Exception as error:  # noqa: B902 - собираем любые сбои потока
+        errors.append(repr(error))
+    finally:
+        connections.close_all()
+
+
+def test_writers_and_readers_do_not_lock(shared_db, bench_config,
+                                         bench_results):
+    if connection.vendor != 'sqlite':
+        pytest.skip('Проверка блокировок SQLite.')
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA journal_mode')
+        assert cursor.fetchone()[0] == 'wal'
+    add_url = reverse('notes:add')
+    list_url = reverse('notes:list')
+
+    def write(client, number):
+        return client.post(add_url, {
+            'title': f'Поток {threading.get_ident()} {number}',
+            'text': WRITE_TEXT,
+        }).status_code
+
+    def read(client, number):
+        return client.get(list_url).status_code
+
+    users = [f'bench-{index % bench_config["users"]}'
+             for index in range(WRITERS + READERS)]
+    errors, statuses = [], []
+    threads = [
+        threading.Thread(
+            target=run_client,
+            args=(users[index], write if index < WRITERS else read,
+                  errors, statuses),
+        )
+        for index in range(WRITERS + READERS)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    bench_results['concurrent_write_read'] = {
+        'threads': len(threads),
+        'requests': len(statuses),
+        'requests_per_sec': round(len(statuses) / elapsed, 1),
+    }
+    assert not errors, errors
+    assert set(statuses) <= {200, 302}, statuses
+    assert len(statuses) == len(threads) * REQUESTS_PER_THREAD
+
+
+def test_user_deletion_keeps_readers_responsive(shared_db, bench_results):
+    """Читатели списка, пока удаляется пользователь с тысячами заметок."""
+    if connection.vendor != 'sqlite':
+        pytest.skip('Проверка блокировок SQLite.')
+    doomed = get_user_model().objects.create(username='bench-doomed')
+    Note.objects.bulk_create(
+        (
+            Note(title=f'Удаляемая {number}', text=WRITE_TEXT,
+                 slug=f'bench-doomed-{number}', author=doomed)
+            for number in range(DOOMED_NOTES)
+        ),
+        batch_size=1000,
+    )
+    list_url = reverse('notes:list')
+    latencies, errors = [], []
+    deleting = threading.Event()
+
+    def reader():
+        try:
+            client = Client()
+            client.force_login(
+                get_user_model().objects.get(username='bench-0')
+            )
+            while deleting.is_set():
+                # Сбрасываем кэш, чтобы каждый запрос шёл в базу.
+                get_note_cache().clear()
+                start = time.perf_counter()
+                client.get(list_url)
+                latencies.append(time.perf_counter() - start)
+        except Exception as error:  # noqa: B902 - собираем любые сбои потока
+            errors.append(repr(error))
+        finally:
+            connections.close_all()
+
+    deleting.set()
+    thread = threading.Thread(target=reader)
+    thread.start()
+    start = time.perf_counter()
+    delete_user(doomed.pk, batch_size=200)
+    elapsed = time.perf_counter() - start
+    deleting.clear()
+    thread.join()
+    latencies.sort()
+    bench_results['delete_user_with_readers'] = {
+        'notes': DOOMED_NOTES,
+        'delete_sec': round(elapsed, 3),
+        'reads': len(latencies),
+        'read_p95_ms': round(
+            latencies[max(int(len(latencies) * 0.95) - 1, 0)] * 1000, 2
+        ) if latencies else None,
+    }
+    assert not errors, errors
+    assert not Note.objects.filter(author_id=doomed.pk).exists()
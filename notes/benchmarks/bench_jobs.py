@@ -0,0 +1,66 @@
+# Очередь фоновых задач: pytest notes/benchmarks
+import time
+from unittest import mock
+
+import pytest
+
+from django.contrib.admin import helpers
+from django.test.client import Client
+from django.urls import reverse
+
+from notes import jobs
+from notes.models import Job, Note
+
+JOB_COUNT = 40
+JOB_SECONDS = 0.01
+
+
+@pytest.fixture
+def admin_client(django_user_model):
+    client = Client()
+    client.force_login(
+        django_user_model.objects.create_superuser('bench-admin')
+    )
+    return client
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('mode', ('inline', 'queued'))
+def test_admin_delete_latency(mode, admin_client, benchmark, settings):
+    """Время ответа админки на удаление всех заметок автора."""
+    settings.NOTES_JOBS = {
+        **settings.NOTES_JOBS, 'THRESHOLD': 10 ** 9 if mode == 'inline' else 1
+    }
+    ids = list(
+        Note.objects.filter(author__username='bench-1')
+        .values_list('pk', flat=True)
+    )
+
+    def delete():
+        admin_client.post(reverse('admin:notes_note_changelist'), {
+            'action': 'delete_notes',
+            helpers.ACTION_CHECKBOX_NAME: ids,
+        })
+
+    # Заметки удаляются один раз, поэтому и замер один.
+    benchmark(f'admin_delete_{mode}', delete, rounds=1)
+    assert Note.objects.filter(pk__in=ids).exists() == (mode == 'queued')
+
+
+@pytest.mark.parametrize('workers', (1, 4))
+def test_worker_pool(workers, shared_db, bench_results):
+    """Пропускная способность воркера на задачах, ждущих ввода-вывода."""
+    with mock.patch.dict(jobs.REGISTRY, {
+        'bench.sleep': lambda: time.sleep(JOB_SECONDS),
+    }):
+        for _ in range(JOB_COUNT):
+            jobs.enqueue('bench.sleep')
+        start = time.perf_counter()
+        done = jobs.run_pending(workers)
+        elapsed = time.perf_counter() - start
+    bench_results[f'jobs_workers_{workers}'] = {
+        'jobs': done,
+        'jobs_per_sec': round(done / elapsed, 1),
+    }
+    assert done == JOB_COUNT
+    assert not Job.objects.exclude(status=Job.DONE).exists()
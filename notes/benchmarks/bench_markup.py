@@ -0,0 +1,93 @@
+# Markdown в заметках: pytest notes/benchmarks
+import pytest
+
+from django.urls import reverse
+
+from notes.markup import render_markdown
+from notes.models import Note
+
+pytestmark = pytest.mark.django_db
+
+# Раздел большой заметки: заголовок, список, таблица и блок кода.
+SECTION = '''## Раздел {number}
+
+Текст с **выделением**, *курсивом* и [ссылкой](https://example.com/{number}).
+
+- пункт один
+- пункт два
+
+| Ключ | Значение |
+|------|----------|
+| a    | {number} |
+
+```python
+print({number})
+```
+
+'''
+SECTIONS = 500
+# Отрисовка большой заметки идёт секунды: замеров меньше обычного.
+HEAVY_ROUNDS = 3
+
+
+@pytest.fixture
+def large_text():
+    return ''.join(SECTION.format(number=number) for number in range(SECTIONS))
+
+
+def test_markdown_render_large_note(benchmark, large_text):
+    result = benchmark(
+        'markdown_render_large_note',
+        lambda: render_markdown(large_text),
+        rounds=HEAVY_ROUNDS,
+    )
+    result['text_kb'] = len(large_text.encode()) // 1024
+
+
+@pytest.mark.parametrize('settings_name, fragment_cache', [
+    ('detail_large_markdown_note', False),
+    ('detail_large_markdown_note_fragment_cache', True),
+])
+def test_detail_large_markdown_note(benchmark, author, author_client,
+                                    large_text, settings, settings_name,
+                                    fragment_cache):
+    # HTML отрисован при сохранении: запрос только выводит его.
+    settings.NOTES_FRAGMENT_CACHE = fragment_cache
+    note = Note.objects.create(
+        title='Большая заметка', text=large_text, author=author
+    )
+    url = reverse('notes:detail', args=(note.slug,))
+
+    def detail():
+        response = author_client.get(url)
+        assert response.status_code == 200, response.status_code
+
+    detail()
+    benchmark(settings_name, detail)
+
+
+@pytest.mark.parametrize('mode, inline_limit', [
+    ('inline', 10 ** 9),
+    ('background', 32768),
+])
+def test_save_large_markdown_note(benchmark, author, author_client,
+                                  large_text, settings, mode, inline_limit):
+    """Время ответа на сохранение большой заметки."""
+    settings.NOTES_MARKDOWN_INLINE_LIMIT = inline_limit
+    note = Note.objects.create(title='Большая', text='', author=author)
+    url = reverse('notes:edit', args=(note.slug,))
+
+    def save(round_number):
+        response = author_client.post(url, {
+            'title': note.title,
+            'slug': note.slug,
+            'text': f'{large_text}\n\nПравка {round_number}',
+        })
+        assert response.status_code == 302, response.status_code
+
+    benchmark(
+        f'save_large_markdown_note_{mode}',
+        save,
+        setup=lambda round_number: (round_number,),
+        rounds=HEAVY_ROUNDS,
+    )
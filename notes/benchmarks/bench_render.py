@@ -0,0 +1,74 @@
+# Отрисовка списков заметок: pytest notes/benchmarks --bench-notes 5000
+import copy
+
+import pytest
+
+from django.urls import reverse
+
+from notes.views import NotesList
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def full_page(bench_config, monkeypatch):
+    """Все заметки автора на одной странице."""
+    monkeypatch.setattr(NotesList, 'max_page_size', bench_config['notes'])
+    return {'size': bench_config['notes']}
+
+
+@pytest.fixture
+def uncached_loaders(settings):
+    # Загрузчики без кэша, как в DEBUG: шаблоны читаются при каждом рендере.
+    templates = copy.deepcopy(settings.TEMPLATES)
+    templates[0]['OPTIONS']['loaders'] = [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]
+    settings.TEMPLATES = templates
+
+
+def render_list(client, params):
+    response = client.get(reverse('notes:list'), params)
+    assert response.status_code == 200, response.status_code
+
+
+@pytest.mark.parametrize('name, fragment_cache', [
+    ('list_render', False),
+    ('list_render_fragment_cache', True),
+])
+def test_list_render(benchmark, author_client, full_page, settings, name,
+                     fragment_cache):
+    settings.NOTES_FRAGMENT_CACHE = fragment_cache
+    # Первый запрос прогревает кэш страницы и фрагментов.
+    render_list(author_client, full_page)
+    benchmark(name, lambda: render_list(author_client, full_page))
+
+
+def test_list_render_uncached_loaders(benchmark, author_client, full_page,
+                                      settings, uncached_loaders):
+    settings.NOTES_FRAGMENT_CACHE = False
+    render_list(author_client, full_page)
+    benchmark(
+        'list_render_uncached_loaders',
+        lambda: render_list(author_client, full_page),
+    )
+
+
+def test_list_stream_first_byte(benchmark, author_client):
+    # Под WSGI (тестовый клиент) заметки читаются пачками уже в потоке,
+    # поэтому время до первого куска не зависит от их числа.
+    url = reverse('notes:list') + '?all=1'
+
+    def first_chunk():
+        next(iter(author_client.get(url).streaming_content))
+
+    benchmark('list_stream_first_byte', first_chunk)
+
+
+def test_list_stream_full(benchmark, author_client):
+    url = reverse('notes:list') + '?all=1'
+    benchmark(
+        'list_stream_full',
+        lambda: b''.join(author_client.get(url).streaming_content),
+    )
@@ -0,0 +1,123 @@
+# Замеры страниц заметок: pytest notes/benchmarks
+import pytest
+
+from django.conf import settings
+from django.test.client import Client
+from django.urls import reverse
+
+from notes.cache import get_note_cache
+from notes.models import Note
+from notes.pagination import encode_cursor
+from .conftest import BENCH_PASSWORD
+
+pytestmark = pytest.mark.django_db
+
+
+def get_ok(client, url, **params):
+    response = client.get(url, params)
+    assert response.status_code == 200, response.status_code
+
+
+def test_list(benchmark, author_client):
+    url = reverse('notes:list')
+    benchmark(
+        'list',
+        lambda: get_ok(author_client, url),
+        # Холодный кэш: каждый замер идёт в базу.
+        setup=lambda number: get_note_cache().clear() or (),
+    )
+
+
+def test_list_cached(benchmark, author_client):
+    url = reverse('notes:list')
+    get_ok(author_client, url)
+    benchmark('list_cached', lambda: get_ok(author_client, url))
+
+
+def test_list_deep_page(benchmark, author_client, author):
+    # Страница в конце списка должна стоить столько же, сколько первая.
+    ids = Note.objects.filter(author=author).order_by('-id')
+    cursor = encode_cursor(ids.values_list('id', flat=True)[
+        settings.NOTES_PAGE_SIZE
+    ])
+    url = reverse('notes:list')
+    benchmark(
+        'list_deep_page',
+        lambda: get_ok(author_client, url, after=cursor),
+        setup=lambda number: get_note_cache().clear() or (),
+    )
+
+
+def test_detail(benchmark, author_client, note):
+    url = reverse('notes:detail', args=(note.slug,))
+    benchmark(
+        'detail',
+        lambda: get_ok(author_client, url),
+        setup=lambda number: get_note_cache().clear() or (),
+    )
+
+
+def test_create(benchmark, author_client):
+    url = reverse('notes:add')
+
+    def create(number):
+        response = author_client.post(
+            url, {'title': f'Новая заметка {number}', 'text': 'Текст'}
+        )
+        assert response.status_code == 302
+
+    benchmark('create', create, setup=lambda number: (number,))
+
+
+def test_edit(benchmark, author_client, note):
+    url = reverse('notes:edit', args=(note.slug,))
+
+    def edit(number):
+        response = author_client.post(url, {
+            'title': f'Изменённая заметка {number}',
+            'text': 'Новый текст',
+            'slug': note.slug,
+        })
+        assert response.status_code == 302
+
+    benchmark('edit', edit, setup=lambda number: (number,))
+
+
+def test_delete(benchmark, author_client, author):
+    def prepare(number):
+        victim = Note.objects.create(
+            title='Удаляемая', text='Текст', slug=f'victim-{number}',
+            author=author,
+        )
+        return (reverse('notes:delete', args=(victim.slug,)),)
+
+    def delete(url):
+        assert author_client.post(url).status_code == 302
+
+    benchmark('delete', delete, setup=prepare)
+
+
+def test_login(benchmark, author):
+    url = reverse('users:login')
+
+    def login(client):
+        response = client.post(
+            url, {'username': author.username, 'password': BENCH_PASSWORD}
+        )
+        assert response.status_code == 302
+
+    benchmark('login', login, setup=lambda number: (Client(),))
+
+
+def test_signup(benchmark):
+    url = reverse('users:signup')
+
+    def signup(number):
+        response = Client().post(url, {
+            'username': f'new-user-{number}',
+            'password1': BENCH_PASSWORD,
+            'password2': BENCH_PASSWORD,
+        })
+        assert response.status_code == 302
+
+    benchmark('signup', signup, setup=lambda number: (number,))
@@ -0,0 +1,172 @@
+# conftest.py бенчмарков: запуск - pytest notes/benchmarks
+import json
+import statistics
+import time
+from pathlib import Path
+
+import pytest
+
+from django.test.client import Client
+
+from notes.cache import get_note_cache
+from notes.models import Note
+
+BENCH_PASSWORD = 'bench-password-123'
+
+# Текст заметок, которые пишут замеры на общей базе (shared_db).
+WRITE_TEXT = 'Параллельная запись'
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('notes-benchmarks')
+    group.addoption('--bench-users', type=int, default=5,
+                    help='Сколько пользователей создать.')
+    group.addoption('--bench-notes', type=int, default=500,
+                    help='Сколько заметок у каждого пользователя.')
+    group.addoption('--bench-rounds', type=int, default=30,
+                    help='Сколько раз повторить каждый замер.')
+    group.addoption('--bench-output', default=None,
+                    help='Куда записать результаты в JSON.')
+    group.addoption('--bench-baseline', default=None,
+                    help='JSON с прошлыми результатами для сравнения.')
+    group.addoption('--bench-threshold', type=float, default=1.5,
+                    help='Допустимое замедление p50 относительно базы.')
+
+
+@pytest.fixture(scope='session')
+def bench_config(pytestconfig):
+    return {
+        name: pytestconfig.getoption(f'bench_{name}')
+        for name in ('users', 'notes', 'rounds', 'output', 'baseline',
+                     'threshold')
+    }
+
+
+@pytest.fixture(scope='session')
+def django_db_modify_db_settings(tmp_path_factory):
+    # Файл, а не память: WAL, mmap и блокировки работают как в бою.
+    from django.db import connections
+
+    connections['default'].settings_dict['TEST']['NAME'] = str(
+        tmp_path_factory.mktemp('db') / 'bench.sqlite3'
+    )
+
+
+@pytest.fixture(scope='session')
+def django_db_setup(django_db_setup, django_db_blocker, bench_config):
+    # Наполняем базу один раз на всю сессию: тесты только читают её,
+    # а их собственные изменения откатываются после каждого теста.
+    from django.contrib.auth import get_user_model
+
+    User = get_user_model()
+    with django_db_blocker.unblock():
+        for index in range(bench_config['users']):
+            user = User(username=f'bench-{index}')
+            user.set_password(BENCH_PASSWORD)
+            user.save()
+            Note.objects.bulk_create(
+                (
+                    Note(
+                        title=f'Заметка {index} № {number}',
+                        text='Текст заметки для замера. ' * 40,
+                        slug=f'bench-{index}-{number}',
+                        author=user,
+                    )
+                    for number in range(bench_config['notes'])
+                ),
+                batch_size=1000,
+            )
+
+
+@pytest.fixture(scope='session')
+def bench_results(bench_config):
+    results = {}
+    yield results
+    if bench_config['output']:
+        Path(bench_config['output']).write_text(
+            json.dumps(results, indent=2, ensure_ascii=False)
+        )
+    print('\n' + json.dumps(results, indent=2, ensure_ascii=False))
+
+
+@pytest.fixture(scope='session')
+def bench_baseline(bench_config):
+    if not bench_config['baseline']:
+        return {}
+    return json.loads(Path(bench_config['baseline']).read_text())
+
+
+@pytest.fixture
+def benchmark(bench_config, bench_results, bench_baseline):
+    """Замеряет функцию и сравнивает p50 с базовыми результатами."""
+
+    def run(name, func, setup=None, rounds=None):
+        timings = []
+        for round_number in range(rounds or bench_config['rounds']):
+            args = setup(round_number) if setup else ()
+            start = time.perf_counter()
+            func(*args)
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+        result = {
+            'rounds': len(timings),
+            'ops_per_sec': round(len(timings) / sum(timings), 1),
+            'mean_ms': round(statistics.mean(timings) * 1000, 3),
+            'p50_ms': round(statistics.median(timings) * 1000, 3),
+            'p95_ms': round(
+                timings[max(int(len(timings) * 0.95) - 1, 0)] * 1000, 3
+            ),
+        }
+        bench_results[name] = result
+        baseline = bench_baseline.get(name)
+        if baseline:
+            limit = baseline['p50_ms'] * bench_config['threshold']
+            if result['p50_ms'] > limit:
+                pytest.fail(
+                    f'{name}: p50 {result["p50_ms"]} мс хуже допустимых '
+                    f'{limit:.3f} мс (база {baseline["p50_ms"]} мс)'
+                )
+        return result
+
+    return run
+
+
+@pytest.fixture
+def shared_db(django_db_blocker):
+    """База без обёртки теста в транзакцию.
+
+    Обычный тест держит открытую транзакцию на всё время работы,
+    и потоки-писатели ждали бы её. Записи теста удаляются после него,
+    чтобы не менять данные остальных замеров.
+    """
+    from django.db import connections
+
+    from notes.models import Job
+
+    with django_db_blocker.unblock():
+        yield
+        Note.objects.filter(text=WRITE_TEXT).delete()
+        Job.objects.all().delete()
+        connections.close_all()
+
+
+@pytest.fixture(autouse=True)
+def clear_note_cache():
+    get_note_cache().clear()
+
+
+@pytest.fixture
+def author(django_user_model):
+    return django_user_model.objects.get(username='bench-0')
+
+
+@pytest.fixture
+def author_client(author):
+    client = Client()
+    client.force_login(author)
+    return client
+
+
+@pytest.fixture
+def note(author):
+    return Note.objects.filter(author=author).order_by('id').first()
@@ -0,0 +1,58 @@
+"""Микробенчмарк транслитерации заголовков.
+
+Запуск: python -m notes.benchmarks.slugs [--calls N] [--unique M]
+"""
+import argparse
+import json
+import random
+import timeit
+
+from pytils.translit import slugify
+
+from notes.slugs import cached_slugify
+
+WORDS = (
+    'заметка', 'список', 'покупок', 'встреча', 'понедельник', 'отчёт',
+    'квартальный', 'идеи', 'для', 'проекта', 'щётка', 'съёмка', 'журнал',
+    'чтение', 'книги', 'объявление', 'ёлка', 'подъезд', 'фильмы', 'рецепт',
+)
+
+
+def make_titles(calls, unique, seed=0):
+    rng = random.Random(seed)
+    pool = [
+        ' '.join(rng.choice(WORDS) for _ in range(rng.randint(2, 6)))
+        for _ in range(unique)
+    ]
+    return [rng.choice(pool) for _ in range(calls)]
+
+
+def measure(func, titles, repeat=5):
+    best = min(timeit.repeat(
+        lambda: [func(title) for title in titles], number=1, repeat=repeat
+    ))
+    return len(titles) / best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--calls', type=int, default=20000)
+    parser.add_argument('--unique', type=int, default=500)
+    args = parser.parse_args(argv)
+    titles = make_titles(args.calls, args.unique)
+    cached_slugify.cache_clear()
+    results = {
+        'calls': args.calls,
+        'unique_titles': args.unique,
+        'slugify_per_sec': round(measure(slugify, titles)),
+        'cached_slugify_per_sec': round(measure(cached_slugify, titles)),
+    }
+    results['speedup'] = round(
+        results['cached_slugify_per_sec'] / results['slugify_per_sec'], 1
+    )
+    print(json.dumps(results, indent=2))
+    return results
+
+
+if __name__ == '__main__':
+    main()
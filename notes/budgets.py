@@ -0,0 +1,92 @@
+import copy
+import logging
+from contextlib import ContextDecorator, ExitStack, contextmanager
+
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+@contextmanager
+def wrap_queries(wrapper):
+    """Пропускает запросы всех соединений через wrapper на время блока.
+
+    wrapper - обёртка в смысле connection.execute_wrapper().
+    """
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(wrapper))
+        yield wrapper
+
+
+class QueryLog:
+    """Обёртка execute, которая запоминает SQL выполненных запросов."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append(sql)
+        return execute(sql, params, many, context)
+
+
+class QueryBudget(ContextDecorator):
+    """Ограничивает число SQL-запросов в блоке кода или функции.
+
+    Пример::
+
+        with QueryBudget(3, name='список'):
+            ...
+
+        @QueryBudget(2)
+        def view(request):
+            ...
+
+    При превышении бросает QueryBudgetExceeded или, если
+    raise_exception=False, пишет предупреждение в лог.
+    """
+
+    def __init__(self, limit, name=None, raise_exception=True):
+        self.limit = limit
+        self.name = name
+        self.raise_exception = raise_exception
+        self.queries = []
+
+    def __call__(self, func):
+        self.name = self.name or func.__qualname__
+        return super().__call__(func)
+
+    def _recreate_cm(self):
+        # Каждый вызов декорированной функции считает запросы отдельно:
+        # общий экземпляр сбивал бы счёт при вложенных и параллельных
+        # вызовах.
+        return copy.copy(self)
+
+    def __enter__(self):
+        log = QueryLog()
+        self.queries = log.queries
+        self._stack = ExitStack()
+        self._stack.enter_context(wrap_queries(log))
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._stack.close()
+        if exc_type is None:
+            self.check(self.name, self.limit, self.queries,
+                       self.raise_exception)
+        return False
+
+    @staticmethod
+    def check(name, limit, queries, raise_exception=True):
+        if len(queries) <= limit:
+            return
+        message = '{}: {} SQL-запросов при бюджете {}:\n{}'.format(
+            name or 'блок', len(queries), limit, '\n'.join(queries)
+        )
+        if raise_exception:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
@@ -0,0 +1,206 @@
+"""Массовые операции над заметками в обход save() и сигналов.
+
+Крупные операции выполняются фоновыми задачами (notes.jobs) пачками
+по NOTES_JOBS['BATCH_SIZE'] заметок, каждая пачка - в своей короткой
+транзакции.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.db.models import Count, Max, Min
+from django.utils import timezone
+
+from yanote.backends.transaction import write_atomic
+
+from .auth import forget_user
+from .cache import get_note_cache
+from .jobs import enqueue, heartbeat, is_large, register
+from .markup import render_markdown, text_hash
+from .models import Note, NoteRevision, NoteTag
+
+
+def bump_authors(author_ids):
+    # Запись идёт в обход save() и сигналов: кэш сбрасываем сами.
+    for author_id in set(author_ids):
+        get_note_cache().bump(author_id)
+
+
+def authors_of(queryset):
+    return list(
+        queryset.order_by().values_list('author_id', flat=True).distinct()
+    )
+
+
+def delete_rows(queryset):
+    """Удаляет строки выборки одним DELETE, не загружая их в память.
+
+    В отличие от QuerySet.delete() не собирает объекты для сигналов
+    и каскадов: связанные строки вызывающий удаляет сам.
+    """
+    connection = connections[queryset.db]
+    quote_name = connection.ops.quote_name
+    meta = queryset.model._meta
+    sql, params = queryset.order_by().values('pk').query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'DELETE FROM {} WHERE {} IN ({})'.format(
+                quote_name(meta.db_table), quote_name(meta.pk.column), sql,
+            ),
+            params,
+        )
+        return cursor.rowcount
+
+
+def delete_note_rows(queryset):
+    """Удаляет заметки, их метки и версии тремя запросами DELETE.
+
+    Индекс поиска SQLite обновляют триггеры.
+    """
+    authors = authors_of(queryset)
+    with write_atomic(using=queryset.db):
+        for model in (NoteRevision, NoteTag):
+            model.objects.filter(note__in=queryset.values('pk')).delete()
+        deleted = delete_rows(queryset)
+    bump_authors(authors)
+    return deleted
+
+
+def transfer_note_rows(queryset, author_id):
+    """Меняет автора заметок одним запросом UPDATE.
+
+    Метки принадлежат прежнему автору, поэтому снимаются. updated
+    сдвигается, чтобы у нового автора сменились ETag и Last-Modified.
+    """
+    authors = authors_of(queryset)
+    with write_atomic(using=queryset.db):
+        NoteTag.objects.filter(note__in=queryset.values('pk')).delete()
+        updated = queryset.update(
+            author_id=author_id, updated=timezone.now()
+        )
+    bump_authors([*authors, author_id])
+    return updated
+
+
+def note_batches(lookups, batch_size=None):
+    """Заметки Note.objects.filter(**lookups) пачками в порядке id.
+
+    Следующая пачка выбирается по id после предыдущей, поэтому
+    обработанные (удалённые или переданные) заметки её не сдвигают.
+    Между пачками продлевается блокировка задачи (jobs.heartbeat).
+    """
+    batch_size = batch_size or settings.NOTES_JOBS['BATCH_SIZE']
+    notes = Note.objects.filter(**lookups).order_by('id')
+    last_id = 0
+    while True:
+        ids = list(
+            notes.filter(id__gt=last_id).values_list('pk', flat=True)
+            [:batch_size]
+        )
+        if not ids:
+            return
+        yield Note.objects.filter(pk__in=ids)
+        last_id = ids[-1]
+        heartbeat()
+
+
+def selection_lookups(queryset):
+    """Описывает выборку заметок для задачи очереди без списка id.
+
+    Это диапазон id и, если в нём есть заметки не из выборки, её авторы.
+    None, если так выборку точно не описать (например, при поиске
+    по заголовку).
+    """
+    stats = queryset.aggregate(
+        count=Count('id'), first=Min('id'), last=Max('id')
+    )
+    if not stats['count']:
+        return None
+    lookups = {'id__gte': stats['first'], 'id__lte': stats['last']}
+    if Note.objects.filter(**lookups).count() != stats['count']:
+        lookups['author__in'] = authors_of(queryset)
+        if Note.objects.filter(**lookups).count() != stats['count']:
+            return None
+    return lookups
+
+
+@register('notes.delete_notes')
+def delete_notes(lookups):
+    for batch in note_batches(lookups):
+        delete_note_rows(batch)
+
+
+@register('notes.transfer_notes')
+def transfer_notes(lookups, author_id):
+    for batch in note_batches(lookups):
+        transfer_note_rows(batch, author_id)
+
+
+def delete_author_notes(author_id, batch_size=None, progress=None):
+    """Удаляет заметки автора пачками по id, каждую в своей транзакции.
+
+    Между пачками база свободна для остальных запросов. progress
+    вызывается с числом уже удалённых заметок.
+    """
+    total = 0
+    for batch in note_batches({'author_id': author_id}, batch_size):
+        total += delete_note_rows(batch)
+        if progress:
+            progress(total)
+    return total
+
+
+def deactivate_user(user_id):
+    get_user_model().objects.filter(pk=user_id).update(is_active=False)
+    # update() не шлёт сигналов: пользователя из кэша убираем сами.
+    forget_user(user_id)
+
+
+@register('notes.delete_user')
+def delete_user(user_id, batch_size=None, progress=None):
+    """Удаляет пользователя: сначала его заметки пачками, затем его самого.
+
+    Пользователь сразу отключается, чтобы не писать новые заметки.
+    """
+    deactivate_user(user_id)
+    delete_author_notes(user_id, batch_size, progress)
+    get_user_model().objects.filter(pk=user_id).delete()
+
+
+def delete_users(user_ids):
+    """Удаляет пользователей; тех, у кого много заметок, - в фоне.
+
+    Возвращает поставленные в очередь задачи.
+    """
+    counts = dict(
+        Note.objects.filter(author__in=user_ids).order_by()
+        .values_list('author').annotate(Count('id'))
+    )
+    queued = []
+    for user_id in user_ids:
+        if is_large(counts.get(user_id, 0)):
+            deactivate_user(user_id)
+            queued.append(enqueue('notes.delete_user', user_id=user_id))
+        else:
+            delete_user(user_id)
+    return queued
+
+
+@register('notes.render_note')
+def render_note_html(note_id):
+    """Отрисовывает Markdown большой заметки вне запроса."""
+    notes = Note.objects.only('id', 'author_id', 'text', 'text_html_hash')
+    note = notes.filter(pk=note_id).first()
+    if note is None or note.text_html_hash == text_hash(note.text):
+        return
+    digest = text_hash(note.text)
+    html = render_markdown(note.text)
+    with write_atomic():
+        # Пока шла отрисовка, текст могли изменить: тогда HTML устарел,
+        # а новую отрисовку поставило уже то сохранение.
+        current = notes.select_for_update().filter(pk=note_id).first()
+        if current is None or text_hash(current.text) != digest:
+            return
+        Note.objects.filter(pk=note_id).update(
+            text_html=html, text_html_hash=digest
+        )
+    bump_authors([note.author_id])
@@ -0,0 +1,159 @@
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+_MISSING = object()
+
+
+class LocMemLRUCache:
+    """Ограниченный LRU-кэш в памяти процесса (бэкенд по умолчанию).
+
+    Кэш у каждого процесса свой: bump() в одном процессе не виден
+    другим, поэтому записи живут не дольше timeout секунд - столько
+    остальные процессы могут отдавать прежние данные. timeout=None
+    снимает ограничение (только для одного процесса, notes.W001).
+    """
+
+    def __init__(self, max_entries=1024, timeout=5):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                expires, value = self._data[key]
+            except KeyError:
+                return default
+            if expires is not None and expires <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+        # Храним копию, чтобы изменения объекта не попадали в кэш.
+        return pickle.loads(value)
+
+    def set(self, key, value):
+        value = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        expires = None
+        if self.timeout is not None:
+            expires = time.monotonic() + self.timeout
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class DjangoCacheBackend:
+    """Бэкенд поверх кэша Django из настройки CACHES."""
+
+    def __init__(self, alias='default', timeout=300):
+        self.alias = alias
+        self.timeout = timeout
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def get(self, key, default=None):
+        return self.cache.get(key, default)
+
+    def set(self, key, value):
+        self.cache.set(key, value, self.timeout)
+
+    def clear(self):
+        self.cache.clear()
+
+
+class NoteCache:
+    """Кэш чтений заметок с версией на каждого автора.
+
+    Версия входит в ключ каждой записи, поэтому после записи достаточно
+    сменить версию автора: старые записи больше никогда не прочитаются
+    и со временем вытесняются бэкендом.
+    """
+    prefix = 'notes'
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    @classmethod
+    def from_settings(cls):
+        conf = settings.NOTES_CACHE
+        backend = import_string(conf['BACKEND'])(**conf.get('OPTIONS', {}))
+        return cls(backend)
+
+    def _version_key(self, author_id):
+        return f'{self.prefix}:v:{author_id}'
+
+    def get_version(self, author_id):
+        version = self.backend.get(self._version_key(author_id))
+        if version is None:
+            # Версия вытеснена или ещё не создана: новая случайная версия
+            # гарантирует, что уцелевшие старые записи не совпадут.
+            version = self._new_version(author_id)
+        return version
+
+    def _new_version(self, author_id):
+        version = uuid.uuid4().hex
+        self.backend.set(self._version_key(author_id), version)
+        return version
+
+    def bump(self, author_id, using=None):
+        """Инвалидирует все закэшированные чтения автора за O(1).
+
+        Внутри транзакции версия меняется ещё раз после COMMIT: чтения
+        других запросов до фиксации видели старые данные и могли
+        закэшировать их под новой версией.
+        """
+        version = self._new_version(author_id)
+        if transaction.get_connection(using).in_atomic_block:
+            transaction.on_commit(
+                lambda: self._new_version(author_id), using=using
+            )
+        return version
+
+    def get_or_set(self, author_id, key, default):
+        """Возвращает значение из кэша или вычисляет его вызовом default."""
+        version = self.get_version(author_id)
+        full_key = f'{self.prefix}:{author_id}:{version}:{key}'
+        value = self.backend.get(full_key, _MISSING)
+        if value is _MISSING:
+            value = default()
+            self.backend.set(full_key, value)
+        return value
+
+    def clear(self):
+        self.backend.clear()
+
+
+_note_cache = None
+
+
+def get_note_cache():
+    """Кэш заметок, настроенный через NOTES_CACHE."""
+    global _note_cache
+    if _note_cache is None:
+        _note_cache = NoteCache.from_settings()
+    return _note_cache
+
+
+@receiver(setting_changed)
+def reset_note_cache(*, setting, **kwargs):
+    global _note_cache
+    if setting == 'NOTES_CACHE':
+        _note_cache = None
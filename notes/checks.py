@@ -0,0 +1,82 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, Tags, Warning, register
+
+from .cache import LocMemLRUCache, NoteCache
+
+CACHED_BACKEND = 'notes.auth.CachedModelBackend'
+
+
+# Сессии, которые живут в кэше (SESSION_CACHE_ALIAS).
+CACHED_SESSIONS = (
+    'django.contrib.sessions.backends.cache',
+    'django.contrib.sessions.backends.cached_db',
+)
+
+
+def is_local(alias):
+    """Кэш alias свой у каждого процесса."""
+    return isinstance(caches[alias], LocMemCache)
+
+
+@register(Tags.caches)
+def check_auth_cache(app_configs, **kwargs):
+    """Проверяет, что у CachedModelBackend кэш общий для всех процессов.
+
+    forget_user сбрасывает запись только в кэше своего процесса: с
+    LocMemCache другие процессы ещё TIMEOUT секунд видят старый пароль
+    и отключённого пользователя.
+    """
+    if CACHED_BACKEND not in settings.AUTHENTICATION_BACKENDS:
+        return []
+    alias = settings.NOTES_AUTH_CACHE['ALIAS']
+    if not is_local(alias):
+        return []
+    return [Error(
+        f'{CACHED_BACKEND} нельзя использовать с LocMemCache '
+        f'(кэш {alias!r}): он не общий для процессов.',
+        hint='Задайте общий кэш (DJANGO_CACHE_BACKEND) или верните '
+             'django.contrib.auth.backends.ModelBackend.',
+        id='notes.E001',
+    )]
+
+
+@register(Tags.caches)
+def check_session_cache(app_configs, **kwargs):
+    """Проверяет, что сессии в кэше лежат в общем для процессов кэше.
+
+    Выход удаляет сессию только из кэша своего процесса: с LocMemCache
+    на остальных она действует до SESSION_COOKIE_AGE.
+    """
+    if settings.SESSION_ENGINE not in CACHED_SESSIONS:
+        return []
+    alias = settings.SESSION_CACHE_ALIAS
+    if not is_local(alias):
+        return []
+    return [Error(
+        f'Сессии {settings.SESSION_ENGINE} нельзя хранить в LocMemCache '
+        f'(кэш {alias!r}): он не общий для процессов.',
+        hint='Задайте общий кэш (DJANGO_CACHE_BACKEND) или '
+             'DJANGO_SESSION_ENGINE=db.',
+        id='notes.E002',
+    )]
+
+
+@register(Tags.caches)
+def check_note_cache(app_configs, **kwargs):
+    """Предупреждает о локальном кэше заметок без срока жизни записей.
+
+    bump() сбрасывает кэш только своего процесса: без timeout другие
+    процессы отдают прежние заметки, списки и ETag до вытеснения.
+    """
+    backend = NoteCache.from_settings().backend
+    if not isinstance(backend, LocMemLRUCache) or backend.timeout:
+        return []
+    return [Warning(
+        'LocMemLRUCache в NOTES_CACHE без timeout: после правки другие '
+        'процессы отдают прежние данные, пока запись не вытеснена.',
+        hint="Задайте OPTIONS['timeout'] или общий кэш "
+             '(notes.cache.DjangoCacheBackend).',
+        id='notes.W001',
+    )]
@@ -0,0 +1,71 @@
+r"""Поле текста, которое сжимает большие значения при записи.
+
+Значение длиннее порога хранится как маркер и base64 сжатых данных:
+``\x01zlib:...`` или ``\x01lzma:...``. Короткие тексты лежат в базе
+как есть, поэтому по ним работают LIKE и полнотекстовый поиск; сжатые
+тексты поиск по телу не находит. Чтение распознаёт маркер всегда,
+даже если сжатие выключено настройкой NOTES_COMPRESSION.
+"""
+import base64
+import lzma
+import zlib
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import models
+
+MARKER = '\x01'
+# Несжатый текст, который сам начинается с маркера.
+RAW_PREFIX = MARKER + 'raw:'
+
+CODECS = {
+    'zlib': (zlib.compress, zlib.decompress),
+    'lzma': (lzma.compress, lzma.decompress),
+}
+
+
+def is_compressed(value):
+    return isinstance(value, str) and value.startswith(MARKER)
+
+
+def compress(value):
+    """Текст в том виде, в каком он хранится в базе."""
+    conf = getattr(settings, 'NOTES_COMPRESSION', None)
+    if conf and len(value) >= conf['THRESHOLD']:
+        algorithm = conf.get('ALGORITHM', 'zlib')
+        try:
+            encode = CODECS[algorithm][0]
+        except KeyError:
+            raise ImproperlyConfigured(
+                f'NOTES_COMPRESSION: неизвестный алгоритм {algorithm!r}.'
+            )
+        data = base64.b64encode(encode(value.encode())).decode('ascii')
+        return f'{MARKER}{algorithm}:{data}'
+    if value.startswith(MARKER):
+        return RAW_PREFIX + value
+    return value
+
+
+def decompress(value):
+    if not is_compressed(value):
+        return value
+    if value.startswith(RAW_PREFIX):
+        return value[len(RAW_PREFIX):]
+    algorithm, _, data = value[len(MARKER):].partition(':')
+    return CODECS[algorithm][1](base64.b64decode(data)).decode()
+
+
+class CompressedTextField(models.TextField):
+    """TextField со сжатием больших значений (см. модуль)."""
+
+    def from_db_value(self, value, expression, connection):
+        # Распаковывается только прочитанное из базы: to_python получает
+        # и ввод пользователя, где маркер - обычный текст.
+        return decompress(value)
+
+    def get_db_prep_save(self, value, connection):
+        # Только запись: значения фильтров не сжимаются.
+        value = super().get_db_prep_save(value, connection)
+        if isinstance(value, str):
+            return compress(value)
+        return value
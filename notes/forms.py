@@ -1,29 +1,47 @@
-from pytils.translit import slugify
-
 from django import forms
 from django.core.exceptions import ValidationError
 
-from .models import Note
-
-WARNING = ' - такой slug уже существует, придумайте уникальное значение!'
+from .models import WARNING, Note  # noqa: F401 - WARNING для тестов
+from .tags import TAG_MAX_LENGTH, parse_tags, set_note_tags, tag_names
 
 
 class NoteForm(forms.ModelForm):
     """Форма для создания или обновления заметки."""
+    tags = forms.CharField(
+        label='Метки',
+        required=False,
+        help_text='Через запятую, например: работа, идеи',
+    )
 
     class Meta:
         model = Note
         fields = ('title', 'text', 'slug')
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.pk and not self.is_bound:
+            self.initial['tags'] = ', '.join(tag_names(self.instance))
+
+    def clean_tags(self):
+        names = parse_tags(self.cleaned_data.get('tags', ''))
+        for name in names:
+            if len(name) > TAG_MAX_LENGTH:
+                raise ValidationError(
+                    f'Метка длиннее {TAG_MAX_LENGTH} символов: {name}'
+                )
+        return names
+
+    def _save_m2m(self):
+        super()._save_m2m()
+        # Метки без поля в данных (PATCH в API) не меняются.
+        if 'tags' in self.data:
+            set_note_tags(self.instance, self.cleaned_data['tags'])
+
     def clean_slug(self):
-        """Обрабатывает случай, если slug не уникален."""
-        cleaned_data = super().clean()
-        slug = cleaned_data.get('slug')
-        if not slug:
-            title = cleaned_data.get('title')
-            slug = slugify(title)[:100]
-        if Note.objects.filter(
-                slug=slug
-        ).exclude(id=self.instance.pk).exists():
-            raise ValidationError(slug + WARNING)
-        return slug
+        """Пустой slug - None: уникальный slug из заголовка подберёт
+        Note.save(), проверять его уникальность незачем.
+
+        Явный slug проверяет validate_unique() модели одним запросом,
+        текст ошибки задаёт Note.unique_error_message().
+        """
+        return self.cleaned_data.get('slug') or None
@@ -0,0 +1,172 @@
+"""Очередь фоновых задач в базе.
+
+Задача - функция, зарегистрированная под именем через @register.
+enqueue() записывает её вызов в таблицу Job, а manage.py run_jobs
+выполняет задачи в пуле потоков. Аргументы задачи должны сериализоваться
+в JSON, а сама задача - выдерживать повторный запуск: после сбоя
+её вызов повторяется целиком. Долгая задача вызывает heartbeat()
+между пачками, иначе через TIMEOUT её заберёт другой воркер.
+"""
+import logging
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+REGISTRY = {}
+
+# Задача, которую выполняет текущий поток (для heartbeat).
+_current_job = ContextVar('notes_current_job', default=None)
+
+
+def register(name):
+    """Регистрирует функцию как задачу очереди под именем name."""
+    def decorator(func):
+        REGISTRY[name] = func
+        return func
+    return decorator
+
+
+def enqueue(name, **payload):
+    if name not in REGISTRY:
+        raise KeyError(f'Задача {name!r} не зарегистрирована.')
+    return Job.objects.create(
+        name=name,
+        payload=payload,
+        max_attempts=settings.NOTES_JOBS['MAX_ATTEMPTS'],
+    )
+
+
+def is_large(size):
+    return size >= settings.NOTES_JOBS['THRESHOLD']
+
+
+class JobLost(Exception):
+    """Задачу, пока она выполнялась, забрал другой воркер."""
+
+
+def heartbeat():
+    """Продлевает блокировку выполняемой задачи.
+
+    Долгие задачи вызывают её между пачками, чтобы их не сочли
+    брошенными через TIMEOUT. Вне задачи ничего не делает.
+    """
+    job = _current_job.get()
+    if job is None:
+        return
+    now = timezone.now()
+    if not running(job).update(locked_at=now):
+        raise JobLost(f'Задачу {job} забрал другой воркер.')
+    job.locked_at = now
+
+
+def running(job):
+    """Задача, пока её держит именно эта попытка."""
+    return Job.objects.filter(
+        pk=job.pk, status=Job.RUNNING, attempts=job.attempts
+    )
+
+
+def claim_job():
+    """Берёт готовую к запуску задачу.
+
+    Задачу забирает условный UPDATE по прежним состоянию и числу
+    попыток: из параллельных воркеров его выполнит только один.
+    Брошенная задача без оставшихся попыток считается упавшей.
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.NOTES_JOBS['TIMEOUT'])
+    Job.objects.filter(
+        status=Job.RUNNING, locked_at__lt=stale,
+        attempts__gte=F('max_attempts'),
+    ).update(
+        status=Job.FAILED, finished=now, locked_at=None,
+        error='Задача не завершилась за NOTES_JOBS["TIMEOUT"].',
+    )
+    ready = Job.objects.filter(
+        Q(status=Job.QUEUED, run_after__lte=now)
+        | Q(status=Job.RUNNING, locked_at__lt=stale)
+    ).order_by('run_after', 'id')
+    for job in ready[:10]:
+        claimed = Job.objects.filter(
+            pk=job.pk, status=job.status, attempts=job.attempts,
+        ).update(
+            status=Job.RUNNING, locked_at=now, attempts=F('attempts') + 1,
+        )
+        if claimed:
+            job.status, job.locked_at = Job.RUNNING, now
+            job.attempts += 1
+            return job
+    return None
+
+
+def run_job(job):
+    """Выполняет взятую задачу; True, если она завершилась успешно.
+
+    Итог записывается, только если задачу не забрал другой воркер.
+    """
+    token = _current_job.set(job)
+    try:
+        REGISTRY[job.name](**job.payload)
+    except JobLost:
+        logger.warning('Задачу %s забрал другой воркер.', job)
+        return False
+    except Exception:  # noqa: B902 - сбой задачи не должен ронять воркер
+        logger.exception('Задача %s упала (попытка %s).', job, job.attempts)
+        now = timezone.now()
+        if job.attempts >= job.max_attempts:
+            changes = {'status': Job.FAILED, 'finished': now}
+        else:
+            delay = settings.NOTES_JOBS['RETRY_DELAY'] * 2 ** (
+                job.attempts - 1
+            )
+            changes = {
+                'status': Job.QUEUED,
+                'run_after': now + timedelta(seconds=delay),
+            }
+        running(job).update(
+            error=traceback.format_exc(), locked_at=None, **changes
+        )
+        return False
+    finally:
+        _current_job.reset(token)
+    return bool(running(job).update(
+        status=Job.DONE, finished=timezone.now(), locked_at=None, error='',
+    ))
+
+
+def drain():
+    """Выполняет задачи, пока они есть; возвращает их число."""
+    done = 0
+    while True:
+        job = claim_job()
+        if job is None:
+            return done
+        run_job(job)
+        done += 1
+
+
+def _drain_in_thread():
+    try:
+        return drain()
+    finally:
+        # У каждого потока своё соединение с базой.
+        connection.close()
+
+
+def run_pending(workers=1):
+    """Разбирает очередь в workers потоках; возвращает число задач."""
+    if workers <= 1:
+        return drain()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_drain_in_thread) for _ in range(workers)]
+        return sum(future.result() for future in futures)
@@ -0,0 +1,60 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from notes.models import NoteRevision
+from notes.revisions import pack, revision_text
+from yanote.backends.transaction import write_atomic
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет старые версии заметок: остаются последние --keep версий '
+        'и версии моложе --days дней. Первая оставшаяся версия '
+        'превращается в снимок, чтобы разницы после неё восстанавливались.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--keep', type=int, default=settings.NOTES_REVISIONS_KEEP,
+            help='Сколько последних версий оставить у каждой заметки.',
+        )
+        parser.add_argument(
+            '--days', type=int,
+            help='Удалять и версии старше стольких дней (последняя '
+                 'версия заметки остаётся всегда).',
+        )
+
+    def handle(self, *args, **options):
+        keep = options['keep']
+        if keep < 1:
+            raise CommandError('--keep должен быть не меньше 1.')
+        aggregates = {'last': Max('number')}
+        if options['days'] is not None:
+            border = timezone.now() - timedelta(days=options['days'])
+            aggregates['last_old'] = Max(
+                'number', filter=Q(created__lt=border)
+            )
+        notes = NoteRevision.objects.values('note').annotate(**aggregates)
+        total = 0
+        for row in notes.iterator():
+            first_kept = max(row['last'] - keep, row.get('last_old') or 0) + 1
+            total += self.compact(row['note'], min(first_kept, row['last']))
+        self.stderr.write(f'Удалено версий: {total}')
+
+    @write_atomic()
+    def compact(self, note_id, first_kept):
+        """Удаляет версии заметки до first_kept, сохраняя её текст."""
+        revisions = NoteRevision.objects.filter(note_id=note_id)
+        dropped = revisions.filter(number__lt=first_kept)
+        if not dropped.exists():
+            return 0
+        first = revisions.select_related('note').get(number=first_kept)
+        if not first.is_snapshot:
+            first.data = pack(revision_text(first))
+            first.is_snapshot = True
+            first.save(update_fields=('data', 'is_snapshot'))
+        return dropped.delete()[0]
@@ -0,0 +1,50 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models.functions import Length
+
+from notes.fields import MARKER, compress
+from notes.models import Note
+from yanote.backends.transaction import write_atomic
+
+
+class Command(BaseCommand):
+    help = (
+        'Сжимает тексты существующих заметок длиннее порога '
+        'NOTES_COMPRESSION пачками по id.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200)
+
+    def handle(self, *args, **options):
+        conf = settings.NOTES_COMPRESSION
+        if not conf:
+            raise CommandError('Сжатие выключено: NOTES_COMPRESSION = None.')
+        candidates = (
+            Note.objects.annotate(size=Length('text'))
+            .filter(size__gte=conf['THRESHOLD'])
+            .exclude(text__startswith=MARKER)
+            .only('id', 'text')
+            .order_by('id')
+        )
+        last_id, total, before, after = 0, 0, 0, 0
+        while True:
+            # Чтение и запись в одной транзакции с блокировкой строк:
+            # параллельная правка заметки не потеряется.
+            with write_atomic():
+                batch = list(
+                    candidates.select_for_update()
+                    .filter(id__gt=last_id)[:options['batch_size']]
+                )
+                # bulk_update сжимает текст при записи; содержимое заметок
+                # не меняется, поэтому ни версии, ни сброс кэша не нужны.
+                Note.objects.bulk_update(batch, ['text'])
+            if not batch:
+                break
+            last_id = batch[-1].id
+            total += len(batch)
+            for note in batch:
+                before += len(note.text.encode())
+                after += len(compress(note.text))
+            self.stderr.write(f'Сжато заметок: {total}')
+        self.stderr.write(f'Было {before} байт, стало {after} байт.')
@@ -0,0 +1,41 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from notes.bulk import delete_author_notes, delete_user
+from notes.models import Note
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет пользователя и его заметки пачками в коротких '
+        'транзакциях, не блокируя базу надолго.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument(
+            '--batch-size', type=int,
+            help='Заметок в пачке; по умолчанию NOTES_JOBS["BATCH_SIZE"].',
+        )
+        parser.add_argument(
+            '--keep-user', action='store_true',
+            help='Удалить только заметки, пользователя оставить.',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(username=options['username'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(
+                f'Пользователь {options["username"]} не найден.'
+            )
+        total = Note.objects.filter(author=user).count()
+
+        def progress(deleted):
+            self.stderr.write(f'Удалено заметок: {deleted} из {total}')
+
+        if options['keep_user']:
+            delete_author_notes(user.pk, options['batch_size'], progress)
+            return
+        delete_user(user.pk, options['batch_size'], progress)
+        self.stderr.write(f'Пользователь {user.username} удалён.')
@@ -0,0 +1,56 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from notes.models import Note
+
+EXPORT_FIELDS = (
+    'author__username', 'title', 'text', 'slug', 'created', 'updated',
+)
+
+
+class Command(BaseCommand):
+    help = 'Выгружает заметки в JSONL: одна заметка на строку.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', help='Выгрузить заметки только этого пользователя.'
+        )
+        parser.add_argument(
+            '--output', help='Файл для выгрузки (по умолчанию stdout).'
+        )
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        notes = Note.objects.order_by('id')
+        if options['user']:
+            notes = notes.filter(author__username=options['user'])
+        rows = notes.values_list(*EXPORT_FIELDS).iterator(
+            chunk_size=options['chunk_size']
+        )
+        if options['output']:
+            try:
+                with open(options['output'], 'w', encoding='utf-8') as output:
+                    count = self.write_rows(rows, output)
+            except OSError as error:
+                raise CommandError(error)
+        else:
+            count = self.write_rows(rows, self.stdout)
+        self.stderr.write(f'Выгружено заметок: {count}')
+
+    def write_rows(self, rows, output):
+        count = 0
+        for author, title, text, slug, created, updated in rows:
+            output.write(json.dumps(
+                {
+                    'author': author,
+                    'title': title,
+                    'text': text,
+                    'slug': slug,
+                    'created': created.isoformat(),
+                    'updated': updated.isoformat(),
+                },
+                ensure_ascii=False,
+            ) + '\n')
+            count += 1
+        return count
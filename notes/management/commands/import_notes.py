@@ -0,0 +1,125 @@
+import json
+import sys
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+
+from notes.cache import get_note_cache
+from notes.markup import render_note
+from notes.models import Note
+from notes.slugs import allocate_slugs
+from yanote.backends.transaction import write_atomic
+
+User = get_user_model()
+
+TIMESTAMP_FIELDS = ('created', 'updated')
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает заметки из JSONL пачками через bulk_create; '
+        'занятые slug получают суффикс.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл JSONL или «-» для stdin.')
+        parser.add_argument(
+            '--user', help='Назначить все заметки этому пользователю.'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        self.authors = {}
+        if options['user']:
+            self.default_author = self.get_author(options['user'])
+        else:
+            self.default_author = None
+        path = options['path']
+        if path == '-':
+            return self.import_lines(sys.stdin, options['batch_size'])
+        try:
+            with open(path, encoding='utf-8') as lines:
+                self.import_lines(lines, options['batch_size'])
+        except OSError as error:
+            raise CommandError(error)
+
+    def import_lines(self, lines, batch_size):
+        rows = (
+            self.build_note(number, line)
+            for number, line in enumerate(lines, start=1)
+            if line.strip()
+        )
+        max_length = Note._meta.get_field('slug').max_length
+        total = 0
+        while True:
+            rows_batch = list(islice(rows, batch_size))
+            if not rows_batch:
+                break
+            batch = [note for note, timestamps in rows_batch]
+            with write_atomic():
+                allocate_slugs(batch, max_length)
+                Note.objects.bulk_create(batch, batch_size=batch_size)
+                self.restore_timestamps(rows_batch, batch_size)
+            # bulk_create не шлёт сигналы - сбрасываем кэш авторов сами.
+            for author_id in {note.author_id for note in batch}:
+                get_note_cache().bump(author_id)
+            total += len(batch)
+            self.stderr.write(f'Загружено заметок: {total}')
+
+    def build_note(self, number, line):
+        try:
+            data = json.loads(line)
+            author = self.default_author or self.get_author(data['author'])
+            note = Note(
+                title=data['title'],
+                text=data['text'],
+                slug=data.get('slug') or '',
+                author=author,
+            )
+            # bulk_create обходит Note.save(): HTML текста рисуем здесь.
+            render_note(note, background=False)
+            timestamps = {
+                name: self.parse_timestamp(data[name])
+                for name in TIMESTAMP_FIELDS if data.get(name)
+            }
+            return note, timestamps
+        except (ValueError, KeyError, TypeError) as error:
+            raise CommandError(f'Строка {number}: {error!r}')
+
+    def parse_timestamp(self, value):
+        timestamp = parse_datetime(value)
+        if timestamp is None:
+            raise ValueError(f'некорректная дата {value!r}')
+        return timestamp
+
+    def restore_timestamps(self, rows, batch_size):
+        """Возвращает заметкам даты из выгрузки.
+
+        bulk_create всегда ставит auto_now-поля в текущее время, а id
+        на SQLite не возвращает: находим заметки по slug и обновляем
+        даты одним bulk_update.
+        """
+        rows = [(note, timestamps) for note, timestamps in rows if timestamps]
+        if not rows:
+            return
+        ids = dict(Note.objects.filter(
+            slug__in=[note.slug for note, timestamps in rows]
+        ).values_list('slug', 'id'))
+        for note, timestamps in rows:
+            note.pk = ids[note.slug]
+            for name, value in timestamps.items():
+                setattr(note, name, value)
+        Note.objects.bulk_update(
+            [note for note, timestamps in rows], TIMESTAMP_FIELDS,
+            batch_size=batch_size,
+        )
+
+    def get_author(self, username):
+        if username not in self.authors:
+            try:
+                self.authors[username] = User.objects.get(username=username)
+            except User.DoesNotExist:
+                raise CommandError(f'Пользователь {username} не найден.')
+        return self.authors[username]
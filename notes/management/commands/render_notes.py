@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand
+
+from notes.bulk import bump_authors
+from notes.markup import render_note, text_hash
+from notes.models import Note
+from yanote.backends.transaction import write_atomic
+
+
+class Command(BaseCommand):
+    help = (
+        'Отрисовывает Markdown заметок, у которых нет HTML или он устарел, '
+        'пачками по id.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200)
+
+    def handle(self, *args, **options):
+        notes = Note.objects.only(
+            'id', 'author_id', 'text', 'text_html_hash'
+        ).order_by('id')
+        last_id, checked, rendered = 0, 0, 0
+        while True:
+            batch = list(
+                notes.filter(id__gt=last_id)[:options['batch_size']]
+            )
+            if not batch:
+                break
+            # Отрисовка долгая, поэтому идёт вне транзакции.
+            changed = [
+                note for note in batch
+                if render_note(note, background=False)
+            ]
+            with write_atomic():
+                # Текст, изменённый за время отрисовки, уже перерисовало
+                # его сохранение - такие заметки пропускаем.
+                texts = dict(
+                    notes.select_for_update()
+                    .filter(pk__in=[note.pk for note in changed])
+                    .values_list('pk', 'text')
+                )
+                changed = [
+                    note for note in changed if note.pk in texts
+                    and text_hash(texts[note.pk]) == note.text_html_hash
+                ]
+                Note.objects.bulk_update(
+                    changed, ['text_html', 'text_html_hash']
+                )
+            # bulk_update не шлёт сигналов - кэш авторов сбрасываем сами.
+            bump_authors(note.author_id for note in changed)
+            last_id = batch[-1].id
+            checked += len(batch)
+            rendered += len(changed)
+            self.stderr.write(
+                f'Проверено заметок: {checked}, отрисовано: {rendered}'
+            )
@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from notes.jobs import run_pending
+
+
+class Command(BaseCommand):
+    help = 'Выполняет фоновые задачи заметок из очереди (notes.jobs).'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=4,
+            help='Сколько задач выполнять параллельно.',
+        )
+        parser.add_argument(
+            '--poll', type=float, default=2.0,
+            help='Пауза в секундах, когда очередь пуста.',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Разобрать очередь и завершиться.',
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        try:
+            while True:
+                done = run_pending(options['workers'])
+                total += done
+                if done:
+                    self.stderr.write(f'Выполнено задач: {total}')
+                elif options['once']:
+                    break
+                else:
+                    time.sleep(options['poll'])
+        except KeyboardInterrupt:
+            pass
+        self.stderr.write(f'Воркер остановлен, выполнено задач: {total}')
@@ -0,0 +1,83 @@
+"""Markdown в тексте заметок.
+
+HTML отрисовывается при сохранении заметки и хранится рядом с текстом
+вместе с хэшем исходника (Note.text_html_hash): представления только
+выводят готовый HTML и Markdown не разбирают. Тексты от
+NOTES_MARKDOWN_INLINE_LIMIT символов отрисовывает фоновая задача.
+"""
+import threading
+from hashlib import sha1
+
+import bleach
+import markdown
+from django.conf import settings
+
+# Меняется вместе с правилами отрисовки: хэши старых заметок перестают
+# совпадать, и manage.py render_notes перерисует их.
+RENDERER_VERSION = 1
+
+EXTENSIONS = ('fenced_code', 'tables', 'sane_lists')
+
+ALLOWED_TAGS = frozenset({
+    'a', 'abbr', 'b', 'blockquote', 'br', 'code', 'del', 'em', 'h1', 'h2',
+    'h3', 'h4', 'h5', 'h6', 'hr', 'i', 'li', 'ol', 'p', 'pre', 'strong',
+    'table', 'tbody', 'td', 'th', 'thead', 'tr', 'ul',
+})
+ALLOWED_ATTRIBUTES = {
+    'a': ['href', 'title'],
+    'abbr': ['title'],
+    # Язык блока кода: class="language-python".
+    'code': ['class'],
+    'td': ['align'],
+    'th': ['align'],
+}
+ALLOWED_PROTOCOLS = frozenset({'http', 'https', 'mailto'})
+
+# Разборщик Markdown и очиститель не потокобезопасны, но их настройка
+# дорогая: у каждого потока свои готовые экземпляры.
+_local = threading.local()
+
+
+def _renderers():
+    if not hasattr(_local, 'markdown'):
+        _local.markdown = markdown.Markdown(extensions=EXTENSIONS)
+        _local.cleaner = bleach.Cleaner(
+            tags=ALLOWED_TAGS,
+            attributes=ALLOWED_ATTRIBUTES,
+            protocols=ALLOWED_PROTOCOLS,
+            strip=True,
+        )
+    return _local.markdown, _local.cleaner
+
+
+def render_markdown(text):
+    """Безопасный HTML из Markdown: чужие теги и атрибуты вырезаются."""
+    converter, cleaner = _renderers()
+    try:
+        return cleaner.clean(converter.convert(text))
+    finally:
+        converter.reset()
+
+
+def text_hash(text):
+    return sha1(f'{RENDERER_VERSION}:{text}'.encode()).hexdigest()
+
+
+def render_note(note, background=True):
+    """Перерисовывает HTML заметки, если текст изменился.
+
+    Большой текст при background=True не отрисовывается: HTML
+    очищается, а заметка помечается для задачи notes.render_note
+    (её ставит сигнал после сохранения). Возвращает True, если поля
+    HTML изменились.
+    """
+    digest = text_hash(note.text)
+    if note.text_html_hash == digest:
+        return False
+    if background and len(note.text) >= settings.NOTES_MARKDOWN_INLINE_LIMIT:
+        note.text_html, note.text_html_hash = '', ''
+        note._render_later = True
+        return True
+    note.text_html = render_markdown(note.text)
+    note.text_html_hash = digest
+    return True
@@ -0,0 +1,115 @@
+import math
+import threading
+from bisect import bisect_left
+
+# Геометрические корзины от 0,1 мс до ~1 мин: погрешность перцентиля ±12%.
+BUCKET_MIN_MS = 0.1
+BUCKET_FACTOR = 1.25
+BUCKET_COUNT = 60
+TIME_BUCKETS = tuple(
+    BUCKET_MIN_MS * BUCKET_FACTOR ** index for index in range(BUCKET_COUNT)
+)
+
+# Число SQL-запросов - целое и обычно небольшое: до 20 корзина на каждое
+# значение, дальше всё реже.
+QUERY_BUCKETS = (
+    *range(21), 25, 30, 40, 50, 75, 100, 150, 200, 300, 500, 1000,
+)
+
+
+class Histogram:
+    """Гистограмма с перцентилями по корзинам.
+
+    bounds - возрастающие верхние границы корзин; значения больше
+    последней границы попадают в отдельную корзину. По умолчанию
+    корзины для времени в миллисекундах.
+    """
+
+    def __init__(self, bounds=TIME_BUCKETS):
+        self.bounds = bounds
+        self.buckets = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def bucket(self, value):
+        return bisect_left(self.bounds, value)
+
+    def upper_bound(self, index):
+        if index < len(self.bounds):
+            return self.bounds[index]
+        return math.inf
+
+    def add(self, value):
+        self.buckets[self.bucket(value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def percentile(self, fraction):
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for index, size in enumerate(self.buckets):
+            seen += size
+            if seen >= rank:
+                return min(self.upper_bound(index), self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'mean': round(self.total / self.count, 3) if self.count else 0.0,
+            'p50': round(self.percentile(0.5), 3),
+            'p95': round(self.percentile(0.95), 3),
+            'p99': round(self.percentile(0.99), 3),
+            'max': round(self.max, 3),
+        }
+
+
+class ViewStats:
+
+    def __init__(self):
+        self.total = Histogram()
+        self.db = Histogram()
+        self.template = Histogram()
+        self.queries = Histogram(QUERY_BUCKETS)
+
+    def summary(self):
+        return {
+            'total_ms': self.total.summary(),
+            'db_ms': self.db.summary(),
+            'template_ms': self.template.summary(),
+            'queries': self.queries.summary(),
+        }
+
+
+class MetricsRegistry:
+    """Накопленные метрики запросов по именам представлений."""
+
+    def __init__(self):
+        self._views = {}
+        self._lock = threading.Lock()
+
+    def record(self, view_name, total, db, template, queries):
+        with self._lock:
+            stats = self._views.setdefault(view_name, ViewStats())
+            stats.total.add(total)
+            stats.db.add(db)
+            stats.template.add(template)
+            stats.queries.add(queries)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                name: stats.summary()
+                for name, stats in sorted(self._views.items())
+            }
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+
+registry = MetricsRegistry()
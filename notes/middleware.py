@@ -0,0 +1,90 @@
+import time
+
+from django.conf import settings
+
+from .budgets import QueryBudget, QueryLog, wrap_queries
+from .metrics import registry
+
+
+class RequestTimer:
+    """Счётчики одного запроса: SQL-запросы, время базы и шаблонов."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.queries += 1
+
+
+class InstrumentationMiddleware:
+    """Замеряет запросы к базе, рендеринг шаблона и общее время ответа.
+
+    Метрики копятся по имени представления (notes:metrics) и уходят
+    клиенту в заголовке Server-Timing. Ставится первым в MIDDLEWARE,
+    чтобы мерить всю цепочку и рендерить шаблон последним.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = request.instrumentation = RequestTimer()
+        start = time.perf_counter()
+        with wrap_queries(timer):
+            response = self.get_response(request)
+        total = time.perf_counter() - start
+        match = request.resolver_match
+        registry.record(
+            match.view_name if match else '<unresolved>',
+            total * 1000,
+            timer.db_time * 1000,
+            timer.template_time * 1000,
+            timer.queries,
+        )
+        response['Server-Timing'] = ', '.join((
+            f'db;dur={timer.db_time * 1000:.2f};'
+            f'desc="{timer.queries} queries"',
+            f'tpl;dur={timer.template_time * 1000:.2f}',
+            f'total;dur={total * 1000:.2f}',
+        ))
+        return response
+
+    def process_template_response(self, request, response):
+        start = time.perf_counter()
+        response.render()
+        request.instrumentation.template_time += time.perf_counter() - start
+        return response
+
+
+class QueryBudgetMiddleware:
+    """Проверяет query_budget представлений на каждом запросе.
+
+    Бюджет берётся из атрибута query_budget класса представления
+    и включает запросы middleware (сессия, пользователь). Подключается
+    в режиме DEBUG; NOTES_QUERY_BUDGET_RAISE выбирает между исключением
+    и предупреждением в логе.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        log = QueryLog()
+        with wrap_queries(log):
+            response = self.get_response(request)
+        match = request.resolver_match
+        view_class = getattr(match.func, 'view_class', None) if match else None
+        limit = getattr(view_class, 'query_budget', None)
+        if limit is not None:
+            QueryBudget.check(
+                match.view_name, limit, log.queries,
+                settings.NOTES_QUERY_BUDGET_RAISE,
+            )
+        return response
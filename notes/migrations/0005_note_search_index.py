@@ -0,0 +1,56 @@
+from django.db import migrations
+
+# SQL зафиксирован в миграции: notes.search меняется вместе с моделью,
+# а миграция должна воспроизводить схему на момент своего создания.
+CREATE_SEARCH_INDEX = (
+    'CREATE VIRTUAL TABLE IF NOT EXISTS notes_note_fts USING fts5('
+    "title, text, content='notes_note', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    'CREATE TRIGGER IF NOT EXISTS notes_note_fts_ai '
+    'AFTER INSERT ON notes_note BEGIN '
+    'INSERT INTO notes_note_fts(rowid, title, text) '
+    'VALUES (new.id, new.title, new.text); END',
+    'CREATE TRIGGER IF NOT EXISTS notes_note_fts_ad '
+    'AFTER DELETE ON notes_note BEGIN '
+    'INSERT INTO notes_note_fts(notes_note_fts, rowid, title, text) '
+    "VALUES ('delete', old.id, old.title, old.text); END",
+    'CREATE TRIGGER IF NOT EXISTS notes_note_fts_au '
+    'AFTER UPDATE OF title, text ON notes_note BEGIN '
+    'INSERT INTO notes_note_fts(notes_note_fts, rowid, title, text) '
+    "VALUES ('delete', old.id, old.title, old.text); "
+    'INSERT INTO notes_note_fts(rowid, title, text) '
+    'VALUES (new.id, new.title, new.text); END',
+    "INSERT INTO notes_note_fts(notes_note_fts) VALUES ('rebuild')",
+)
+
+DROP_SEARCH_INDEX = (
+    'DROP TRIGGER IF EXISTS notes_note_fts_ai',
+    'DROP TRIGGER IF EXISTS notes_note_fts_ad',
+    'DROP TRIGGER IF EXISTS notes_note_fts_au',
+    'DROP TABLE IF EXISTS notes_note_fts',
+)
+
+
+def run_on_sqlite(statements):
+    def operation(apps, schema_editor):
+        connection = schema_editor.connection
+        if connection.vendor != 'sqlite':
+            return
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0004_note_created_updated'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_on_sqlite(CREATE_SEARCH_INDEX),
+            run_on_sqlite(DROP_SEARCH_INDEX),
+        ),
+    ]
@@ -0,0 +1,35 @@
+from django.db import migrations
+
+# SQL зафиксирован в миграции: выражение индекса в notes.search
+# меняется вместе с моделью (см. 0008_note_text_compressed).
+CREATE_SEARCH_INDEX = (
+    'CREATE INDEX IF NOT EXISTS notes_note_search_idx ON notes_note '
+    "USING gin ((setweight(to_tsvector('russian', title), 'A') || "
+    "setweight(to_tsvector('russian', text), 'B')))"
+)
+
+DROP_SEARCH_INDEX = 'DROP INDEX IF EXISTS notes_note_search_idx'
+
+
+def run_on_postgresql(sql):
+    def operation(apps, schema_editor):
+        connection = schema_editor.connection
+        if connection.vendor != 'postgresql':
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(sql)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0005_note_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_on_postgresql(CREATE_SEARCH_INDEX),
+            run_on_postgresql(DROP_SEARCH_INDEX),
+        ),
+    ]
@@ -0,0 +1,146 @@
+# Generated by Django 3.2.15 on 2026-10-18 20:30
+
+import base64
+import lzma
+import zlib
+
+from django.db import migrations
+import notes.fields
+
+# SQL зафиксирован в миграции, а не импортируется из notes.search:
+# миграция должна воспроизводить схему на момент своего создания.
+# Сжатые тексты начинаются с char(1) и больше не индексируются.
+SQLITE_TEXT = (
+    "CASE WHEN substr({0}.text, 1, 1) = char(1) THEN '' ELSE {0}.text END"
+)
+PG_TEXT = "CASE WHEN left(text, 1) = chr(1) THEN '' ELSE text END"
+
+# Формат сжатых значений CompressedTextField на момент миграции.
+MARKER = '\x01'
+RAW_PREFIX = MARKER + 'raw:'
+DECOMPRESS = {'zlib': zlib.decompress, 'lzma': lzma.decompress}
+
+# Сколько текстов распаковывать за один запрос.
+BATCH_SIZE = 500
+
+FTS_TRIGGERS = ('notes_note_fts_ai', 'notes_note_fts_ad', 'notes_note_fts_au')
+
+
+def fts_triggers(new_text, old_text):
+    return (
+        'CREATE TRIGGER notes_note_fts_ai '
+        'AFTER INSERT ON notes_note BEGIN '
+        'INSERT INTO notes_note_fts(rowid, title, text) '
+        f'VALUES (new.id, new.title, {new_text}); END',
+        'CREATE TRIGGER notes_note_fts_ad '
+        'AFTER DELETE ON notes_note BEGIN '
+        'INSERT INTO notes_note_fts(notes_note_fts, rowid, title, text) '
+        f"VALUES ('delete', old.id, old.title, {old_text}); END",
+        'CREATE TRIGGER notes_note_fts_au '
+        'AFTER UPDATE OF title, text ON notes_note BEGIN '
+        'INSERT INTO notes_note_fts(notes_note_fts, rowid, title, text) '
+        f"VALUES ('delete', old.id, old.title, {old_text}); "
+        'INSERT INTO notes_note_fts(rowid, title, text) '
+        f'VALUES (new.id, new.title, {new_text}); END',
+    )
+
+
+def pg_search_index(text):
+    return (
+        'CREATE INDEX notes_note_search_idx ON notes_note '
+        "USING gin ((setweight(to_tsvector('russian', title), 'A') || "
+        f"setweight(to_tsvector('russian', {text}), 'B')))"
+    )
+
+
+def refresh_search_index(triggers, fts_text, pg_index):
+    """Пересоздаёт триггеры FTS5 (SQLite) или индекс GIN (PostgreSQL)."""
+    def operation(apps, schema_editor):
+        connection = schema_editor.connection
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute('DROP INDEX IF EXISTS notes_note_search_idx')
+                cursor.execute(pg_index)
+                return
+            if connection.vendor != 'sqlite':
+                return
+            if 'notes_note_fts' not in connection.introspection.table_names(
+                cursor
+            ):
+                return
+            for name in FTS_TRIGGERS:
+                cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+            for sql in triggers:
+                cursor.execute(sql)
+            # Не 'rebuild': он прочитал бы сжатые тексты из notes_note.
+            cursor.execute(
+                "INSERT INTO notes_note_fts(notes_note_fts) "
+                "VALUES ('delete-all')"
+            )
+            cursor.execute(
+                'INSERT INTO notes_note_fts(rowid, title, text) '
+                f'SELECT id, title, {fts_text} FROM notes_note'
+            )
+    return operation
+
+
+def decompress(value):
+    if value.startswith(RAW_PREFIX):
+        return value[len(RAW_PREFIX):]
+    algorithm, _, data = value[len(MARKER):].partition(':')
+    return DECOMPRESS[algorithm](base64.b64decode(data)).decode()
+
+
+def decompress_texts(apps, schema_editor):
+    """Обратная миграция: сжатые тексты снова хранятся как есть."""
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT id FROM notes_note WHERE substr(text, 1, 1) = %s',
+            [MARKER],
+        )
+        ids = [row[0] for row in cursor.fetchall()]
+        for start in range(0, len(ids), BATCH_SIZE):
+            batch = ids[start:start + BATCH_SIZE]
+            cursor.execute(
+                'SELECT id, text FROM notes_note WHERE id IN ({})'.format(
+                    ', '.join(['%s'] * len(batch))
+                ),
+                batch,
+            )
+            cursor.executemany(
+                'UPDATE notes_note SET text = %s WHERE id = %s',
+                [(decompress(text), pk) for pk, text in cursor.fetchall()],
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0007_note_revision'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='note',
+            name='text',
+            field=notes.fields.CompressedTextField(help_text='Добавьте подробностей', verbose_name='Текст'),
+        ),
+        migrations.RunPython(
+            refresh_search_index(
+                fts_triggers(
+                    SQLITE_TEXT.format('new'), SQLITE_TEXT.format('old')
+                ),
+                SQLITE_TEXT.format('notes_note'),
+                pg_search_index(PG_TEXT),
+            ),
+            refresh_search_index(
+                fts_triggers('new.text', 'old.text'),
+                'text',
+                pg_search_index('text'),
+            ),
+        ),
+        # При откате выполняется первой: индекс поиска выше
+        # перестраивается уже по распакованным текстам.
+        migrations.RunPython(migrations.RunPython.noop, decompress_texts),
+    ]
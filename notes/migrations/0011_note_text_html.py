@@ -0,0 +1,29 @@
+# Generated by Django 3.2.15 on 2026-10-18 20:42
+
+from django.db import migrations, models
+import notes.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0010_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='note',
+            name='text_html',
+            field=notes.fields.CompressedTextField(blank=True, editable=False, verbose_name='Текст в HTML'),
+        ),
+        migrations.AddField(
+            model_name='note',
+            name='text_html_hash',
+            field=models.CharField(blank=True, editable=False, max_length=40, verbose_name='Хэш отрисованного текста'),
+        ),
+        migrations.AlterField(
+            model_name='note',
+            name='text',
+            field=notes.fields.CompressedTextField(help_text='Добавьте подробностей. Поддерживается Markdown', verbose_name='Текст'),
+        ),
+    ]
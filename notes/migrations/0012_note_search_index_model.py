@@ -0,0 +1,29 @@
+# Generated by Django 3.2.15 on 2026-10-18 20:57
+
+from django.db import migrations, models
+import django.db.models.deletion
+import notes.search
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0011_note_text_html'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NoteSearchIndex',
+            fields=[
+                ('note', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_index', serialize=False, to='notes.note')),
+                ('title', models.TextField()),
+                ('text', models.TextField()),
+                ('document', notes.search.FTSDocument(db_column='notes_note_fts')),
+                ('rank', notes.search.FTSRank()),
+            ],
+            options={
+                'db_table': 'notes_note_fts',
+                'managed': False,
+            },
+        ),
+    ]
@@ -1,7 +1,102 @@
 from django.conf import settings
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, connections, models
+from django.db.models import Count, F
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
 
-from pytils.translit import slugify
+from yanote.backends.transaction import write_atomic
+
+from .fields import CompressedTextField
+from .markup import render_note
+from .search import (
+    FTS_TABLE, PG_SEARCH_CONFIG, PG_SEARCH_VECTOR, FTSDocument, FTSRank,
+    fts_query, pg_tsquery,
+)
+from .slugs import allocate_slug
+
+
+# Сколько раз подбирать slug заново, если его занял параллельный запрос.
+SLUG_ATTEMPTS = 3
+
+WARNING = ' - такой slug уже существует, придумайте уникальное значение!'
+
+# Поля, которых достаточно для списков заметок: без тяжёлого text.
+SUMMARY_FIELDS = ('id', 'slug', 'title')
+
+
+class NoteQuerySet(models.QuerySet):
+
+    def summaries(self):
+        """Лёгкая выборка для списков: тело заметки не загружается."""
+        return self.only(*SUMMARY_FIELDS)
+
+    def search(self, text):
+        """Полнотекстовый поиск по заголовку и тексту, лучшие сверху."""
+        query = fts_query(text)
+        if not query:
+            return self.none()
+        vendor = connections[self.db].vendor
+        if vendor == 'postgresql':
+            return self._search_postgresql(text)
+        if vendor != 'sqlite':
+            return self.filter(
+                models.Q(title__icontains=text)
+                | models.Q(text__icontains=text)
+            )
+        return self.filter(
+            search_index__document__match=query,
+            # Совпадение в заголовке весит больше, чем в тексте.
+            search_index__rank__match='bm25(10.0, 1.0)',
+        ).annotate(rank=F('search_index__rank')).order_by('rank', 'id')
+
+    def _search_postgresql(self, text):
+        # Условие повторяет выражение индекса GIN notes_note_search_idx.
+        query = f"to_tsquery('{PG_SEARCH_CONFIG}', %s)"
+        params = [pg_tsquery(text)]
+        return self.filter(RawSQL(
+            f'({PG_SEARCH_VECTOR}) @@ {query}', params,
+            output_field=models.BooleanField(),
+        )).annotate(rank=RawSQL(
+            f'-ts_rank({PG_SEARCH_VECTOR}, {query})', params,
+            output_field=models.FloatField(),
+        )).order_by('rank', 'id')
+
+    def with_tags(self, author, names):
+        """Заметки автора, у которых есть все метки names.
+
+        Один запрос: подзапрос по индексу (author, tag) таблицы NoteTag
+        отбирает заметки, у которых нашлись все метки.
+        """
+        names = set(names)
+        if not names:
+            return self
+        matching = NoteTag.objects.filter(
+            author=author, tag__name__in=names,
+        ).values('note').annotate(
+            matched=Count('tag'),
+        ).filter(matched=len(names)).values('note')
+        return self.filter(pk__in=matching)
+
+
+class Tag(models.Model):
+    """Метка заметок; у каждого автора свой набор меток."""
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='note_tags',
+    )
+    name = models.CharField('Название', max_length=50)
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('author', 'name'), name='tag_author_name_uniq'
+            ),
+        )
+
+    def __str__(self):
+        return self.name
 
 
 class Note(models.Model):
@@ -11,9 +106,13 @@ class Note(models.Model):
         default='Название заметки',
         help_text='Дайте короткое название заметке'
     )
-    text = models.TextField(
+    text = CompressedTextField(
         'Текст',
-        help_text='Добавьте подробностей'
+        help_text='Добавьте подробностей. Поддерживается Markdown'
+    )
+    text_html = CompressedTextField('Текст в HTML', blank=True, editable=False)
+    text_html_hash = models.CharField(
+        'Хэш отрисованного текста', max_length=40, blank=True, editable=False
     )
     slug = models.SlugField(
         'Адрес для страницы с заметкой',
@@ -27,12 +126,201 @@ class Note(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
     )
+    created = models.DateTimeField('Создана', auto_now_add=True)
+    updated = models.DateTimeField('Изменена', auto_now=True)
+    tags = models.ManyToManyField(
+        Tag,
+        through='NoteTag',
+        related_name='notes',
+        blank=True,
+        verbose_name='Метки',
+    )
+
+    objects = NoteQuerySet.as_manager()
+
+    class Meta:
+        indexes = (
+            # Курсорная пагинация: WHERE author_id = ? AND id > ? ORDER BY id.
+            models.Index(fields=('author', 'id'), name='note_author_id_idx'),
+            # ETag списка: MAX(updated) по заметкам автора.
+            models.Index(
+                fields=('author', 'updated'), name='note_author_updated_idx'
+            ),
+        )
 
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Запоминаем автора, чтобы при смене автора сбросить и его кэш,
+        # и прежний текст для истории версий (ссылка, а не копия).
+        instance._loaded_author_id = instance.__dict__.get('author_id')
+        instance._loaded_title = instance.__dict__.get('title')
+        instance._loaded_text = instance.__dict__.get('text')
+        return instance
+
     def save(self, *args, **kwargs):
-        if not self.slug:
-            max_slug_length = self._meta.get_field('slug').max_length
-            self.slug = slugify(self.title)[:max_slug_length]
-        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'text' in update_fields:
+            if render_note(self) and update_fields is not None:
+                kwargs['update_fields'] = {
+                    *update_fields, 'text_html', 'text_html_hash'
+                }
+        if self.slug:
+            return self.save_with_slug(*args, **kwargs)
+        using = kwargs.get('using')
+        max_slug_length = self._meta.get_field('slug').max_length
+        for attempt in range(1, SLUG_ATTEMPTS + 1):
+            self.slug = allocate_slug(
+                self.title, max_slug_length, exclude_pk=self.pk
+            )
+            try:
+                with write_atomic(using=using):
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                if attempt == SLUG_ATTEMPTS or not self.slug_taken(using):
+                    raise
+
+    def save_with_slug(self, *args, **kwargs):
+        """Сохраняет заметку с явным slug.
+
+        Если slug заняли между проверкой формы и вставкой, бросает
+        ValidationError для поля slug.
+        """
+        using = kwargs.get('using')
+        try:
+            with write_atomic(using=using):
+                return super().save(*args, **kwargs)
+        except IntegrityError:
+            if self.slug_taken(using):
+                raise ValidationError({'slug': self.unique_error_message(
+                    type(self), ('slug',)
+                )})
+            raise
+
+    def slug_taken(self, using=None):
+        """Занят ли slug другой заметкой (а не иное нарушение целостности)."""
+        return type(self)._default_manager.using(
+            using or self._state.db
+        ).filter(slug=self.slug).exclude(pk=self.pk).exists()
+
+    def unique_error_message(self, model_class, unique_check):
+        if tuple(unique_check) == ('slug',):
+            return ValidationError(self.slug + WARNING, code='unique')
+        return super().unique_error_message(model_class, unique_check)
+
+
+class NoteSearchIndex(models.Model):
+    """Строка индекса FTS5 заметки (только SQLite).
+
+    Таблицу с триггерами создаёт миграция 0005_note_search_index, модель
+    лишь даёт NoteQuerySet.search соединиться с ней по rowid.
+    """
+    note = models.OneToOneField(
+        Note,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column='rowid',
+        related_name='search_index',
+    )
+    title = models.TextField()
+    text = models.TextField()
+    document = FTSDocument(db_column=FTS_TABLE)
+    rank = FTSRank()
+
+    class Meta:
+        managed = False
+        db_table = FTS_TABLE
+
+
+class NoteTag(models.Model):
+    """Метка заметки.
+
+    author повторяет автора заметки: фильтр и подсчёт заметок по меткам
+    идут по индексу (author, tag, note) без соединения с notes_note.
+    """
+    note = models.ForeignKey(Note, on_delete=models.CASCADE)
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE)
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('note', 'tag'), name='note_tag_uniq'
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('author', 'tag', 'note'), name='note_tag_author_idx'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.note_id}: {self.tag_id}'
+
+
+class NoteRevision(models.Model):
+    """Версия заметки: полный текст или сжатая разница с предыдущей."""
+    note = models.ForeignKey(
+        Note, on_delete=models.CASCADE, related_name='revisions',
+    )
+    number = models.PositiveIntegerField('Номер версии')
+    title = models.CharField('Заголовок', max_length=100)
+    is_snapshot = models.BooleanField('Полный текст', default=False)
+    data = models.BinaryField('Текст или разница, zlib')
+    checksum = models.PositiveBigIntegerField('CRC32 текста')
+    created = models.DateTimeField('Создана', auto_now_add=True)
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('note', 'number'), name='note_revision_number_uniq'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.note_id} v{self.number}'
+
+
+class Job(models.Model):
+    """Фоновая задача очереди notes.jobs."""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField('Задача', max_length=100)
+    payload = models.JSONField('Аргументы', default=dict)
+    status = models.CharField(
+        'Состояние', max_length=10, choices=STATUSES, default=QUEUED
+    )
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    max_attempts = models.PositiveSmallIntegerField('Попыток всего')
+    run_after = models.DateTimeField('Не раньше', default=timezone.now)
+    locked_at = models.DateTimeField('Взята воркером', null=True, blank=True)
+    error = models.TextField('Последняя ошибка', blank=True)
+    created = models.DateTimeField('Создана', auto_now_add=True)
+    finished = models.DateTimeField('Завершена', null=True, blank=True)
+
+    class Meta:
+        indexes = (
+            # Выбор воркером: WHERE status = ? AND run_after <= ?.
+            models.Index(
+                fields=('status', 'run_after'), name='job_status_run_idx'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.name} #{self.pk} ({self.status})'
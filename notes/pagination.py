@@ -0,0 +1,146 @@
+import base64
+import binascii
+
+from django.conf import settings
+from django.core.exceptions import BadRequest
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+CURSOR_PARAM = 'after'
+
+# Наибольший id в BigAutoField: курсор больше база не примет.
+MAX_CURSOR = 2 ** 63 - 1
+
+
+def encode_cursor(pk):
+    """Превращает id последней заметки страницы в непрозрачный токен."""
+    return base64.urlsafe_b64encode(str(pk).encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Восстанавливает id из токена; на мусор отвечает 400."""
+    padding = '=' * (-len(token) % 4)
+    try:
+        pk = int(base64.urlsafe_b64decode(token + padding).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise BadRequest('Некорректный курсор страницы.')
+    if not 0 <= pk <= MAX_CURSOR:
+        raise BadRequest('Некорректный курсор страницы.')
+    return pk
+
+
+def parse_page_size(value, default, maximum):
+    """Размер страницы из параметра ?size=; мусор даёт default."""
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return default
+    if size <= 0:
+        return default
+    return min(size, maximum)
+
+
+def paginate_keyset(queryset, after=None, page_size=None):
+    """Возвращает страницу заметок по курсору и курсор следующей страницы.
+
+    Вместо OFFSET выбирается ``id > after`` в порядке возрастания id,
+    поэтому стоимость N-й страницы равна стоимости первой.
+    """
+    page_size = page_size or settings.NOTES_PAGE_SIZE
+    queryset = queryset.order_by('id')
+    if after:
+        queryset = queryset.filter(id__gt=decode_cursor(after))
+    # Берём на одну запись больше, чтобы узнать, есть ли следующая страница.
+    page = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(page) > page_size:
+        page = page[:page_size]
+        next_cursor = encode_cursor(page[-1].pk)
+    return page, next_cursor
+
+
+class KeysetPaginationMixin:
+    """Курсорная пагинация для ListView по параметру ``?after=``."""
+    page_size = None
+    max_page_size = 500
+
+    def get_page_size(self):
+        return parse_page_size(
+            self.request.GET.get('size'),
+            self.page_size or settings.NOTES_PAGE_SIZE,
+            self.max_page_size,
+        )
+
+    def get_page(self):
+        """Возвращает пару (заметки страницы, курсор следующей)."""
+        return paginate_keyset(
+            self.object_list,
+            after=self.request.GET.get(CURSOR_PARAM),
+            page_size=self.get_page_size(),
+        )
+
+    def get_context_data(self, **kwargs):
+        page, next_cursor = self.get_page()
+        kwargs.setdefault('object_list', page)
+        kwargs['next_cursor'] = next_cursor
+        kwargs['is_paginated'] = bool(
+            next_cursor or self.request.GET.get(CURSOR_PARAM)
+        )
+        return super().get_context_data(**kwargs)
+
+
+def estimate_count(queryset):
+    """Быстрая оценка числа строк таблицы модели без COUNT(*).
+
+    Оценку даёт статистика планировщика: pg_class.reltuples в PostgreSQL,
+    sqlite_stat1 в SQLite (её собирают ANALYZE и PRAGMA optimize).
+    None, если статистики нет.
+    """
+    connection = connections[queryset.db]
+    table = queryset.model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE relname = %s',
+                [table],
+            )
+        elif connection.vendor == 'sqlite':
+            if 'sqlite_stat1' not in connection.introspection.table_names(
+                cursor
+            ):
+                return None
+            # Первое число stat - строк в таблице (или в её индексе).
+            cursor.execute(
+                'SELECT MAX(CAST(stat AS INTEGER)) FROM sqlite_stat1 '
+                'WHERE tbl = %s',
+                [table],
+            )
+        else:
+            return None
+        row = cursor.fetchone()
+    if not row or row[0] is None:
+        return None
+    # reltuples = -1 у таблицы, которую ещё не анализировали.
+    return max(row[0], 0)
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator без точного COUNT(*) по всей большой таблице.
+
+    Для выборки без условий число строк оценивается (estimate_count);
+    точный COUNT делается для выборок с фильтрами и для таблиц меньше
+    NOTES_ADMIN_COUNT_ESTIMATE_FROM строк.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimate_count(queryset)
+            if (
+                estimate is not None
+                and estimate >= settings.NOTES_ADMIN_COUNT_ESTIMATE_FROM
+            ):
+                return estimate
+        return super().count
@@ -6,6 +6,13 @@ from django.test.client import Client
 
 # Импортируем модель заметки, чтобы создать экземпляр.
 from notes.models import Note
+from notes.cache import get_note_cache
+
+
+@pytest.fixture(autouse=True)
+def clear_note_cache():
+    # Кэш заметок переживает откат транзакции теста - чистим его.
+    get_note_cache().clear()
 
 
 @pytest.fixture
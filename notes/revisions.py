@@ -0,0 +1,142 @@
+"""История версий заметок в виде сжатых разниц.
+
+Версия хранит либо полный текст (снимок), либо разницу с предыдущей
+версией: куски, скопированные из неё, записываются диапазоном слов,
+а новые - как есть. Снимок делается каждые NOTES_REVISION_SNAPSHOT_EVERY
+версий, поэтому для восстановления любой версии достаточно применить
+не больше этого числа разниц.
+"""
+import difflib
+import json
+import re
+import zlib
+
+from django.conf import settings
+
+from yanote.backends.transaction import write_atomic
+
+TOKEN_RE = re.compile(r'\s+|\S+')
+
+
+def tokenize(text):
+    # Слова и пробелы: склеивание токенов возвращает исходный текст.
+    return TOKEN_RE.findall(text)
+
+
+def make_delta(old, new):
+    """Разница old -> new: [[начало, конец], 'вставка', ...] по словам."""
+    old_tokens, new_tokens = tokenize(old), tokenize(new)
+    matcher = difflib.SequenceMatcher(None, old_tokens, new_tokens)
+    ops = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            ops.append([i1, i2])
+        elif j2 > j1:
+            ops.append(''.join(new_tokens[j1:j2]))
+    return ops
+
+
+def apply_delta(old, ops):
+    old_tokens = tokenize(old)
+    return ''.join(
+        op if isinstance(op, str) else ''.join(old_tokens[op[0]:op[1]])
+        for op in ops
+    )
+
+
+def pack(value):
+    return zlib.compress(json.dumps(value, ensure_ascii=False).encode())
+
+
+def unpack(data):
+    return json.loads(zlib.decompress(bytes(data)))
+
+
+def checksum(text):
+    return zlib.crc32(text.encode())
+
+
+def is_snapshot_number(number):
+    return (number - 1) % settings.NOTES_REVISION_SNAPSHOT_EVERY == 0
+
+
+def build_revision(note, number, title, text, previous_text=None):
+    """Несохранённая версия: снимок или разница, что короче."""
+    from .models import NoteRevision
+
+    snapshot = pack(text)
+    data, is_snapshot = snapshot, True
+    if previous_text is not None and not is_snapshot_number(number):
+        delta = pack(make_delta(previous_text, text))
+        if len(delta) < len(snapshot):
+            data, is_snapshot = delta, False
+    return NoteRevision(
+        note=note, number=number, title=title, is_snapshot=is_snapshot,
+        data=data, checksum=checksum(text),
+    )
+
+
+def record_revision(note, old_title=None, old_text=None, created=False):
+    """Сохраняет версию заметки после записи, если что-то изменилось.
+
+    old_title и old_text - значения до записи (None, если неизвестны).
+    Для заметок, созданных до появления истории, сначала сохраняется
+    снимок прежнего текста.
+    """
+    from .models import NoteRevision
+
+    if created:
+        build_revision(note, 1, note.title, note.text).save()
+        return
+    if (old_title, old_text) == (note.title, note.text):
+        return
+    with write_atomic(savepoint=False):
+        # Параллельные правки одной заметки нумеруют версии по очереди,
+        # а не берут один номер на двоих.
+        type(note)._default_manager.select_for_update().filter(
+            pk=note.pk
+        ).values_list('pk').get()
+        last = note.revisions.order_by('-number').values_list(
+            'number', 'checksum'
+        ).first()
+        revisions = []
+        if last is None and old_text is not None:
+            revisions.append(build_revision(note, 1, old_title, old_text))
+            last = (1, checksum(old_text))
+        number, last_checksum = last or (0, None)
+        if old_text is not None and checksum(old_text) != last_checksum:
+            # Текст меняли в обход save(): разница с прежним текстом
+            # не сойдётся с последней версией, нужен снимок.
+            old_text = None
+        revisions.append(build_revision(
+            note, number + 1, note.title, note.text, old_text
+        ))
+        NoteRevision.objects.bulk_create(revisions)
+
+
+def revision_text(revision):
+    """Текст версии: ближайший снимок и разницы после него."""
+    if revision.is_snapshot:
+        return unpack(revision.data)
+    chain = list(
+        revision.note.revisions
+        .filter(number__lte=revision.number)
+        .filter(number__gte=revision.note.revisions.filter(
+            number__lte=revision.number, is_snapshot=True,
+        ).order_by('-number').values('number')[:1])
+        .order_by('number')
+    )
+    text = unpack(chain[0].data)
+    for step in chain[1:]:
+        text = apply_delta(text, unpack(step.data))
+    return text
+
+
+@write_atomic()
+def restore_revision(revision):
+    """Возвращает заметке текст версии; восстановление - новая версия."""
+    note = revision.note
+    note.title = revision.title
+    note.text = revision_text(revision)
+    note.save()
+    return note
@@ -0,0 +1,163 @@
+from django.db import connections, models
+
+FTS_TABLE = 'notes_note_fts'
+
+# PostgreSQL: выражение индекса GIN; в запросе оно должно совпадать
+# с индексом дословно, иначе планировщик его не использует.
+PG_SEARCH_CONFIG = 'russian'
+PG_SEARCH_INDEX = 'notes_note_search_idx'
+PG_SEARCH_VECTOR = (
+    f"setweight(to_tsvector('{PG_SEARCH_CONFIG}', title), 'A') || "
+    f"setweight(to_tsvector('{PG_SEARCH_CONFIG}', "
+    "CASE WHEN left(text, 1) = chr(1) THEN '' ELSE text END), 'B')"
+)
+
+# Сжатые тексты (notes.fields) начинаются с char(1) и не индексируются.
+FTS_TEXT = (
+    "CASE WHEN substr({0}.text, 1, 1) = char(1) THEN '' ELSE {0}.text END"
+)
+NEW_TEXT = FTS_TEXT.format('new')
+OLD_TEXT = FTS_TEXT.format('old')
+
+FTS_TRIGGERS = {
+    'notes_note_fts_ai': (
+        'CREATE TRIGGER IF NOT EXISTS notes_note_fts_ai '
+        'AFTER INSERT ON notes_note BEGIN '
+        'INSERT INTO notes_note_fts(rowid, title, text) '
+        f'VALUES (new.id, new.title, {NEW_TEXT}); END'
+    ),
+    'notes_note_fts_ad': (
+        'CREATE TRIGGER IF NOT EXISTS notes_note_fts_ad '
+        'AFTER DELETE ON notes_note BEGIN '
+        'INSERT INTO notes_note_fts(notes_note_fts, rowid, title, text) '
+        f"VALUES ('delete', old.id, old.title, {OLD_TEXT}); END"
+    ),
+    'notes_note_fts_au': (
+        'CREATE TRIGGER IF NOT EXISTS notes_note_fts_au '
+        'AFTER UPDATE OF title, text ON notes_note BEGIN '
+        'INSERT INTO notes_note_fts(notes_note_fts, rowid, title, text) '
+        f"VALUES ('delete', old.id, old.title, {OLD_TEXT}); "
+        'INSERT INTO notes_note_fts(rowid, title, text) '
+        f'VALUES (new.id, new.title, {NEW_TEXT}); END'
+    ),
+}
+
+
+class Match(models.Lookup):
+    """column MATCH запрос: полнотекстовый поиск FTS5."""
+    lookup_name = 'match'
+    prepare_rhs = False
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', [*lhs_params, *rhs_params]
+
+
+class FTSDocument(models.TextField):
+    """Скрытый столбец FTS5 с именем таблицы: MATCH по всем столбцам."""
+
+
+class FTSRank(models.FloatField):
+    """Скрытый столбец FTS5 rank; MATCH задаёт функцию ранжирования."""
+
+
+FTSDocument.register_lookup(Match)
+FTSRank.register_lookup(Match)
+
+
+def install_fts(using='default', create=True):
+    """Создаёт индекс FTS5 с триггерами, если их ещё нет (только SQLite).
+
+    SQLite пересоздаёт таблицу notes_note при изменении её схемы и теряет
+    триггеры, поэтому после каждой миграции функция вызывается
+    с create=False: она восстанавливает триггеры существующего индекса.
+    Если триггеры пришлось создавать заново, индекс перестраивается.
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    if not create and FTS_TABLE not in connection.introspection.table_names():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'CREATE VIRTUAL TABLE IF NOT EXISTS notes_note_fts USING fts5('
+            "title, text, content='notes_note', content_rowid='id', "
+            "tokenize='unicode61 remove_diacritics 2')"
+        )
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' "
+            'AND tbl_name = %s',
+            ['notes_note'],
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+        missing = set(FTS_TRIGGERS) - existing
+        for name in sorted(missing):
+            cursor.execute(FTS_TRIGGERS[name])
+        if missing:
+            # Не 'rebuild': он прочитал бы сжатые тексты из notes_note.
+            cursor.execute(
+                "INSERT INTO notes_note_fts(notes_note_fts) "
+                "VALUES ('delete-all')"
+            )
+            cursor.execute(
+                'INSERT INTO notes_note_fts(rowid, title, text) '
+                f'SELECT id, title, {FTS_TEXT.format("notes_note")} '
+                'FROM notes_note'
+            )
+
+
+def uninstall_fts(using='default'):
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name in FTS_TRIGGERS:
+            cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+        cursor.execute('DROP TABLE IF EXISTS notes_note_fts')
+
+
+def install_pg_search(using='default'):
+    """Создаёт индекс GIN для полнотекстового поиска (только PostgreSQL)."""
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE INDEX IF NOT EXISTS {PG_SEARCH_INDEX} '
+            f'ON notes_note USING gin (({PG_SEARCH_VECTOR}))'
+        )
+
+
+def uninstall_pg_search(using='default'):
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP INDEX IF EXISTS {PG_SEARCH_INDEX}')
+
+
+def search_terms(text):
+    return [
+        term for term in text.split()
+        if any(char.isalnum() for char in term)
+    ]
+
+
+def fts_query(text):
+    """Превращает ввод пользователя в безопасный запрос FTS5.
+
+    Каждое слово берётся в кавычки (операторы FTS5 не срабатывают)
+    и ищется по префиксу.
+    """
+    terms = [term.replace('"', '""') for term in search_terms(text)]
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def pg_tsquery(text):
+    """То же для to_tsquery PostgreSQL: все слова по префиксу через И."""
+    terms = [
+        term.replace('\\', '\\\\').replace("'", "''")
+        for term in search_terms(text)
+    ]
+    return ' & '.join(f"'{term}':*" for term in terms)
@@ -0,0 +1,79 @@
+from django.conf import settings
+from django.contrib.auth.signals import user_logged_out
+from django.db.models.signals import post_delete, post_migrate, post_save
+from django.dispatch import receiver
+
+from .auth import forget_user
+from .cache import get_note_cache
+from .jobs import enqueue
+from .models import Note, NoteTag
+from .revisions import record_revision
+from .search import install_fts
+
+
+@receiver(post_save, sender=Note)
+@receiver(post_delete, sender=Note)
+def invalidate_note_cache(sender, instance, **kwargs):
+    """Любая запись заметки сбрасывает кэш чтений её автора."""
+    authors = {
+        instance.author_id, getattr(instance, '_loaded_author_id', None)
+    }
+    for author_id in authors - {None}:
+        get_note_cache().bump(author_id)
+
+
+@receiver(post_save, sender=Note)
+def save_revision(sender, instance, created, raw=False, **kwargs):
+    """Записывает изменение заголовка или текста в историю версий."""
+    if raw:
+        return
+    record_revision(
+        instance,
+        getattr(instance, '_loaded_title', None),
+        getattr(instance, '_loaded_text', None),
+        created=created,
+    )
+    instance._loaded_title = instance.title
+    instance._loaded_text = instance.text
+
+
+@receiver(post_save, sender=Note)
+def render_later(sender, instance, **kwargs):
+    """Ставит отрисовку большого текста в очередь (notes.markup)."""
+    if getattr(instance, '_render_later', False):
+        instance._render_later = False
+        enqueue('notes.render_note', note_id=instance.pk)
+
+
+@receiver(post_save, sender=Note)
+def drop_foreign_tags(sender, instance, created, raw=False, **kwargs):
+    """Метки прежнего автора снимаются с переданной другому заметки."""
+    loaded_author_id = getattr(instance, '_loaded_author_id', None)
+    # Следующее сохранение сравнивает автора уже с сохранённым.
+    instance._loaded_author_id = instance.author_id
+    if created or raw:
+        return
+    if loaded_author_id not in (None, instance.author_id):
+        NoteTag.objects.filter(note=instance).exclude(
+            author=instance.author_id
+        ).delete()
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def forget_saved_user(sender, instance, **kwargs):
+    """Смена пароля, прав или удаление сбрасывают пользователя в кэше."""
+    forget_user(instance.pk)
+
+
+@receiver(user_logged_out)
+def forget_logged_out_user(sender, user, **kwargs):
+    if user is not None:
+        forget_user(user.pk)
+
+
+@receiver(post_migrate)
+def repair_search_index(sender, using, **kwargs):
+    """Восстанавливает триггеры FTS после пересоздания таблицы заметок."""
+    if sender.name == 'notes':
+        install_fts(using, create=False)
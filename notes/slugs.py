@@ -0,0 +1,121 @@
+import re
+from collections import Counter
+from functools import lru_cache
+
+from django.db import connections
+from django.db.models import (
+    BigIntegerField, Case, Max, Q, Value, When,
+)
+from django.db.models.functions import Cast, Substr
+from pytils.translit import slugify
+
+# Место под суффикс вида «-12345» у slug максимальной длины.
+SUFFIX_RESERVE = 8
+
+# Сколько последних заголовков помнит кэш транслитерации.
+SLUGIFY_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=SLUGIFY_CACHE_SIZE)
+def cached_slugify(title):
+    """pytils.translit.slugify с памятью о недавних заголовках."""
+    return slugify(title)
+
+
+def make_slug(title, max_length):
+    """Slug из заголовка: транслитерация и обрезка до max_length."""
+    return cached_slugify(title)[:max_length]
+
+
+def slug_base(title, max_length):
+    # Заголовок из одних знаков препинания даёт пустой slug.
+    return make_slug(title, max_length) or 'note'
+
+
+def candidates(base, max_length, vendor):
+    """Условие на все slug, с которыми может столкнуться base-N.
+
+    В SQLite LIKE с ESCAPE идёт полным просмотром, поэтому там условие -
+    диапазон строк по индексу slug. В PostgreSQL порядок строк зависит
+    от правил сортировки базы, а LIKE по префиксу использует индекс
+    slug с pattern_ops.
+    """
+    stem = base[:max_length - SUFFIX_RESERVE]
+    if vendor != 'sqlite':
+        if stem == base:
+            return Q(slug=base) | Q(slug__startswith=base + '-')
+        return Q(slug__startswith=stem)
+    # Знаки slug - [-_0-9a-z]; меньше '.' из них только '-'.
+    if stem == base:
+        return Q(slug__gte=base, slug__lt=base + '.')
+    return Q(slug__gte=stem, slug__lt=stem + '\x7f')
+
+
+def with_suffix(base, number, max_length):
+    """base-number; номер 1 - сам base."""
+    if number == 1:
+        return base
+    suffix = f'-{number}'
+    return base[:max_length - len(suffix)] + suffix
+
+
+def suffix_number(base, max_length):
+    """Выражение: номер N у slug вида with_suffix(base, N), иначе NULL."""
+    whens = [When(slug=base, then=Value(1))]
+    # Длинный base обрезается по-разному для номеров разной длины.
+    for digits in range(1, SUFFIX_RESERVE):
+        prefix = base[:max_length - digits - 1]
+        whens.append(When(
+            slug__regex=rf'^{re.escape(prefix)}-[0-9]{{{digits}}}$',
+            then=Cast(Substr('slug', len(prefix) + 2), BigIntegerField()),
+        ))
+    return Case(*whens, output_field=BigIntegerField())
+
+
+def highest_number(base, max_length, exclude_pk=None):
+    """Наибольший занятый номер base-N, 0 - если base свободен.
+
+    База возвращает одно число: у коротких base вроде «note» вариантов
+    может быть очень много, загружать их все незачем.
+    """
+    from .models import Note
+
+    notes = Note.objects.all()
+    vendor = connections[notes.db].vendor
+    return notes.filter(candidates(base, max_length, vendor)).exclude(
+        pk=exclude_pk
+    ).aggregate(number=Max(suffix_number(base, max_length)))['number'] or 0
+
+
+def allocate_slug(title, max_length, exclude_pk=None):
+    """Уникальный slug для заголовка за один запрос к базе."""
+    base = slug_base(title, max_length)
+    number = highest_number(base, max_length, exclude_pk=exclude_pk)
+    return with_suffix(base, number + 1, max_length)
+
+
+def allocate_slugs(notes, max_length):
+    """Проставляет уникальные slug пачке заметок.
+
+    Без коллизий хватает одного запроса по точным значениям; наибольший
+    занятый номер запрашивается только для совпавших и повторяющихся base.
+    """
+    from .models import Note
+
+    bases = [note.slug or slug_base(note.title, max_length) for note in notes]
+    counts = Counter(bases)
+    lookup = set(
+        Note.objects.filter(slug__in=counts).values_list('slug', flat=True)
+    )
+    lookup.update(base for base, count in counts.items() if count > 1)
+    numbers = {base: highest_number(base, max_length) for base in lookup}
+    # slug, выданные этой пачке: base одной заметки бывает base-N другой.
+    taken = set()
+    for note, base in zip(notes, bases):
+        number = numbers.get(base, 0) + 1
+        while with_suffix(base, number, max_length) in taken:
+            number += 1
+        numbers[base] = number
+        note.slug = with_suffix(base, number, max_length)
+        taken.add(note.slug)
+    return notes
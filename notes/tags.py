@@ -0,0 +1,69 @@
+from django.db.models import Count
+
+from .cache import get_note_cache
+from .models import Note, NoteTag, Tag
+
+TAG_MAX_LENGTH = Tag._meta.get_field('name').max_length
+
+
+def parse_tags(text):
+    """Метки из строки через запятую: без пробелов по краям и повторов."""
+    names = []
+    for name in text.split(','):
+        name = ' '.join(name.split()).lower()
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def get_or_create_tags(author_id, names):
+    """Метки автора по названиям; недостающие создаются одним INSERT."""
+    if not names:
+        return []
+    tags = list(Tag.objects.filter(author_id=author_id, name__in=names))
+    missing = set(names) - {tag.name for tag in tags}
+    if missing:
+        # Параллельный запрос мог создать те же метки - конфликты
+        # пропускаются, а id перечитываются.
+        Tag.objects.bulk_create(
+            [Tag(author_id=author_id, name=name) for name in missing],
+            ignore_conflicts=True,
+        )
+        tags = list(Tag.objects.filter(author_id=author_id, name__in=names))
+    return tags
+
+
+def set_note_tags(note, names):
+    """Заменяет метки заметки на names.
+
+    Лишние связи удаляются одним DELETE, новые добавляются одним INSERT.
+    """
+    tags = get_or_create_tags(note.author_id, names)
+    NoteTag.objects.filter(note=note).exclude(tag__in=tags).delete()
+    NoteTag.objects.bulk_create(
+        [NoteTag(note=note, tag=tag, author_id=note.author_id)
+         for tag in tags],
+        ignore_conflicts=True,
+    )
+    get_note_cache().bump(note.author_id)
+
+
+def tag_names(note):
+    return list(note.tags.order_by('name').values_list('name', flat=True))
+
+
+def tag_facets(author, selected=()):
+    """Пары (метка, число заметок) среди заметок с метками selected.
+
+    Один запрос GROUP BY по индексу (author, tag, note).
+    """
+    links = NoteTag.objects.filter(author=author)
+    if selected:
+        links = links.filter(note__in=Note.objects.filter(
+            author=author,
+        ).with_tags(author, selected).values('pk'))
+    return list(
+        links.values_list('tag__name').annotate(
+            count=Count('note'),
+        ).order_by('tag__name')
+    )
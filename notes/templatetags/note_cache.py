@@ -0,0 +1,55 @@
+from hashlib import md5
+
+from django import template
+from django.conf import settings
+
+from ..cache import get_note_cache
+
+register = template.Library()
+
+
+class NoteCacheNode(template.Node):
+
+    def __init__(self, nodelist, name, vary_on):
+        self.nodelist = nodelist
+        self.name = name
+        self.vary_on = vary_on
+
+    def render(self, context):
+        request = getattr(context, 'request', None)
+        if (
+            not settings.NOTES_FRAGMENT_CACHE
+            or request is None
+            or not request.user.is_authenticated
+        ):
+            return self.nodelist.render(context)
+        vary = ':'.join(str(var.resolve(context)) for var in self.vary_on)
+        key = 'fragment:{}:{}'.format(
+            self.name.resolve(context), md5(vary.encode()).hexdigest()
+        )
+        return get_note_cache().get_or_set(
+            request.user.pk, key, lambda: self.nodelist.render(context)
+        )
+
+
+@register.tag
+def notecache(parser, token):
+    """Кэширует фрагмент шаблона в кэше заметок пользователя.
+
+    {% notecache "имя" значение... %}...{% endnotecache %}
+
+    Ключ состоит из имени и значений; любая запись заметок автора
+    меняет его версию в кэше и сбрасывает все его фрагменты.
+    """
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(
+            f'Тег {bits[0]!r} требует имя фрагмента.'
+        )
+    nodelist = parser.parse(('endnotecache',))
+    parser.delete_first_token()
+    return NoteCacheNode(
+        nodelist,
+        parser.compile_filter(bits[1]),
+        [parser.compile_filter(bit) for bit in bits[2:]],
+    )
@@ -2,6 +2,7 @@ from django.contrib.auth import get_user_model
 from django.test import Client, TestCase
 from django.urls import reverse
 
+from notes.cache import get_note_cache
 from notes.models import Note
 
 
@@ -64,4 +65,8 @@ class NotesUrls(TestCase):
         cls.login_url = reverse('users:login')
         cls.logout_url = reverse('users:logout')
         cls.signup_url = reverse('users:signup')
-        cls.success_url = reverse('notes:success')
\ No newline at end of file
+        cls.success_url = reverse('notes:success')
+
+    def setUp(self):
+        # Откат транзакции теста не откатывает кэш заметок.
+        get_note_cache().clear()
@@ -0,0 +1,126 @@
+from http import HTTPStatus
+
+from django.contrib.admin import helpers
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from notes.models import Note, NoteRevision, NoteTag
+from notes.tags import set_note_tags
+from .confunittest import NotesUrls
+
+User = get_user_model()
+
+
+class TestNoteAdmin(NotesUrls):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.admin = User.objects.create_superuser('admin', password='admin')
+        cls.changelist_url = reverse('admin:notes_note_changelist')
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.admin)
+
+    def get_changelist(self, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.changelist_url, params)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        return response, [query['sql'] for query in queries]
+
+    def test_authors_are_joined(self):
+        _, queries = self.get_changelist()
+        self.assertEqual(
+            len([sql for sql in queries if 'auth_user' in sql]), 2,
+            'Сессия и список с JOIN, без запроса на каждую заметку.',
+        )
+
+    def test_exact_count_for_small_table(self):
+        response, _ = self.get_changelist()
+        self.assertEqual(
+            response.context['cl'].result_count, Note.objects.count()
+        )
+        self.assertIsNone(response.context['cl'].full_result_count)
+
+    @override_settings(NOTES_ADMIN_COUNT_ESTIMATE_FROM=1)
+    def test_estimated_count_for_large_table(self):
+        total = Note.objects.count()
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        # Оценка берётся из статистики, а не из MAX(id): удаление
+        # последней заметки её не меняет, но и не завышает.
+        Note.objects.order_by('-id')[0].delete()
+        response, queries = self.get_changelist()
+        self.assertFalse([sql for sql in queries if 'COUNT(' in sql])
+        self.assertEqual(response.context['cl'].result_count, total)
+        # С фильтром счёт снова точный.
+        response, _ = self.get_changelist(q=self.note.title)
+        self.assertEqual(response.context['cl'].result_count, 1)
+
+    @override_settings(NOTES_ADMIN_COUNT_ESTIMATE_FROM=1)
+    def test_exact_count_without_statistics(self):
+        Note.objects.order_by('-id')[0].delete()
+        response, _ = self.get_changelist()
+        self.assertEqual(
+            response.context['cl'].result_count, Note.objects.count()
+        )
+
+    def test_author_filter(self):
+        response, _ = self.get_changelist(author=self.reader.username)
+        notes = response.context['cl'].result_list
+        self.assertTrue(notes)
+        self.assertEqual({note.author for note in notes}, {self.reader})
+
+    def run_action(self, action, notes):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.changelist_url, {
+                'action': action,
+                helpers.ACTION_CHECKBOX_NAME: [note.pk for note in notes],
+            })
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        return [query['sql'] for query in queries]
+
+    def test_delete_action_is_single_statement(self):
+        note = Note.objects.get(pk=self.note.pk)
+        note.text = 'Вторая версия'
+        note.save()
+        set_note_tags(note, ['метка'])
+        self.author_client.get(self.list_url)
+        notes = list(Note.objects.filter(author=self.author))
+        queries = self.run_action('delete_notes', notes)
+        self.assertEqual(
+            len([sql for sql in queries
+                 if sql.startswith('DELETE FROM "notes_note"')]),
+            1,
+        )
+        self.assertFalse(Note.objects.filter(author=self.author).exists())
+        self.assertFalse(NoteRevision.objects.exists())
+        self.assertFalse(NoteTag.objects.exists())
+        response = self.author_client.get(self.list_url)
+        self.assertEqual(list(response.context['object_list']), [])
+
+    def test_transfer_action(self):
+        notes = list(Note.objects.filter(author=self.reader))
+        set_note_tags(notes[0], ['метка'])
+        self.reader_client.get(self.list_url)
+        queries = self.run_action('transfer_to_me', notes)
+        self.assertEqual(
+            len([sql for sql in queries
+                 if sql.startswith('UPDATE "notes_note"')]),
+            1,
+        )
+        self.assertEqual(
+            Note.objects.filter(author=self.admin).count(), len(notes)
+        )
+        self.assertFalse(NoteTag.objects.exists())
+        response = self.reader_client.get(self.list_url)
+        self.assertEqual(list(response.context['object_list']), [])
+        # Новый автор не должен получить 304 по старому ETag заметки.
+        for note in notes:
+            self.assertGreater(
+                Note.objects.get(pk=note.pk).updated, note.updated
+            )
@@ -0,0 +1,133 @@
+import json
+from http import HTTPStatus
+from unittest import mock
+
+from django.test import override_settings
+from django.urls import reverse
+
+from notes.models import Note
+from .confunittest import NotesUrls, NEW_TITLE, NOTE_COUNT_FOR_TEST
+
+
+class TestNotesApi(NotesUrls):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.api_list_url = reverse('notes:api_list')
+        cls.api_batch_url = reverse('notes:api_batch')
+        cls.api_detail_url = reverse('notes:api_detail', args=(cls.note.slug,))
+
+    def send(self, method, url, data, client=None):
+        client = client or self.author_client
+        return getattr(client, method)(
+            url, json.dumps(data), content_type='application/json'
+        )
+
+    def test_anonymous_gets_401(self):
+        response = self.client.get(self.api_list_url)
+        self.assertEqual(response.status_code, HTTPStatus.UNAUTHORIZED)
+
+    def test_list_pages_through_author_notes(self):
+        ids = []
+        params = {'size': 4}
+        while True:
+            data = self.author_client.get(self.api_list_url, params).json()
+            ids.extend(note['id'] for note in data['results'])
+            if not data['next']:
+                break
+            params['after'] = data['next']
+        self.assertEqual(len(ids), NOTE_COUNT_FOR_TEST + 1)
+        self.assertEqual(
+            set(ids),
+            set(Note.objects.filter(author=self.author).values_list(
+                'id', flat=True
+            )),
+        )
+
+    def test_bad_cursor_and_size(self):
+        response = self.author_client.get(self.api_list_url, {'after': '!'})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        response = self.author_client.get(self.api_list_url, {'size': '²'})
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_retrieve_is_scoped_to_author(self):
+        response = self.author_client.get(self.api_detail_url)
+        self.assertEqual(response.json()['slug'], self.note.slug)
+        response = self.reader_client.get(self.api_detail_url)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_patch_and_delete(self):
+        response = self.send(
+            'patch', self.api_detail_url, {'title': NEW_TITLE}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.note.refresh_from_db()
+        self.assertEqual(self.note.title, NEW_TITLE)
+        response = self.author_client.delete(self.api_detail_url)
+        self.assertEqual(response.status_code, HTTPStatus.NO_CONTENT)
+        self.assertFalse(Note.objects.filter(pk=self.note.pk).exists())
+
+    def test_create_uses_form_validation(self):
+        data = {**self.form_data, 'slug': self.note.slug}
+        response = self.send('post', self.api_list_url, data)
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        self.assertIn('slug', response.json()['errors'])
+
+    def test_slug_taken_concurrently_is_conflict(self):
+        data = {**self.form_data, 'slug': self.note.slug}
+        with mock.patch.object(Note, 'validate_unique'):
+            response = self.send('post', self.api_list_url, data)
+        self.assertEqual(response.status_code, HTTPStatus.CONFLICT)
+        self.assertIn('slug', response.json()['errors'])
+
+    def test_batch_create_is_atomic(self):
+        count = Note.objects.count()
+        response = self.send('post', self.api_list_url, [
+            {'title': 'Первая', 'text': 'text'},
+            {'title': 'Вторая', 'text': 'text', 'slug': self.note.slug},
+        ])
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        self.assertEqual(response.json()['index'], 1)
+        self.assertEqual(Note.objects.count(), count)
+
+    def test_batch_operations(self):
+        other = Note.objects.filter(author=self.author).exclude(
+            pk=self.note.pk
+        ).first()
+        response = self.send('post', self.api_batch_url, {
+            'create': [{'title': f'Новая {index}', 'text': 'text'}
+                       for index in range(3)],
+            'update': [{'id': self.note.pk, 'title': NEW_TITLE}],
+            'delete': [other.pk],
+        })
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(len(response.json()['created']), 3)
+        self.note.refresh_from_db()
+        self.assertEqual(self.note.title, NEW_TITLE)
+        self.assertFalse(Note.objects.filter(pk=other.pk).exists())
+
+    def test_batch_cannot_touch_foreign_notes(self):
+        foreign = Note.objects.filter(author=self.reader).first()
+        response = self.send(
+            'post', self.api_batch_url, {'delete': [foreign.pk]}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        self.assertTrue(Note.objects.filter(pk=foreign.pk).exists())
+
+    def test_batch_rejects_bool_ids(self):
+        response = self.send('post', self.api_batch_url, {'delete': [True]})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    @override_settings(NOTES_API_BATCH_LIMIT=2)
+    def test_batch_limit(self):
+        response = self.send('post', self.api_list_url, [{}, {}, {}])
+        self.assertEqual(
+            response.status_code, HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+        )
+        response = self.send('post', self.api_batch_url, {
+            'create': [{}, {}], 'delete': [self.note.pk],
+        })
+        self.assertEqual(
+            response.status_code, HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+        )
@@ -0,0 +1,58 @@
+import asyncio
+from http import HTTPStatus
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.http import Http404
+from django.test import RequestFactory
+
+from notes import views
+from notes.async_views import async_note_view
+from notes.models import Note
+from .confunittest import NotesUrls, NEW_TITLE
+
+
+class TestAsyncViews(NotesUrls):
+
+    def call(self, view_class, user, method='get', data=None, **kwargs):
+        request = getattr(RequestFactory(), method)('/', data=data)
+        request.user = user
+        request.session = {}
+        request._messages = FallbackStorage(request)
+        request._dont_enforce_csrf_checks = True
+        return async_to_sync(async_note_view(view_class))(request, **kwargs)
+
+    def test_views_are_coroutines(self):
+        self.assertTrue(
+            asyncio.iscoroutinefunction(async_note_view(views.NotesList))
+        )
+
+    def test_list_is_rendered_in_one_hop(self):
+        response = self.call(views.NotesList, self.author)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertTrue(response.is_rendered)
+        self.assertIn(self.note, response.context_data['object_list'])
+
+    def test_detail_is_scoped_to_author(self):
+        with self.assertRaises(Http404):
+            self.call(views.NoteDetail, self.reader, slug=self.note.slug)
+
+    def test_anonymous_is_redirected(self):
+        response = self.call(views.NotesList, AnonymousUser())
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+
+    def test_create_update_delete(self):
+        response = self.call(
+            views.NoteCreate, self.author, 'post', self.form_data
+        )
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        note = Note.objects.get(slug=self.form_data['slug'])
+        self.call(
+            views.NoteUpdate, self.author, 'post',
+            {**self.form_data_new, 'slug': note.slug}, slug=note.slug,
+        )
+        note.refresh_from_db()
+        self.assertEqual(note.title, NEW_TITLE)
+        self.call(views.NoteDelete, self.author, 'post', slug=note.slug)
+        self.assertFalse(Note.objects.filter(pk=note.pk).exists())
@@ -0,0 +1,84 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, SimpleTestCase, override_settings
+from django.urls import reverse
+
+from notes.auth import user_cache, user_cache_key
+from notes.checks import (
+    CACHED_BACKEND, check_auth_cache, check_session_cache,
+)
+from .confunittest import NotesUrls
+
+CACHED_DB_SESSIONS = 'django.contrib.sessions.backends.cached_db'
+DUMMY_CACHE = {
+    'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+}
+
+
+@override_settings(
+    AUTHENTICATION_BACKENDS=[CACHED_BACKEND], SESSION_ENGINE=CACHED_DB_SESSIONS
+)
+class TestCachedAuth(NotesUrls):
+
+    def setUp(self):
+        super().setUp()
+        self.client = Client()
+        self.client.force_login(self.author)
+        # Первый запрос читает пользователя из базы и кладёт его в кэш.
+        self.client.get(self.detail_url)
+
+    def test_warm_page_has_no_auth_queries(self):
+        with self.assertNumQueries(0):
+            response = self.client.get(self.detail_url)
+        self.assertEqual(response.context['user'], self.author)
+
+    @override_settings(
+        SESSION_ENGINE='django.contrib.sessions.backends.signed_cookies'
+    )
+    def test_signed_cookie_sessions(self):
+        client = Client()
+        client.force_login(self.author)
+        client.get(self.detail_url)
+        with self.assertNumQueries(0):
+            response = client.get(self.detail_url)
+        self.assertEqual(response.context['user'], self.author)
+
+    def test_logout_forgets_user(self):
+        self.client.post(reverse('users:logout'))
+        self.assertIsNone(user_cache().get(user_cache_key(self.author.pk)))
+
+    def test_password_change_ends_old_sessions(self):
+        user = get_user_model().objects.get(pk=self.author.pk)
+        user.set_password('new-password-123')
+        user.save()
+        response = self.client.get(self.detail_url)
+        self.assertRedirects(
+            response, f'{reverse("users:login")}?next={self.detail_url}'
+        )
+
+
+class TestAuthCacheCheck(SimpleTestCase):
+
+    @override_settings(AUTHENTICATION_BACKENDS=[CACHED_BACKEND])
+    def test_local_cache_is_rejected(self):
+        errors = check_auth_cache(None)
+        self.assertEqual([error.id for error in errors], ['notes.E001'])
+
+    @override_settings(AUTHENTICATION_BACKENDS=[CACHED_BACKEND],
+                       CACHES=DUMMY_CACHE)
+    def test_other_cache_is_accepted(self):
+        self.assertEqual(check_auth_cache(None), [])
+
+    def test_model_backend_by_default(self):
+        self.assertEqual(check_auth_cache(None), [])
+
+    @override_settings(SESSION_ENGINE=CACHED_DB_SESSIONS)
+    def test_local_session_cache_is_rejected(self):
+        errors = check_session_cache(None)
+        self.assertEqual([error.id for error in errors], ['notes.E002'])
+
+    @override_settings(SESSION_ENGINE=CACHED_DB_SESSIONS, CACHES=DUMMY_CACHE)
+    def test_shared_session_cache_is_accepted(self):
+        self.assertEqual(check_session_cache(None), [])
+
+    def test_db_sessions_by_default(self):
+        self.assertEqual(check_session_cache(None), [])
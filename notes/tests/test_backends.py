@@ -0,0 +1,104 @@
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+
+from notes.budgets import QueryLog, wrap_queries
+from notes.models import Note
+from yanote.backends.pool import ConnectionPool, PoolTimeout
+from yanote.backends.sqlite3.base import pragma_statements
+from yanote.backends.transaction import write_atomic
+
+
+class TestSqlitePragmas(SimpleTestCase):
+
+    def test_statements(self):
+        self.assertEqual(
+            list(pragma_statements(
+                {'journal_mode': 'WAL', 'cache_size': '-2000'}
+            )),
+            ['PRAGMA journal_mode = wal', 'PRAGMA cache_size = -2000'],
+        )
+
+    def test_bad_values(self):
+        for pragmas in (
+            {'journal_mode': 'wal; DROP TABLE notes_note'},
+            {'synchronous': 'sometimes'},
+            {'busy_timeout': '5000; --'},
+            {'busy timeout': 5000},
+        ):
+            with self.subTest(pragmas=pragmas):
+                with self.assertRaises((ImproperlyConfigured, ValueError)):
+                    list(pragma_statements(pragmas))
+
+
+class TestSqliteConnection(TestCase):
+
+    def test_pragmas_applied(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(
+                cursor.fetchone()[0], settings.SQLITE_PRAGMAS['busy_timeout']
+            )
+
+
+class TestSqliteTransactions(TransactionTestCase):
+
+    def begin_statements(self, atomic):
+        log = QueryLog()
+        with wrap_queries(log):
+            with atomic:
+                Note.objects.exists()
+        return [sql for sql in log.queries if sql.startswith('BEGIN')]
+
+    def test_only_write_blocks_begin_immediate(self):
+        self.assertEqual(
+            self.begin_statements(transaction.atomic()), ['BEGIN']
+        )
+        self.assertEqual(
+            self.begin_statements(write_atomic()), ['BEGIN IMMEDIATE']
+        )
+        self.assertFalse(connection.begin_immediate)
+
+
+class FakeConnection:
+    closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class TestConnectionPool(SimpleTestCase):
+
+    def setUp(self):
+        self.opened = []
+        self.pool = ConnectionPool(self.connect, size=2, timeout=0.01)
+
+    def connect(self):
+        self.opened.append(FakeConnection())
+        return self.opened[-1]
+
+    def test_reuses_released_connections(self):
+        first = self.pool.acquire()
+        self.pool.release(first)
+        self.assertIs(self.pool.acquire(), first)
+        self.assertEqual(len(self.opened), 1)
+
+    def test_size_limit(self):
+        first = self.pool.acquire()
+        self.pool.acquire()
+        with self.assertRaises(PoolTimeout):
+            self.pool.acquire()
+        self.pool.release(first, reusable=False)
+        self.assertTrue(first.closed)
+        self.assertIsNot(self.pool.acquire(), first)
+        self.assertEqual(len(self.opened), 3)
+
+    def test_failed_connect_frees_slot(self):
+        def refuse():
+            raise OSError('connection refused')
+
+        pool = ConnectionPool(refuse, size=1, timeout=0.01)
+        for _ in range(2):
+            with self.assertRaises(OSError):
+                pool.acquire()
@@ -0,0 +1,119 @@
+from http import HTTPStatus
+from unittest import mock
+
+from django.conf import settings
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from notes.budgets import QueryBudget, QueryBudgetExceeded
+from notes.cache import get_note_cache
+from notes.models import Note
+from notes.views import NotesList
+from .confunittest import NotesUrls
+
+
+@override_settings(MIDDLEWARE=[
+    *settings.MIDDLEWARE, 'notes.middleware.QueryBudgetMiddleware'
+])
+class TestQueryBudgets(NotesUrls):
+
+    def setUp(self):
+        super().setUp()
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def test_context_manager_and_decorator(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            with QueryBudget(1):
+                list(Note.objects.all())
+                list(Note.objects.all())
+
+        @QueryBudget(1)
+        def one_query():
+            return list(Note.objects.all())
+
+        self.assertTrue(one_query())
+
+    def test_decorator_counts_each_call_separately(self):
+        @QueryBudget(2)
+        def nested(depth):
+            list(Note.objects.all())
+            if depth:
+                nested(depth - 1)
+
+        nested(1)
+        # Вложенный вызов не затёр обёртки внешнего: все они сняты.
+        self.assertEqual(connection.execute_wrappers, [])
+        with self.assertRaises(QueryBudgetExceeded):
+            nested(2)
+
+    def test_views_stay_within_budget(self):
+        """Middleware проверяет бюджет каждого представления."""
+        with mock.patch.object(
+            QueryBudget, 'check', wraps=QueryBudget.check
+        ) as check:
+            responses = [
+                self.client.get(self.list_url),
+                self.client.get(self.detail_url),
+                self.client.get(self.edit_url),
+                self.client.post(self.add_url, data={
+                    **self.form_data_new, 'tags': 'дом, идеи',
+                }),
+                self.client.post(self.edit_url, data={
+                    **self.form_data_new, 'slug': '', 'tags': 'дом, работа',
+                }),
+                self.client.get(self.list_url, {'tag': 'дом'}),
+            ]
+            # Правка с пустым slug подобрала заметке новый адрес.
+            self.note.refresh_from_db()
+            responses.append(self.client.post(
+                reverse('notes:delete', args=(self.note.slug,))
+            ))
+        for response in responses:
+            self.assertLess(response.status_code, HTTPStatus.BAD_REQUEST)
+        checked = [call.args[0] for call in check.call_args_list]
+        self.assertEqual(checked, [
+            'notes:list', 'notes:detail', 'notes:edit', 'notes:add',
+            'notes:edit', 'notes:list', 'notes:delete',
+        ])
+        for call in check.call_args_list:
+            name, limit, queries = call.args[:3]
+            with self.subTest(name):
+                self.assertGreater(len(queries), 0)
+                self.assertLessEqual(len(queries), limit)
+
+    def test_middleware_raises_on_exceeded_budget(self):
+        with MockBudget(NotesList, 1):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.get(self.list_url)
+
+    def test_list_queries_do_not_grow_with_notes(self):
+        # Сессия, пользователь, ETag, страница и счётчики меток.
+        self.client.get(self.list_url)
+        get_note_cache().bump(self.author.pk)
+        with self.assertNumQueries(NotesList.query_budget):
+            self.client.get(self.list_url, {'size': 100})
+        Note.objects.bulk_create(
+            Note(title=f'Ещё {index}', text='text', slug=f'more-{index}',
+                 author=self.author)
+            for index in range(100)
+        )
+        # bulk_create не шлёт сигналов - кэш автора сбрасываем сами.
+        get_note_cache().bump(self.author.pk)
+        with self.assertNumQueries(NotesList.query_budget):
+            self.client.get(self.list_url, {'size': 100})
+
+
+class MockBudget:
+
+    def __init__(self, view_class, limit):
+        self.view_class = view_class
+        self.limit = limit
+
+    def __enter__(self):
+        self.old = self.view_class.query_budget
+        self.view_class.query_budget = self.limit
+
+    def __exit__(self, *args):
+        self.view_class.query_budget = self.old
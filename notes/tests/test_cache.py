@@ -0,0 +1,153 @@
+from unittest import mock
+
+from django.db import transaction
+from django.template import RequestContext, Template
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from notes.cache import LocMemLRUCache, NoteCache, get_note_cache
+from notes.checks import CACHED_BACKEND, check_note_cache
+from notes.models import Note
+from .confunittest import NotesUrls, NEW_TITLE
+
+
+class TestLocMemLRUCache(SimpleTestCase):
+
+    def test_evicts_least_recently_used(self):
+        cache = LocMemLRUCache(max_entries=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 3)
+
+    def test_entries_expire(self):
+        cache = LocMemLRUCache(timeout=5)
+        with mock.patch('notes.cache.time.monotonic', return_value=100):
+            cache.set('a', 1)
+            cache.set('b', 2)
+        with mock.patch('notes.cache.time.monotonic', return_value=104):
+            self.assertEqual(cache.get('a'), 1)
+        with mock.patch('notes.cache.time.monotonic', return_value=105):
+            self.assertIsNone(cache.get('b'))
+
+    def test_local_cache_without_timeout_warns(self):
+        with override_settings(NOTES_CACHE={
+            'BACKEND': 'notes.cache.LocMemLRUCache',
+            'OPTIONS': {'timeout': None},
+        }):
+            errors = check_note_cache(None)
+        self.assertEqual([error.id for error in errors], ['notes.W001'])
+        self.assertEqual(check_note_cache(None), [])
+
+    def test_bump_invalidates_author_entries(self):
+        note_cache = NoteCache(LocMemLRUCache())
+        note_cache.get_or_set(1, 'key', lambda: 'old')
+        note_cache.get_or_set(2, 'key', lambda: 'other')
+        note_cache.bump(1)
+        self.assertEqual(note_cache.get_or_set(1, 'key', lambda: 'new'), 'new')
+        self.assertEqual(
+            note_cache.get_or_set(2, 'key', lambda: 'new'), 'other'
+        )
+
+    def test_lost_version_does_not_resurrect_entries(self):
+        """Вытесненная версия не должна вернуть старые записи."""
+        note_cache = NoteCache(LocMemLRUCache())
+        note_cache.get_or_set(1, 'key', lambda: 'old')
+        note_cache.backend._data.pop(note_cache._version_key(1))
+        self.assertEqual(note_cache.get_or_set(1, 'key', lambda: 'new'), 'new')
+
+    @override_settings(NOTES_CACHE={
+        'BACKEND': 'notes.cache.DjangoCacheBackend',
+        'OPTIONS': {'alias': 'default'},
+    })
+    def test_django_cache_backend(self):
+        note_cache = get_note_cache()
+        note_cache.get_or_set(1, 'key', lambda: 'value')
+        self.assertEqual(
+            note_cache.get_or_set(1, 'key', lambda: None), 'value'
+        )
+
+
+class TestNoteViewsCache(NotesUrls):
+
+    def test_bump_in_transaction_repeats_after_commit(self):
+        note_cache = NoteCache(LocMemLRUCache())
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                note_cache.bump(1)
+                # Чтение до COMMIT видит старые данные.
+                note_cache.get_or_set(1, 'key', lambda: 'old')
+        self.assertEqual(note_cache.get_or_set(1, 'key', lambda: 'new'), 'new')
+
+    @override_settings(
+        AUTHENTICATION_BACKENDS=[CACHED_BACKEND],
+        SESSION_ENGINE='django.contrib.sessions.backends.cached_db',
+    )
+    def test_repeat_detail_read_is_cached(self):
+        self.author_client.get(self.detail_url)
+        with self.assertNumQueries(0):
+            # Сессия и пользователь тоже берутся из кэша.
+            self.author_client.get(self.detail_url)
+
+    def test_edit_invalidates_detail(self):
+        self.author_client.get(self.detail_url)
+        self.author_client.post(
+            self.edit_url,
+            data={**self.form_data_new, 'slug': self.note.slug},
+        )
+        response = self.author_client.get(self.detail_url)
+        self.assertEqual(response.context['note'].title, NEW_TITLE)
+
+    def test_create_and_delete_invalidate_list(self):
+        self.author_client.get(self.list_url)
+        self.author_client.post(self.add_url, data=self.form_data)
+        response = self.author_client.get(self.list_url, {'size': 100})
+        titles = [note.title for note in response.context['object_list']]
+        self.assertIn(self.form_data['title'], titles)
+        self.author_client.post(self.delete_url)
+        response = self.author_client.get(self.list_url, {'size': 100})
+        self.assertNotIn(self.note, response.context['object_list'])
+
+    def test_queryset_delete_invalidates_list(self):
+        self.author_client.get(self.list_url)
+        Note.objects.filter(author=self.author).delete()
+        response = self.author_client.get(self.list_url)
+        self.assertEqual(list(response.context['object_list']), [])
+
+
+class TestFragmentCache(NotesUrls):
+    template = Template(
+        '{% load note_cache %}'
+        '{% notecache "fragment" vary %}{{ value }}{% endnotecache %}'
+    )
+
+    def render(self, value, vary=1, user=None):
+        request = RequestFactory().get('/')
+        request.user = user or self.author
+        return self.template.render(
+            RequestContext(request, {'value': value, 'vary': vary})
+        )
+
+    def test_fragment_cached_until_author_writes(self):
+        self.assertEqual(self.render('old'), 'old')
+        self.assertEqual(self.render('new'), 'old')
+        self.assertEqual(self.render('new', vary=2), 'new')
+        self.assertEqual(self.render('new', user=self.reader), 'new')
+        Note.objects.get(pk=self.note.pk).save()
+        self.assertEqual(self.render('new'), 'new')
+
+    @override_settings(NOTES_FRAGMENT_CACHE=False)
+    def test_can_be_disabled(self):
+        self.render('old')
+        self.assertEqual(self.render('new'), 'new')
+
+    def test_list_shows_edited_title(self):
+        self.author_client.get(self.list_url, {'size': 100})
+        self.author_client.post(
+            self.edit_url,
+            data={**self.form_data_new, 'slug': self.note.slug},
+        )
+        response = self.author_client.get(self.list_url, {'size': 100})
+        self.assertContains(response, NEW_TITLE)
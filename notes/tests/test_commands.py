@@ -0,0 +1,89 @@
+import json
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.utils import timezone
+from pytils.translit import slugify
+
+from notes.models import Note
+from .confunittest import NotesUrls, NOTE_COUNT_FOR_TEST
+
+
+class TestExportImport(NotesUrls):
+
+    def export(self, *args):
+        stdout = StringIO()
+        call_command('export_notes', *args, stdout=stdout, stderr=StringIO())
+        return stdout.getvalue()
+
+    def import_lines(self, lines, *args):
+        with tempfile.NamedTemporaryFile(
+            'w', suffix='.jsonl', delete=False, encoding='utf-8'
+        ) as file:
+            file.write(''.join(json.dumps(line) + '\n' for line in lines))
+        self.addCleanup(os.remove, file.name)
+        call_command('import_notes', file.name, *args, stderr=StringIO())
+
+    def test_export_user_notes(self):
+        output = self.export('--user', self.reader.username)
+        rows = [json.loads(line) for line in output.splitlines()]
+        self.assertEqual(len(rows), NOTE_COUNT_FOR_TEST)
+        self.assertEqual(
+            {row['author'] for row in rows}, {self.reader.username}
+        )
+
+    def test_roundtrip_restores_notes(self):
+        fields = ('slug', 'title', 'text', 'created', 'updated')
+        Note.objects.filter(pk=self.note.pk).update(
+            created=timezone.now() - timedelta(days=30),
+            updated=timezone.now() - timedelta(days=10),
+        )
+        expected = sorted(Note.objects.values_list(*fields))
+        rows = [json.loads(line) for line in self.export().splitlines()]
+        Note.objects.all().delete()
+        self.import_lines(rows, '--batch-size', '4')
+        self.assertEqual(sorted(Note.objects.values_list(*fields)), expected)
+
+    def test_import_allocates_unique_slugs(self):
+        title = 'Повтор'
+        Note.objects.create(title=title, text='text', author=self.author)
+        lines = [{'author': self.author.username, 'title': title, 'text': 't'}]
+        self.import_lines(lines * 3, '--batch-size', '2')
+        base = slugify(title)
+        slugs = Note.objects.filter(title=title).values_list('slug', flat=True)
+        self.assertEqual(
+            set(slugs), {base, f'{base}-2', f'{base}-3', f'{base}-4'}
+        )
+
+    def test_import_continues_after_highest_suffix(self):
+        """Номера идут после наибольшего занятого, пропуски не заполняются."""
+        Note.objects.create(
+            title='!!!', text='text', slug='note-7', author=self.author
+        )
+        long_title = 'a' * 150
+        Note.objects.create(title=long_title, text='text', author=self.author)
+        lines = [
+            {'author': self.author.username, 'title': title, 'text': 't'}
+            for title in ('!!!', '!!!', long_title, long_title)
+        ]
+        self.import_lines(lines)
+        self.assertEqual(
+            set(Note.objects.filter(
+                title='!!!'
+            ).values_list('slug', flat=True)),
+            {'note-7', 'note-8', 'note-9'},
+        )
+        self.assertEqual(
+            set(Note.objects.filter(
+                title=long_title
+            ).values_list('slug', flat=True)),
+            {'a' * 100, 'a' * 98 + '-2', 'a' * 98 + '-3'},
+        )
+
+    def test_import_to_user(self):
+        lines = [{'author': 'нет такого', 'title': 'Чужая', 'text': 'text'}]
+        self.import_lines(lines, '--user', self.reader.username)
+        self.assertEqual(Note.objects.get(title='Чужая').author, self.reader)
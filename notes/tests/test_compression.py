@@ -0,0 +1,85 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+from notes.fields import MARKER, compress, decompress
+from notes.models import Note
+from .confunittest import NotesUrls
+
+BIG_TEXT = 'строка журнала уникальнослово ' * 200
+COMPRESSION = {'ALGORITHM': 'zlib', 'THRESHOLD': 1000}
+
+
+class TestCompress(SimpleTestCase):
+
+    def test_roundtrip(self):
+        for algorithm in ('zlib', 'lzma'):
+            with self.subTest(algorithm=algorithm):
+                with self.settings(NOTES_COMPRESSION={
+                    'ALGORITHM': algorithm, 'THRESHOLD': 1000,
+                }):
+                    stored = compress(BIG_TEXT)
+                self.assertTrue(stored.startswith(f'{MARKER}{algorithm}:'))
+                self.assertLess(len(stored), len(BIG_TEXT) / 10)
+                self.assertEqual(decompress(stored), BIG_TEXT)
+
+    @override_settings(NOTES_COMPRESSION=COMPRESSION)
+    def test_small_and_marker_texts(self):
+        self.assertEqual(compress('короткая'), 'короткая')
+        text = MARKER + 'zlib:не сжато'
+        self.assertEqual(decompress(compress(text)), text)
+
+
+@override_settings(NOTES_COMPRESSION=COMPRESSION)
+class TestCompressedNotes(NotesUrls):
+
+    def stored_text(self, note):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT text FROM notes_note WHERE id = %s', [note.pk]
+            )
+            return cursor.fetchone()[0]
+
+    def search(self, query):
+        return list(Note.objects.filter(author=self.author).search(query))
+
+    def test_big_note_is_stored_compressed(self):
+        note = Note.objects.create(
+            title='Журнал', text=BIG_TEXT, author=self.author
+        )
+        self.assertTrue(self.stored_text(note).startswith(MARKER))
+        self.assertEqual(Note.objects.get(pk=note.pk).text, BIG_TEXT)
+        response = self.author_client.get(
+            reverse('notes:detail', args=(note.slug,))
+        )
+        self.assertContains(response, 'уникальнослово')
+        # Заголовок ищется, сжатое тело в индекс не попадает.
+        self.assertEqual(self.search('журнал'), [note])
+        self.assertEqual(self.search('уникальнослово'), [])
+
+    def test_marker_text_from_user_is_kept(self):
+        for suffix in ('foo:bar', 'raw:hi', 'zlib:eJwDAAAAAAE='):
+            text = MARKER + suffix
+            with self.subTest(text=text):
+                Note.objects.filter(slug='marker').delete()
+                self.author_client.post(reverse('notes:add'), data={
+                    'title': 'Маркер', 'text': text, 'slug': 'marker',
+                })
+                self.assertEqual(Note.objects.get(slug='marker').text, text)
+
+    def test_compress_command(self):
+        with self.settings(NOTES_COMPRESSION=None):
+            note = Note.objects.create(
+                title='Журнал', text=BIG_TEXT, author=self.author
+            )
+        self.assertEqual(self.search('уникальнослово'), [note])
+        call_command('compress_notes', '--batch-size', '1', stderr=StringIO())
+        self.assertTrue(self.stored_text(note).startswith(MARKER))
+        self.assertEqual(Note.objects.get(pk=note.pk).text, BIG_TEXT)
+        self.assertEqual(self.search('уникальнослово'), [])
+        self.assertFalse(self.stored_text(self.note).startswith(MARKER))
+        note.delete()
+        self.assertEqual(self.search('журнал'), [])
@@ -1,6 +1,18 @@
+from http import HTTPStatus
+from urllib.parse import quote
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import AsyncClient, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
 from notes.forms import NoteForm
+from notes.models import Note
+from notes.pagination import encode_cursor
+from notes.views import STREAM_PARAM
 from .confunittest import NotesUrls
 
 User = get_user_model()
@@ -22,6 +34,20 @@ class TestListNotesPageOneUser(NotesUrls):
         self.assertNotIn(self.reader, authors_in_authors_notes)
         self.assertIn(self.author, authors_in_authors_notes)
 
+    def test_list_does_not_load_text(self):
+        """Список заметок не загружает тело заметки из базы."""
+        response = self.author_client.get(self.list_url)
+        for note in response.context['object_list']:
+            self.assertIn('text', note.get_deferred_fields())
+
+    def test_admin_changelist_does_not_load_text(self):
+        admin = User.objects.create_superuser('admin', password='admin')
+        self.client.force_login(admin)
+        response = self.client.get(reverse('admin:notes_note_changelist'))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        for note in response.context['cl'].result_list:
+            self.assertIn('text', note.get_deferred_fields())
+
     def test_pages_contains_form(self):
         urls = (self.add_url, self.edit_url,)
         for url in urls:
@@ -29,3 +55,101 @@ class TestListNotesPageOneUser(NotesUrls):
                 response = self.author_client.get(url)
                 self.assertIn('form', response.context)
                 self.assertIsInstance(response.context['form'], NoteForm)
+
+
+@override_settings(NOTES_PAGE_SIZE=5)
+class TestListNotesPagination(NotesUrls):
+
+    def test_first_page_size(self):
+        """На первой странице не больше NOTES_PAGE_SIZE заметок."""
+        response = self.author_client.get(self.list_url)
+        self.assertEqual(len(response.context['object_list']), 5)
+        self.assertIsNotNone(response.context['next_cursor'])
+
+    def test_cursor_walks_all_notes(self):
+        """Переход по курсорам отдаёт все заметки автора без повторов."""
+        seen = []
+        params = {}
+        while True:
+            response = self.author_client.get(self.list_url, params)
+            seen.extend(note.id for note in response.context['object_list'])
+            if not response.context['next_cursor']:
+                break
+            params = {'after': response.context['next_cursor']}
+        expected = list(
+            Note.objects.filter(author=self.author)
+            .order_by('id').values_list('id', flat=True)
+        )
+        self.assertEqual(seen, expected)
+
+    def test_page_size_param(self):
+        response = self.author_client.get(self.list_url, {'size': 3})
+        self.assertEqual(len(response.context['object_list']), 3)
+
+    def test_bad_cursor(self):
+        for after in ('!!!', encode_cursor(2 ** 64), encode_cursor(-1)):
+            with self.subTest(after=after):
+                response = self.author_client.get(
+                    self.list_url, {'after': after}
+                )
+                self.assertEqual(
+                    response.status_code, HTTPStatus.BAD_REQUEST
+                )
+
+    def test_bad_page_size(self):
+        for size in ('²', '-3', 'abc', '0'):
+            with self.subTest(size=size):
+                response = self.author_client.get(
+                    self.list_url, {'size': size}
+                )
+                self.assertEqual(
+                    len(response.context['object_list']),
+                    settings.NOTES_PAGE_SIZE,
+                )
+
+
+@override_settings(NOTES_STREAM_CHUNK_SIZE=3)
+class TestStreamingList(NotesUrls):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.list_all_url = f'{cls.list_url}?{STREAM_PARAM}=1'
+
+    def test_streams_all_author_notes(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.author_client.get(self.list_all_url)
+        self.assertTrue(response.streaming)
+        # Под WSGI заметки читаются пачками уже в потоке.
+        self.assertFalse(
+            [query for query in queries if 'notes_note' in query['sql']]
+        )
+        with self.assertNumQueries(4):
+            chunks = [chunk.decode() for chunk in response.streaming_content]
+        # Начало страницы, пачки строк по 3 заметки и конец страницы.
+        self.assertEqual(len(chunks), 2 + 4)
+        self.assertIn('<html>', chunks[0])
+        content = ''.join(chunks)
+        for note in Note.objects.filter(author=self.author):
+            self.assertIn(note.title, content)
+        self.assertNotIn(f'Заметка {self.reader}', content)
+
+    def test_streams_under_asgi(self):
+        """Под ASGI поток перебирается в цикле событий, без ORM."""
+        client = AsyncClient()
+        client.force_login(self.author)
+
+        async def get_chunks():
+            response = await client.get(self.list_all_url)
+            # Как ASGIHandler.send_response: обычный цикл в корутине.
+            return [chunk.decode() for chunk in response]
+
+        chunks = async_to_sync(get_chunks)()
+        self.assertEqual(len(chunks), 2 + 4)
+        self.assertIn(self.note.title, ''.join(chunks))
+
+    def test_redirect_for_anonymous_client(self):
+        response = self.client.get(self.list_all_url)
+        self.assertRedirects(
+            response, f'{self.login_url}?next={quote(self.list_all_url)}'
+        )
@@ -0,0 +1,60 @@
+from http import HTTPStatus
+
+from django.conf import settings
+from django.test import Client, SimpleTestCase, override_settings
+from django.urls import reverse
+
+from notes.metrics import QUERY_BUCKETS, Histogram, registry
+from .confunittest import NotesUrls, User
+
+
+class TestHistogram(SimpleTestCase):
+
+    def test_percentiles(self):
+        histogram = Histogram()
+        for value in range(1, 101):
+            histogram.add(float(value))
+        summary = histogram.summary()
+        self.assertEqual(summary['count'], 100)
+        self.assertAlmostEqual(summary['p50'], 50, delta=50 * 0.25)
+        self.assertAlmostEqual(summary['p99'], 99, delta=99 * 0.25)
+        self.assertEqual(summary['max'], 100)
+
+    def test_query_counts_have_exact_small_buckets(self):
+        histogram = Histogram(QUERY_BUCKETS)
+        for value in [3] * 90 + [7] * 9 + [40]:
+            histogram.add(value)
+        summary = histogram.summary()
+        self.assertEqual(summary['p50'], 3)
+        self.assertEqual(summary['p95'], 7)
+        self.assertEqual(summary['max'], 40)
+
+
+@override_settings(MIDDLEWARE=[
+    'notes.middleware.InstrumentationMiddleware', *settings.MIDDLEWARE
+])
+class TestInstrumentationMiddleware(NotesUrls):
+
+    def setUp(self):
+        super().setUp()
+        registry.reset()
+
+    def test_server_timing_header(self):
+        client = Client()
+        client.force_login(self.author)
+        response = client.get(self.list_url)
+        self.assertIn('db;dur=', response['Server-Timing'])
+        self.assertIn('tpl;dur=', response['Server-Timing'])
+        self.assertIn('total;dur=', response['Server-Timing'])
+
+    def test_metrics_endpoint_for_staff_only(self):
+        client = Client()
+        client.force_login(self.author)
+        client.get(self.list_url)
+        response = client.get(reverse('notes:metrics'))
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        admin = User.objects.create_superuser('admin', password='admin')
+        client.force_login(admin)
+        stats = client.get(reverse('notes:metrics')).json()
+        self.assertEqual(stats['notes:list']['total_ms']['count'], 1)
+        self.assertGreater(stats['notes:list']['queries']['max'], 0)
@@ -0,0 +1,294 @@
+from datetime import timedelta
+from http import HTTPStatus
+from io import StringIO
+from unittest import mock
+
+from django.contrib.admin import helpers
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from notes import jobs
+from notes.models import Job, Note
+from notes.tags import set_note_tags
+from .confunittest import NotesUrls
+
+User = get_user_model()
+
+JOBS = {
+    'THRESHOLD': 5,
+    'BATCH_SIZE': 2,
+    'MAX_ATTEMPTS': 2,
+    'RETRY_DELAY': 30,
+    'TIMEOUT': 600,
+}
+
+
+@override_settings(NOTES_JOBS=JOBS)
+class TestJobs(NotesUrls):
+
+    def setUp(self):
+        super().setUp()
+        self.calls = []
+        registry = mock.patch.dict(jobs.REGISTRY, {
+            'test.record': lambda **payload: self.calls.append(payload),
+            'test.fail': self.fail_job,
+            'test.heartbeat': jobs.heartbeat,
+        })
+        registry.start()
+        self.addCleanup(registry.stop)
+
+    def fail_job(self, **payload):
+        raise RuntimeError('сбой')
+
+    def test_enqueue_and_drain(self):
+        job = jobs.enqueue('test.record', value=1)
+        self.assertEqual(jobs.run_pending(), 1)
+        self.assertEqual(self.calls, [{'value': 1}])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.DONE, 1))
+        self.assertEqual(jobs.run_pending(), 0)
+
+    def test_unknown_job_is_rejected(self):
+        with self.assertRaises(KeyError):
+            jobs.enqueue('test.missing')
+
+    def test_failed_job_is_retried_later_then_fails(self):
+        job = jobs.enqueue('test.fail')
+        with self.assertLogs('notes.jobs', 'ERROR'):
+            jobs.run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 1))
+        self.assertIn('RuntimeError', job.error)
+        self.assertGreater(job.run_after, timezone.now())
+        # Повтор ещё не наступил.
+        self.assertEqual(jobs.run_pending(), 0)
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        with self.assertLogs('notes.jobs', 'ERROR'):
+            jobs.run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+
+    def test_job_is_claimed_once(self):
+        jobs.enqueue('test.record')
+        self.assertIsNotNone(jobs.claim_job())
+        self.assertIsNone(jobs.claim_job())
+
+    def test_abandoned_job_is_claimed_again(self):
+        job = jobs.enqueue('test.record')
+        jobs.claim_job()
+        self.make_stale(job)
+        self.assertEqual(jobs.claim_job().pk, job.pk)
+
+    def make_stale(self, job):
+        Job.objects.filter(pk=job.pk).update(
+            locked_at=timezone.now() - timedelta(seconds=JOBS['TIMEOUT'] + 1)
+        )
+
+    def test_heartbeat_keeps_long_job(self):
+        def long_job():
+            self.make_stale(job)
+            jobs.heartbeat()
+            self.calls.append(jobs.claim_job())
+
+        with mock.patch.dict(jobs.REGISTRY, {'test.long': long_job}):
+            job = jobs.enqueue('test.long')
+            self.assertTrue(jobs.run_job(jobs.claim_job()))
+        self.assertEqual(self.calls, [None])
+
+    def test_reclaimed_job_keeps_new_claim(self):
+        job = jobs.enqueue('test.record')
+        first = jobs.claim_job()
+        self.make_stale(job)
+        second = jobs.claim_job()
+        # Первая попытка закончилась уже после второго захвата.
+        self.assertFalse(jobs.run_job(first))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.RUNNING, 2))
+        self.assertTrue(jobs.run_job(second))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE)
+
+    def test_lost_job_stops_at_heartbeat(self):
+        job = jobs.enqueue('test.heartbeat')
+        first = jobs.claim_job()
+        self.make_stale(job)
+        jobs.claim_job()
+        with self.assertLogs('notes.jobs', 'WARNING'):
+            self.assertFalse(jobs.run_job(first))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.RUNNING, 2))
+
+    def test_abandoned_job_without_attempts_fails(self):
+        job = jobs.enqueue('test.record')
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.RUNNING, attempts=JOBS['MAX_ATTEMPTS']
+        )
+        self.make_stale(job)
+        self.assertIsNone(jobs.claim_job())
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(self.calls, [])
+
+    def test_worker_command(self):
+        jobs.enqueue('test.record', value=1)
+        jobs.enqueue('test.record', value=2)
+        stderr = StringIO()
+        call_command(
+            'run_jobs', '--once', '--workers', '1', stderr=stderr
+        )
+        self.assertEqual(len(self.calls), 2)
+        self.assertIn('выполнено задач: 2', stderr.getvalue())
+
+    def test_large_admin_delete_goes_to_queue(self):
+        admin = User.objects.create_superuser('admin', password='admin')
+        self.client.force_login(admin)
+        notes = list(Note.objects.filter(author=self.author))
+        response = self.client.post(
+            reverse('admin:notes_note_changelist'),
+            {
+                'action': 'delete_notes',
+                helpers.ACTION_CHECKBOX_NAME: [note.pk for note in notes],
+            },
+        )
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        self.assertEqual(
+            Note.objects.filter(author=self.author).count(), len(notes)
+        )
+        # В задаче описание выборки, а не id каждой заметки.
+        lookups = Job.objects.get().payload['lookups']
+        self.assertLessEqual(
+            set(lookups), {'id__gte', 'id__lte', 'author__in'}
+        )
+        self.author_client.get(self.list_url)
+        jobs.run_pending()
+        self.assertFalse(Note.objects.filter(author=self.author).exists())
+        response = self.author_client.get(self.list_url)
+        self.assertEqual(list(response.context['object_list']), [])
+
+    def test_admin_rejects_selection_with_gaps(self):
+        admin = User.objects.create_superuser('admin', password='admin')
+        self.client.force_login(admin)
+        notes = list(Note.objects.filter(author=self.author).order_by('id'))
+        # Пропуск в середине не описать ни диапазоном id, ни автором.
+        selected = notes[:2] + notes[3:]
+        response = self.client.post(
+            reverse('admin:notes_note_changelist'),
+            {
+                'action': 'delete_notes',
+                helpers.ACTION_CHECKBOX_NAME: [note.pk for note in selected],
+            },
+            follow=True,
+        )
+        self.assertContains(response, 'уберите поиск')
+        self.assertFalse(Job.objects.exists())
+        self.assertEqual(
+            Note.objects.filter(author=self.author).count(), len(notes)
+        )
+
+
+@override_settings(NOTES_JOBS=JOBS)
+class TestUserDeletion(NotesUrls):
+
+    def note_deletes(self, queries):
+        return [
+            query for query in queries
+            if query['sql'].startswith('DELETE FROM "notes_note"')
+        ]
+
+    def test_command_deletes_in_batches(self):
+        stderr = StringIO()
+        with CaptureQueriesContext(connection) as queries:
+            call_command(
+                'delete_user', self.reader.username, '--batch-size', '3',
+                stderr=stderr,
+            )
+        # 10 заметок пачками по 3.
+        self.assertEqual(len(self.note_deletes(queries)), 4)
+        self.assertIn('Удалено заметок: 10 из 10', stderr.getvalue())
+        self.assertFalse(User.objects.filter(pk=self.reader.pk).exists())
+        self.assertFalse(Note.objects.filter(author=self.reader).exists())
+        self.assertTrue(Note.objects.filter(author=self.author).exists())
+
+    def test_command_keep_user(self):
+        with CaptureQueriesContext(connection) as queries:
+            call_command(
+                'delete_user', self.reader.username, '--keep-user',
+                stderr=StringIO(),
+            )
+        # Размер пачки по умолчанию - NOTES_JOBS['BATCH_SIZE'].
+        self.assertEqual(len(self.note_deletes(queries)), 5)
+        self.assertTrue(User.objects.get(pk=self.reader.pk).is_active)
+        self.assertFalse(Note.objects.filter(author=self.reader).exists())
+
+    def test_unknown_user(self):
+        with self.assertRaises(CommandError):
+            call_command('delete_user', 'нет такого', stderr=StringIO())
+
+    def admin_delete(self, *users):
+        admin = User.objects.create_superuser('admin', password='admin')
+        self.client.force_login(admin)
+        return self.client.post(reverse('admin:auth_user_changelist'), {
+            'action': 'delete_selected',
+            'post': 'yes',
+            helpers.ACTION_CHECKBOX_NAME: [user.pk for user in users],
+        })
+
+    def test_admin_deletes_small_user_at_once(self):
+        user = User.objects.create(username='Малый')
+        Note.objects.create(title='Одна', text='Текст', author=user)
+        self.admin_delete(user)
+        self.assertFalse(User.objects.filter(pk=user.pk).exists())
+        self.assertFalse(Job.objects.exists())
+
+    def test_admin_queues_large_user(self):
+        response = self.admin_delete(self.reader)
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        reader = User.objects.get(pk=self.reader.pk)
+        self.assertFalse(reader.is_active)
+        # Отключённый пользователь сразу теряет доступ.
+        response = self.reader_client.get(self.list_url)
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        jobs.run_pending()
+        self.assertFalse(User.objects.filter(pk=self.reader.pk).exists())
+        self.assertFalse(Note.objects.filter(author=self.reader).exists())
+
+    def test_confirmation_page_counts_notes(self):
+        admin = User.objects.create_superuser('admin', password='admin')
+        self.client.force_login(admin)
+        response = self.client.post(reverse('admin:auth_user_changelist'), {
+            'action': 'delete_selected',
+            helpers.ACTION_CHECKBOX_NAME: [self.reader.pk],
+        })
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertNotContains(response, 'Заметка Читатель простой')
+
+    def confirm_delete(self, user):
+        return self.client.post(reverse('admin:auth_user_changelist'), {
+            'action': 'delete_selected',
+            helpers.ACTION_CHECKBOX_NAME: [user.pk],
+        })
+
+    def test_confirmation_lists_other_related_objects(self):
+        set_note_tags(Note.objects.filter(author=self.reader)[0], ['дом'])
+        admin = User.objects.create_superuser('admin', password='admin')
+        self.client.force_login(admin)
+        response = self.confirm_delete(self.reader)
+        self.assertContains(response, 'дом')
+        self.assertEqual(response.context['perms_lacking'], set())
+
+    def test_confirmation_checks_note_permission(self):
+        staff = User.objects.create(username='staff', is_staff=True)
+        staff.user_permissions.set(Permission.objects.filter(
+            codename__in=('view_user', 'delete_user')
+        ))
+        self.client.force_login(staff)
+        response = self.confirm_delete(self.reader)
+        self.assertEqual(
+            response.context['perms_lacking'], {Note._meta.verbose_name}
+        )
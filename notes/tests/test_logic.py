@@ -1,9 +1,13 @@
+from unittest import mock
+
 from django.contrib.auth import get_user_model
+from django.db import IntegrityError, connection
 from pytils.translit import slugify
 
 from notes.models import Note
-from notes.forms import WARNING
-from .confunittest import NotesUrls, NOTE_SLUG
+from notes.forms import NoteForm, WARNING
+from notes.slugs import candidates
+from .confunittest import NotesUrls, NEW_TITLE, NOTE_SLUG, NOTE_TEXT
 
 
 User = get_user_model()
@@ -88,3 +92,73 @@ class TestLogic(NotesUrls):
         self.assertEqual(new_note.title, old_note.title)
         self.assertEqual(new_note.text, old_note.text)
         self.assertEqual(new_note.author, old_note.author)
+
+    def test_same_title_gets_suffixed_slug(self):
+        """Заметки с одинаковым заголовком без slug получают суффикс."""
+        self.author_client.post(self.add_url, data=self.form_data_new)
+        self.author_client.post(self.add_url, data=self.form_data_new)
+        slug = slugify(self.form_data_new['title'])
+        self.assertEqual(
+            set(Note.objects.filter(
+                title=self.form_data_new['title']
+            ).values_list('slug', flat=True)),
+            {slug, f'{slug}-2'},
+        )
+
+    def test_slug_lookup_seeks_slug_index(self):
+        """Подбор номера slug не просматривает все заметки."""
+        if connection.vendor != 'sqlite':
+            self.skipTest('План запроса SQLite.')
+        max_length = Note._meta.get_field('slug').max_length
+        for base in ('note', 'a' * max_length):
+            with self.subTest(base=base):
+                queryset = Note.objects.filter(
+                    candidates(base, max_length, connection.vendor)
+                ).values('slug')
+                sql, params = queryset.query.sql_with_params()
+                with connection.cursor() as cursor:
+                    cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+                    plan = ' '.join(row[-1] for row in cursor.fetchall())
+                self.assertIn('SEARCH', plan)
+                self.assertNotIn('SCAN', plan)
+
+    def test_form_checks_slug_with_one_query(self):
+        """Проверка явного slug стоит один запрос, пустого - ни одного."""
+        with self.assertNumQueries(1):
+            NoteForm(data=self.form_data).is_valid()
+        with self.assertNumQueries(0):
+            NoteForm(data=self.form_data_new).is_valid()
+
+    def test_save_retries_when_slug_taken_concurrently(self):
+        """Если slug заняли между подбором и вставкой - подбираем заново."""
+        taken = self.note.slug
+        with mock.patch(
+            'notes.models.allocate_slug', side_effect=[taken, 'free-slug']
+        ):
+            note = Note.objects.create(
+                title=NEW_TITLE, text=NOTE_TEXT, author=self.author
+            )
+        self.assertEqual(note.slug, 'free-slug')
+
+    def test_save_reraises_other_integrity_errors(self):
+        """Прочие нарушения целостности не принимаются за коллизию slug."""
+        with mock.patch(
+            'notes.models.allocate_slug', return_value='free-slug'
+        ) as allocate, mock.patch(
+            'django.db.models.Model.save', side_effect=IntegrityError
+        ):
+            with self.assertRaises(IntegrityError):
+                Note.objects.create(
+                    title=NEW_TITLE, text=NOTE_TEXT, author=self.author
+                )
+        allocate.assert_called_once()
+
+    def test_explicit_slug_taken_concurrently_is_form_error(self):
+        """Явный slug заняли после проверки формы - ошибка формы, а не 500."""
+        form_data = {**self.form_data, 'slug': self.note.slug}
+        with mock.patch.object(Note, 'validate_unique'):
+            response = self.author_client.post(self.add_url, data=form_data)
+        self.assertFormError(
+            response, form='form', field='slug',
+            errors=self.note.slug + WARNING,
+        )
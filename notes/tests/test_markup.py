@@ -0,0 +1,112 @@
+from http import HTTPStatus
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+
+from notes import jobs, markup
+from notes.markup import render_markdown
+from notes.models import Job, Note
+from .confunittest import NotesUrls
+
+MARKDOWN = '# Заголовок\n\n**жирный** и [ссылка](https://example.com)'
+
+
+class TestMarkdown(NotesUrls):
+
+    def test_render(self):
+        html = render_markdown(MARKDOWN)
+        self.assertIn('<h1>Заголовок</h1>', html)
+        self.assertIn('<strong>жирный</strong>', html)
+        self.assertIn('<a href="https://example.com">ссылка</a>', html)
+
+    def test_render_is_sanitized(self):
+        html = render_markdown(
+            '<script>alert(1)</script>\n\n'
+            '[x](javascript:alert(1)) <b onclick="alert(1)">b</b>'
+        )
+        self.assertNotIn('<script', html)
+        self.assertNotIn('javascript:', html)
+        self.assertNotIn('onclick', html)
+
+    def test_code_block_keeps_language(self):
+        html = render_markdown('```python\nprint(1)\n```')
+        self.assertIn('<code class="language-python">', html)
+
+    def test_html_is_rendered_on_save_once(self):
+        note = Note.objects.create(
+            title='Markdown', text=MARKDOWN, author=self.author
+        )
+        self.assertIn('<h1>Заголовок</h1>', note.text_html)
+        with mock.patch.object(
+            markup, 'render_markdown', wraps=render_markdown
+        ) as render:
+            note.title = 'Другой заголовок'
+            note.save()
+            render.assert_not_called()
+            note.text = '*другой текст*'
+            note.save(update_fields=['text'])
+            render.assert_called_once()
+        note.refresh_from_db()
+        self.assertEqual(note.text_html, '<p><em>другой текст</em></p>')
+
+    def test_detail_does_not_parse_markdown(self):
+        note = Note.objects.create(
+            title='Markdown', text=MARKDOWN, author=self.author
+        )
+        with mock.patch.object(
+            markup, 'render_markdown', side_effect=AssertionError
+        ):
+            response = self.author_client.get(
+                reverse('notes:detail', args=(note.slug,))
+            )
+        self.assertContains(response, '<strong>жирный</strong>', html=True)
+
+    def test_not_rendered_note_is_escaped(self):
+        Note.objects.filter(pk=self.note.pk).update(
+            text='<b>сырой</b>', text_html='', text_html_hash=''
+        )
+        response = self.author_client.get(self.detail_url)
+        self.assertContains(response, '&lt;b&gt;сырой&lt;/b&gt;')
+
+    def test_render_notes_command(self):
+        # bulk_create в confunittest обходит save(): HTML ещё нет.
+        self.assertTrue(Note.objects.filter(text_html_hash='').exists())
+        stderr = StringIO()
+        note = Note.objects.filter(
+            author=self.author, text_html_hash=''
+        ).first()
+        url = reverse('notes:detail', args=(note.slug,))
+        etag = self.author_client.get(url)['ETag']
+        call_command('render_notes', '--batch-size', '7', stderr=stderr)
+        response = self.author_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertFalse(Note.objects.filter(text_html_hash='').exists())
+        self.assertIn('отрисовано: 20', stderr.getvalue())
+        stderr = StringIO()
+        call_command('render_notes', stderr=stderr)
+        self.assertIn('отрисовано: 0', stderr.getvalue())
+
+    @override_settings(NOTES_MARKDOWN_INLINE_LIMIT=20)
+    def test_large_note_is_rendered_in_background(self):
+        self.author_client.get(self.detail_url)
+        self.author_client.post(self.edit_url, data={
+            **self.form_data,
+            'slug': self.note.slug,
+            'text': '**длинный текст** заметки',
+        })
+        note = Note.objects.get(pk=self.note.pk)
+        self.assertEqual(note.text_html_hash, '')
+        self.assertTrue(Job.objects.filter(name='notes.render_note').exists())
+        response = self.author_client.get(self.detail_url)
+        self.assertContains(response, '**длинный текст**')
+        jobs.run_pending()
+        # Отрисовка не меняет updated, но ETag страницы меняет.
+        response = self.author_client.get(
+            self.detail_url, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertContains(
+            response, '<strong>длинный текст</strong>', html=True
+        )
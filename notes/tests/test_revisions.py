@@ -0,0 +1,144 @@
+from http import HTTPStatus
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+from notes.models import Note, NoteQuerySet, NoteRevision
+from notes.revisions import apply_delta, make_delta, revision_text
+from .confunittest import NOTE_TEXT, NotesUrls
+
+LONG_TEXT = ' '.join(f'слово{index}' for index in range(2000))
+
+
+class TestDelta(SimpleTestCase):
+
+    def test_roundtrip(self):
+        cases = (
+            ('', 'новый текст'),
+            ('старый текст', ''),
+            ('один два три', 'один три четыре'),
+            ('строка\n  с отступом\n', 'строка\n\tс табом\n'),
+        )
+        for old, new in cases:
+            with self.subTest(old=old, new=new):
+                self.assertEqual(apply_delta(old, make_delta(old, new)), new)
+
+
+@override_settings(NOTES_REVISION_SNAPSHOT_EVERY=3)
+class TestRevisions(NotesUrls):
+
+    def edit(self, text, title=None):
+        note = Note.objects.get(pk=self.note.pk)
+        note.text = text
+        note.title = title or note.title
+        note.save()
+
+    def texts(self):
+        return [
+            revision_text(revision) for revision in
+            NoteRevision.objects.filter(note=self.note).order_by('number')
+        ]
+
+    def test_every_version_is_restorable(self):
+        versions = [self.note.text]
+        for number in range(6):
+            versions.append(f'{LONG_TEXT} правка {number}')
+            self.edit(versions[-1])
+        self.assertEqual(self.texts(), versions)
+        self.assertEqual(
+            list(
+                NoteRevision.objects.filter(note=self.note, is_snapshot=True)
+                .order_by('number').values_list('number', flat=True)
+            ),
+            [1, 2, 4, 7],
+        )
+
+    def test_delta_is_proportional_to_edit(self):
+        self.edit(LONG_TEXT)
+        self.edit(LONG_TEXT.replace('слово1000', 'правка'))
+        snapshot, delta = NoteRevision.objects.filter(
+            note=self.note, number__in=(2, 3)
+        ).order_by('number')
+        self.assertFalse(delta.is_snapshot)
+        self.assertLess(len(delta.data) * 10, len(snapshot.data))
+
+    def test_unchanged_save_adds_no_revision(self):
+        Note.objects.get(pk=self.note.pk).save()
+        self.assertEqual(self.note.revisions.count(), 1)
+
+    def test_numbering_locks_the_note(self):
+        """Номер версии берётся под блокировкой строки заметки."""
+        with mock.patch.object(
+            NoteQuerySet, 'select_for_update', autospec=True,
+            side_effect=NoteQuerySet.select_for_update,
+        ) as lock:
+            self.edit('заблокированная правка')
+        lock.assert_called_once()
+        self.assertEqual(self.texts()[-1], 'заблокированная правка')
+
+    def test_note_without_history_keeps_old_text(self):
+        legacy = Note.objects.filter(author=self.author).exclude(
+            pk=self.note.pk
+        ).first()
+        old_text = legacy.text
+        legacy.text = 'Новый текст'
+        legacy.save()
+        revisions = list(legacy.revisions.order_by('number'))
+        self.assertEqual(
+            [revision_text(revision) for revision in revisions],
+            [old_text, 'Новый текст'],
+        )
+
+    def test_update_bypassing_save_gets_snapshot(self):
+        Note.objects.filter(pk=self.note.pk).update(text='Мимо истории')
+        self.edit('После обновления')
+        last = self.note.revisions.order_by('-number').first()
+        self.assertTrue(last.is_snapshot)
+        self.assertEqual(revision_text(last), 'После обновления')
+
+    def test_compact_keeps_recent_versions(self):
+        versions = [self.note.text]
+        for number in range(5):
+            versions.append(f'{LONG_TEXT} правка {number}')
+            self.edit(versions[-1])
+        call_command('compact_revisions', '--keep', '2', stderr=StringIO())
+        self.assertEqual(self.texts(), versions[-2:])
+        self.assertTrue(self.note.revisions.order_by('number')[0].is_snapshot)
+
+
+class TestRevisionViews(NotesUrls):
+
+    def setUp(self):
+        super().setUp()
+        note = Note.objects.get(pk=self.note.pk)
+        note.text = 'Вторая версия'
+        note.save()
+        self.revisions_url = reverse('notes:revisions', args=(note.slug,))
+        self.first_url = reverse('notes:revision', args=(note.slug, 1))
+        self.restore_url = reverse(
+            'notes:revision_restore', args=(note.slug, 1)
+        )
+
+    def test_author_sees_history(self):
+        response = self.author_client.get(self.revisions_url)
+        self.assertEqual(len(response.context['object_list']), 2)
+        response = self.author_client.get(self.first_url)
+        self.assertEqual(response.context['revision_text'], self.note.text)
+
+    def test_reader_has_no_access(self):
+        for url in (self.revisions_url, self.first_url):
+            with self.subTest(url=url):
+                response = self.reader_client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        response = self.reader_client.post(self.restore_url)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_restore(self):
+        response = self.author_client.post(self.restore_url)
+        self.assertRedirects(response, self.detail_url)
+        self.note.refresh_from_db()
+        self.assertEqual(self.note.text, NOTE_TEXT)
+        self.assertEqual(self.note.revisions.count(), 3)
@@ -50,3 +50,43 @@ class TestRoutes(NotesUrls):
                 redirect_url = f'{self.login_url}?next={url}'
                 response = self.client.get(url)
                 self.assertRedirects(response, redirect_url)
+
+
+class TestConditionalGet(NotesUrls):
+
+    def test_detail_not_modified(self):
+        response = self.author_client.get(self.detail_url)
+        self.assertIn('ETag', response)
+        self.assertNotIn('Last-Modified', response)
+        response = self.author_client.get(
+            self.detail_url, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_detail_etag_changes_after_edit(self):
+        etag = self.author_client.get(self.detail_url)['ETag']
+        self.author_client.post(
+            self.edit_url,
+            data={**self.form_data_new, 'slug': self.note.slug},
+        )
+        response = self.author_client.get(
+            self.detail_url, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_list_not_modified_until_delete(self):
+        etag = self.author_client.get(self.list_url)['ETag']
+        response = self.author_client.get(
+            self.list_url, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        self.author_client.post(self.delete_url)
+        response = self.author_client.get(
+            self.list_url, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_list_etag_differs_between_users(self):
+        author_etag = self.author_client.get(self.list_url)['ETag']
+        reader_etag = self.reader_client.get(self.list_url)['ETag']
+        self.assertNotEqual(author_etag, reader_etag)
@@ -0,0 +1,67 @@
+from http import HTTPStatus
+
+from django.urls import reverse
+
+from notes.models import Note
+from notes.search import pg_tsquery
+from .confunittest import NotesUrls
+
+
+class TestSearch(NotesUrls):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.search_url = reverse('notes:search')
+        cls.in_title = Note.objects.create(
+            title='Рецепт борща', text='Свёкла, капуста', author=cls.author,
+        )
+        cls.in_text = Note.objects.create(
+            title='Покупки', text='Купить всё для борща', author=cls.author,
+        )
+        cls.foreign = Note.objects.create(
+            title='Борщ читателя', text='Чужая заметка', author=cls.reader,
+        )
+
+    def search(self, query, client=None):
+        client = client or self.author_client
+        response = client.get(self.search_url, {'q': query})
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        return list(response.context['object_list'])
+
+    def test_search_is_ranked_and_scoped_to_author(self):
+        """Совпадение в заголовке выше, чужие заметки не находятся."""
+        self.assertEqual(self.search('борщ'), [self.in_title, self.in_text])
+
+    def test_index_follows_edit_and_delete(self):
+        self.in_title.title = 'Рецепт щей'
+        self.in_title.save()
+        self.assertEqual(self.search('рецепт щей'), [self.in_title])
+        self.in_text.delete()
+        self.assertEqual(self.search('купить'), [])
+
+    def test_bulk_created_notes_are_indexed(self):
+        Note.objects.bulk_create([
+            Note(
+                title='Пакетная', text='Импорт', slug='bulk',
+                author=self.author,
+            )
+        ])
+        self.assertEqual(len(self.search('импорт')), 1)
+
+    def test_query_syntax_is_escaped(self):
+        self.assertEqual(self.search('"борщ'), [self.in_title, self.in_text])
+        self.assertEqual(self.search('" * ('), [])
+
+    def test_postgresql_query(self):
+        self.assertEqual(
+            pg_tsquery("борщ д'артаньяна \\ & !"),
+            "'борщ':* & 'д''артаньяна':*",
+        )
+
+    def test_search_pagination(self):
+        with self.settings(NOTES_PAGE_SIZE=1):
+            response = self.author_client.get(
+                self.search_url, {'q': 'борщ', 'page': 2}
+            )
+        self.assertEqual(list(response.context['object_list']), [self.in_text])
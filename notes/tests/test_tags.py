@@ -0,0 +1,174 @@
+import json
+from http import HTTPStatus
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from notes.cache import get_note_cache
+from notes.models import Note, NoteTag, Tag
+from notes.tags import parse_tags, set_note_tags, tag_facets
+from .confunittest import NotesUrls, NOTE_SLUG
+
+
+class TestTags(NotesUrls):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        notes = list(Note.objects.filter(author=cls.author).order_by('id'))
+        cls.work, cls.ideas, cls.other = notes[:3]
+        set_note_tags(cls.work, ['работа', 'важное'])
+        set_note_tags(cls.ideas, ['идеи', 'работа'])
+        set_note_tags(cls.other, ['идеи'])
+
+    def list_titles(self, *tags):
+        response = self.author_client.get(self.list_url, {'tag': tags})
+        notes = response.context['object_list']
+        return response, {note.title for note in notes}
+
+    def test_parse_tags(self):
+        self.assertEqual(
+            parse_tags(' Работа,  идеи ,,работа, новые   идеи'),
+            ['работа', 'идеи', 'новые идеи'],
+        )
+
+    def test_form_saves_and_replaces_tags(self):
+        self.author_client.post(
+            self.add_url, data={**self.form_data, 'tags': 'Дом, работа'}
+        )
+        note = Note.objects.get(slug=NOTE_SLUG)
+        self.assertEqual(
+            set(note.tags.values_list('name', flat=True)), {'дом', 'работа'}
+        )
+        self.author_client.post(
+            reverse('notes:edit', args=(NOTE_SLUG,)),
+            data={**self.form_data, 'tags': 'дом'},
+        )
+        self.assertEqual(list(note.tags.values_list('name', flat=True)),
+                         ['дом'])
+        # Метка «работа» одна на автора, а не на каждую заметку.
+        self.assertEqual(
+            Tag.objects.filter(author=self.author, name='работа').count(), 1
+        )
+
+    def test_edit_form_shows_tags(self):
+        response = self.author_client.get(
+            reverse('notes:edit', args=(self.work.slug,))
+        )
+        self.assertEqual(
+            response.context['form'].initial['tags'], 'важное, работа'
+        )
+
+    def test_filter_requires_all_tags(self):
+        _, titles = self.list_titles('работа')
+        self.assertEqual(titles, {self.work.title, self.ideas.title})
+        _, titles = self.list_titles('работа', 'идеи')
+        self.assertEqual(titles, {self.ideas.title})
+        _, titles = self.list_titles('нет такой')
+        self.assertEqual(titles, set())
+
+    def test_filter_is_per_author(self):
+        response = self.reader_client.get(self.list_url, {'tag': 'работа'})
+        self.assertEqual(list(response.context['object_list']), [])
+
+    def test_facets_count_filtered_notes(self):
+        self.assertEqual(
+            tag_facets(self.author),
+            [('важное', 1), ('идеи', 2), ('работа', 2)],
+        )
+        self.assertEqual(
+            tag_facets(self.author, ['идеи']), [('идеи', 2), ('работа', 1)]
+        )
+        response, _ = self.list_titles('идеи')
+        self.assertEqual(
+            [(tag['name'], tag['count'])
+             for tag in response.context['tag_facets']],
+            [('работа', 1)],
+        )
+
+    def test_filter_and_facets_are_single_queries(self):
+        with self.assertNumQueries(1):
+            list(Note.objects.filter(author=self.author).with_tags(
+                self.author, ['работа', 'идеи']
+            ))
+        with self.assertNumQueries(1):
+            tag_facets(self.author, ['работа', 'идеи'])
+
+    def test_facets_use_author_tag_index(self):
+        queryset = NoteTag.objects.filter(author=self.author).values('tag')
+        if connection.vendor != 'sqlite':
+            self.skipTest('План запроса SQLite.')
+        with connection.cursor() as cursor:
+            sql, params = queryset.query.sql_with_params()
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = ' '.join(row[-1] for row in cursor.fetchall())
+        self.assertIn('note_tag_author_idx', plan)
+
+    def test_list_query_count_does_not_depend_on_tags(self):
+        self.author_client.get(self.list_url)
+        get_note_cache().bump(self.author.pk)
+        with CaptureQueriesContext(connection) as plain:
+            self.author_client.get(self.list_url, {'size': 5})
+        get_note_cache().bump(self.author.pk)
+        with CaptureQueriesContext(connection) as tagged:
+            self.author_client.get(
+                self.list_url, {'size': 5, 'tag': ['работа', 'идеи']}
+            )
+        self.assertEqual(len(plain), len(tagged))
+
+    def test_next_page_keeps_tags(self):
+        response = self.author_client.get(
+            self.list_url, {'size': 1, 'tag': 'работа'}
+        )
+        self.assertContains(response, 'tag=%D1%80%D0%B0%D0%B1%D0%BE%D1')
+
+    def test_tag_change_updates_cached_list(self):
+        self.list_titles('идеи')
+        set_note_tags(self.work, ['идеи'])
+        _, titles = self.list_titles('идеи')
+        self.assertIn(self.work.title, titles)
+
+    def test_api_accepts_tag_list(self):
+        self.author_client.patch(
+            reverse('notes:api_detail', args=(self.other.slug,)),
+            json.dumps({'tags': ['API', 'идеи']}),
+            content_type='application/json',
+        )
+        self.assertEqual(
+            set(self.other.tags.values_list('name', flat=True)),
+            {'api', 'идеи'},
+        )
+
+    def test_api_rejects_tag_with_comma(self):
+        tags = set(self.other.tags.values_list('name', flat=True))
+        response = self.author_client.patch(
+            reverse('notes:api_detail', args=(self.other.slug,)),
+            json.dumps({'tags': ['дом, работа']}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        self.assertEqual(
+            set(self.other.tags.values_list('name', flat=True)), tags
+        )
+
+    def test_api_patch_without_tags_keeps_them(self):
+        self.author_client.patch(
+            reverse('notes:api_detail', args=(self.work.slug,)),
+            json.dumps({'title': 'Новый заголовок'}),
+            content_type='application/json',
+        )
+        self.assertEqual(self.work.tags.count(), 2)
+
+    def test_transfer_drops_tags_of_previous_author(self):
+        note = Note.objects.get(pk=self.work.pk)
+        note.author = self.reader
+        note.save()
+        self.assertFalse(NoteTag.objects.filter(note=note).exists())
+        # Автор уже сохранён: повторное сохранение меток не трогает.
+        with CaptureQueriesContext(connection) as queries:
+            note.save()
+        self.assertFalse(
+            [query for query in queries
+             if query['sql'].startswith('DELETE FROM "notes_notetag"')]
+        )
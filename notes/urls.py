@@ -1,15 +1,37 @@
+from django.conf import settings
 from django.urls import path
 
-from notes import views
+from notes import api, views
+from notes.async_views import async_note_view
 
 app_name = 'notes'
 
+
+def note_view(view_class):
+    """CBV заметок: асинхронная, если включена NOTES_ASYNC_VIEWS."""
+    if settings.NOTES_ASYNC_VIEWS:
+        return async_note_view(view_class)
+    return view_class.as_view()
+
+
 urlpatterns = [
     path('', views.Home.as_view(), name='home'),
-    path('add/', views.NoteCreate.as_view(), name='add'),
-    path('edit/<slug:slug>/', views.NoteUpdate.as_view(), name='edit'),
-    path('note/<slug:slug>/', views.NoteDetail.as_view(), name='detail'),
-    path('delete/<slug:slug>/', views.NoteDelete.as_view(), name='delete'),
-    path('notes/', views.NotesList.as_view(), name='list'),
+    path('add/', note_view(views.NoteCreate), name='add'),
+    path('edit/<slug:slug>/', note_view(views.NoteUpdate), name='edit'),
+    path('note/<slug:slug>/', note_view(views.NoteDetail), name='detail'),
+    path('note/<slug:slug>/revisions/', views.NoteRevisions.as_view(),
+         name='revisions'),
+    path('note/<slug:slug>/revisions/<int:number>/',
+         views.NoteRevisionDetail.as_view(), name='revision'),
+    path('note/<slug:slug>/revisions/<int:number>/restore/',
+         views.NoteRevisionRestore.as_view(), name='revision_restore'),
+    path('delete/<slug:slug>/', note_view(views.NoteDelete), name='delete'),
+    path('notes/', note_view(views.NotesList), name='list'),
+    path('search/', note_view(views.NoteSearch), name='search'),
     path('done/', views.NoteSuccess.as_view(), name='success'),
+    path('metrics/', views.Metrics.as_view(), name='metrics'),
+    path('api/notes/', api.NoteListApi.as_view(), name='api_list'),
+    path('api/notes/<slug:slug>/', api.NoteDetailApi.as_view(),
+         name='api_detail'),
+    path('api/batch/', api.NoteBatchApi.as_view(), name='api_batch'),
 ]
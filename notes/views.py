@@ -1,9 +1,40 @@
+from hashlib import md5
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.exceptions import ValidationError
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Count, Max
+from django.http import JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, redirect
+from django.template.loader import get_template, render_to_string
 from django.urls import reverse_lazy
+from django.utils.cache import patch_cache_control
+from django.utils.decorators import method_decorator
+from django.utils.functional import cached_property
+from django.utils.safestring import mark_safe
 from django.views import generic
+from django.views.decorators.http import condition
 
+from .cache import get_note_cache
 from .forms import NoteForm
+from .metrics import registry
 from .models import Note
+from .pagination import CURSOR_PARAM, KeysetPaginationMixin, decode_cursor
+from .revisions import restore_revision, revision_text
+from .tags import parse_tags, tag_facets
+
+# Место строк в странице потокового списка: по нему страница режется
+# на начало и конец.
+ROWS_MARKER = '<!-- notes:rows -->'
+
+# Параметр фильтра списка по меткам: ?tag=работа&tag=идеи.
+TAG_PARAM = 'tag'
+
+# Параметр потокового режима списка: ?all=1 - все заметки одной страницей.
+STREAM_PARAM = 'all'
 
 
 class Home(generic.TemplateView):
@@ -17,7 +48,11 @@ class NoteSuccess(LoginRequiredMixin, generic.TemplateView):
 
 
 class NoteBase(LoginRequiredMixin):
-    """Базовый класс для остальных CBV."""
+    """Базовый класс для остальных CBV.
+
+    Бюджеты запросов считаны для настроек по умолчанию: сессия (db)
+    и пользователь (ModelBackend) читаются из базы на каждом запросе.
+    """
     model = Note
     success_url = reverse_lazy('notes:success')
 
@@ -26,34 +61,308 @@ class NoteBase(LoginRequiredMixin):
         return self.model.objects.filter(author=self.request.user)
 
 
-class NoteCreate(NoteBase, generic.CreateView):
-    """Добавление заметки."""
+class ConditionalGetMixin:
+    """Отвечает 304 Not Modified, если страница не изменилась."""
+
+    def get_etag(self):
+        return None
+
+    def get_last_modified(self):
+        return None
+
+    def get(self, request, *args, **kwargs):
+        response = condition(
+            etag_func=lambda *args, **kwargs: self.get_etag(),
+            last_modified_func=lambda *args, **kwargs: (
+                self.get_last_modified()
+            ),
+        )(super().get)(request, *args, **kwargs)
+        # Страницы личные: общий кэш хранить их не должен,
+        # а браузер обязан перепроверять их при каждом запросе.
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+class NoteFormMixin:
+    """Форма заметки: slug, занятый параллельно, - ошибка формы."""
     template_name = 'notes/form.html'
     form_class = NoteForm
 
     def form_valid(self, form):
-        new_note = form.save(commit=False)
-        new_note.author = self.request.user
-        new_note.save()
+        try:
+            return super().form_valid(form)
+        except ValidationError as error:
+            form.add_error(None, error)
+            return self.form_invalid(form)
+
+
+class NoteCreate(NoteBase, NoteFormMixin, generic.CreateView):
+    """Добавление заметки."""
+    # Сессия, пользователь, подбор slug, вставка заметки и её первой
+    # версии в точке сохранения; метки: поиск, создание и перечитывание
+    # новых, замена связей.
+    query_budget = 12
+
+    def form_valid(self, form):
+        # Заметку сохраняет super().form_valid() - один INSERT без UPDATE.
+        form.instance.author = self.request.user
         return super().form_valid(form)
 
 
-class NoteUpdate(NoteBase, generic.UpdateView):
+class NoteUpdate(NoteBase, NoteFormMixin, generic.UpdateView):
     """Редактирование заметки."""
-    template_name = 'notes/form.html'
-    form_class = NoteForm
+    # Сессия, пользователь, заметка, подбор slug и UPDATE в точке
+    # сохранения, блокировка заметки, номер последней версии и вставка
+    # новой, метки (как в NoteCreate).
+    query_budget = 15
 
 
 class NoteDelete(NoteBase, generic.DeleteView):
     """Удаление заметки."""
     template_name = 'notes/delete.html'
+    query_budget = 6
+
 
+class NotesList(
+    NoteBase, ConditionalGetMixin, KeysetPaginationMixin, generic.ListView
+):
+    """Список заметок пользователя с курсорной пагинацией.
 
-class NotesList(NoteBase, generic.ListView):
-    """Список всех заметок пользователя."""
+    ?tag=... оставляет заметки со всеми указанными метками; рядом
+    выводится число заметок по каждой метке среди отобранных.
+    ?all=1 отдаёт все отобранные заметки одной страницей, потоком.
+    """
     template_name = 'notes/list.html'
+    stream_template_name = 'notes/list_all.html'
+    rows_template_name = 'includes/note_rows.html'
+    # Сессия, пользователь, ETag, страница и счётчики меток - не зависит
+    # от числа заметок.
+    query_budget = 5
+
+    def get(self, request, *args, **kwargs):
+        if request.GET.get(STREAM_PARAM):
+            return self.stream()
+        return super().get(request, *args, **kwargs)
+
+    def stream(self):
+        """Ответ потоком: строки рисуются и уходят клиенту пачками.
+
+        Под WSGI пачки заметок (id, slug, title) читаются по курсору
+        id прямо в генераторе ответа, так что память и время до первого
+        куска не зависят от числа заметок. Под ASGI Django 3.2
+        перебирает поток в цикле событий, где ORM недоступен: там все
+        строки читаются заранее, в представлении, и память растёт
+        с числом заметок.
+        """
+        chunk_size = settings.NOTES_STREAM_CHUNK_SIZE
+        notes = self.get_queryset().order_by('id').values(
+            'id', 'slug', 'title'
+        )
+        if isinstance(self.request, ASGIRequest):
+            notes = list(notes.iterator(chunk_size=chunk_size))
+            chunks = (
+                notes[start:start + chunk_size]
+                for start in range(0, len(notes), chunk_size)
+            )
+        else:
+            chunks = self.note_chunks(notes, chunk_size)
+        page = render_to_string(
+            self.stream_template_name,
+            {'rows': mark_safe(ROWS_MARKER)},
+            self.request,
+        )
+        head, tail = page.split(ROWS_MARKER)
+        return StreamingHttpResponse(self.stream_rows(head, chunks, tail))
+
+    @staticmethod
+    def note_chunks(notes, chunk_size):
+        last_id = 0
+        while True:
+            chunk = list(notes.filter(id__gt=last_id)[:chunk_size])
+            if chunk:
+                yield chunk
+            if len(chunk) < chunk_size:
+                return
+            last_id = chunk[-1]['id']
+
+    def stream_rows(self, head, chunks, tail):
+        yield head
+        rows = get_template(self.rows_template_name)
+        for notes in chunks:
+            yield rows.render({'notes': notes})
+        yield tail
+
+    @cached_property
+    def selected_tags(self):
+        return sorted(
+            parse_tags(','.join(self.request.GET.getlist(TAG_PARAM)))
+        )
+
+    @cached_property
+    def tags_key(self):
+        return md5('\n'.join(self.selected_tags).encode()).hexdigest()
+
+    def get_etag(self):
+        # Last-Modified у списка не отдаём: удаление заметки не меняет
+        # MAX(updated), а количество заметок в ETag это учитывает.
+        stats = get_note_cache().get_or_set(
+            self.request.user.pk,
+            'list-etag',
+            lambda: super(NotesList, self).get_queryset().aggregate(
+                count=Count('id'), updated=Max('updated')
+            ),
+        )
+        if not stats['count']:
+            return '{}-0-{}'.format(self.request.user.pk, self.tags_key)
+        # Метки меняются только вместе с заметкой, поэтому ETag всех
+        # заметок автора годится и для отфильтрованного списка.
+        return '{}-{}-{}-{}'.format(
+            self.request.user.pk,
+            stats['count'],
+            stats['updated'].timestamp(),
+            self.tags_key,
+        )
+
+    def get_queryset(self):
+        return super().get_queryset().summaries().with_tags(
+            self.request.user, self.selected_tags
+        )
+
+    def get_page(self):
+        after = self.request.GET.get(CURSOR_PARAM)
+        key = 'list:{}:{}:{}'.format(
+            decode_cursor(after) if after else 0,
+            self.get_page_size(),
+            self.tags_key,
+        )
+        return get_note_cache().get_or_set(
+            self.request.user.pk, key, super().get_page
+        )
 
+    def tag_url(self, tags):
+        query = [(TAG_PARAM, tag) for tag in sorted(tags)]
+        return '?' + urlencode(query) if query else '?'
 
-class NoteDetail(NoteBase, generic.DetailView):
+    def get_context_data(self, **kwargs):
+        selected = set(self.selected_tags)
+        facets = get_note_cache().get_or_set(
+            self.request.user.pk,
+            'tag-facets:{}'.format(self.tags_key),
+            lambda: tag_facets(self.request.user, self.selected_tags),
+        )
+        kwargs['selected_tags'] = [
+            {'name': name, 'url': self.tag_url(selected - {name})}
+            for name in self.selected_tags
+        ]
+        kwargs['tag_facets'] = [
+            {'name': name, 'count': count, 'url': self.tag_url(
+                selected | {name}
+            )}
+            for name, count in facets if name not in selected
+        ]
+        # Параметры, которые переходят на следующую страницу.
+        kwargs['filter_query'] = urlencode([
+            *((TAG_PARAM, tag) for tag in self.selected_tags),
+            *(('size', size) for size in self.request.GET.getlist('size')),
+        ])
+        return super().get_context_data(**kwargs)
+
+
+class NoteDetail(NoteBase, ConditionalGetMixin, generic.DetailView):
     """Заметка подробно."""
     template_name = 'notes/detail.html'
+    query_budget = 3
+
+    def get_object(self, queryset=None):
+        if not hasattr(self, '_note'):
+            self._note = get_note_cache().get_or_set(
+                self.request.user.pk,
+                'detail:{}'.format(self.kwargs[self.slug_url_kwarg]),
+                lambda: super(NoteDetail, self).get_object(queryset),
+            )
+        return self._note
+
+    def get_etag(self):
+        # HTML перерисовывают задача и render_notes без смены updated,
+        # поэтому в ETag и его хэш, а Last-Modified не отдаём.
+        note = self.get_object()
+        return '{}-{}-{}'.format(
+            note.pk, note.updated.timestamp(), note.text_html_hash
+        )
+
+
+class NoteSearch(NoteBase, generic.ListView):
+    """Полнотекстовый поиск по заметкам пользователя."""
+    template_name = 'notes/search.html'
+    query_budget = 4
+
+    def get_paginate_by(self, queryset):
+        return settings.NOTES_PAGE_SIZE
+
+    def get_queryset(self):
+        return super().get_queryset().summaries().search(
+            self.request.GET.get('q', '')
+        )
+
+    def get_context_data(self, **kwargs):
+        kwargs['query'] = self.request.GET.get('q', '')
+        return super().get_context_data(**kwargs)
+
+
+class NoteRevisionBase(NoteBase):
+    """Версии заметки пользователя, указанной в адресе."""
+
+    def get_note(self):
+        if not hasattr(self, '_note'):
+            self._note = get_object_or_404(
+                super().get_queryset(), slug=self.kwargs['slug']
+            )
+        return self._note
+
+    def get_queryset(self):
+        return self.get_note().revisions.order_by('-number')
+
+    def get_object(self, queryset=None):
+        return get_object_or_404(
+            queryset or self.get_queryset(), number=self.kwargs['number']
+        )
+
+    def get_context_data(self, **kwargs):
+        kwargs['note'] = self.get_note()
+        return super().get_context_data(**kwargs)
+
+
+class NoteRevisions(NoteRevisionBase, generic.ListView):
+    """История изменений заметки."""
+    template_name = 'notes/revisions.html'
+    paginate_by = 50
+    query_budget = 5
+
+    def get_queryset(self):
+        return super().get_queryset().defer('data')
+
+
+class NoteRevisionDetail(NoteRevisionBase, generic.DetailView):
+    """Текст заметки в одной из версий."""
+    template_name = 'notes/revision.html'
+    context_object_name = 'revision'
+
+    def get_context_data(self, **kwargs):
+        kwargs['revision_text'] = revision_text(self.object)
+        return super().get_context_data(**kwargs)
+
+
+class NoteRevisionRestore(NoteRevisionBase, generic.View):
+    """Возвращает заметку к выбранной версии."""
+
+    def post(self, request, *args, **kwargs):
+        note = restore_revision(self.get_object())
+        return redirect('notes:detail', note.slug)
+
+
+@method_decorator(staff_member_required, name='dispatch')
+class Metrics(generic.View):
+    """Метрики InstrumentationMiddleware: перцентили по представлениям."""
+
+    def get(self, request, *args, **kwargs):
+        return JsonResponse(registry.snapshot())
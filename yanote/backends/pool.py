@@ -0,0 +1,56 @@
+import queue
+import threading
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    """Пул соединений с базой на процесс.
+
+    Не больше size соединений одновременно; при исчерпании пула поток
+    ждёт свободное соединение до timeout секунд. Свободные соединения
+    выдаются в порядке LIFO, чтобы лишние простаивали и не держали
+    горячие данные сервера.
+    """
+
+    def __init__(self, connect, size, timeout=30):
+        self.connect = connect
+        self.size = size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def acquire(self):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PoolTimeout(
+                f'Нет свободного соединения за {self.timeout} с '
+                f'(размер пула {self.size}).'
+            )
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            return self.connect()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, connection, reusable=True):
+        """Возвращает соединение в пул; негодное закрывается."""
+        try:
+            if reusable:
+                self._idle.put(connection)
+            else:
+                connection.close()
+        finally:
+            self._slots.release()
+
+    def close_idle(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
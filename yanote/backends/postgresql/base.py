@@ -0,0 +1,88 @@
+"""PostgreSQL с пулом соединений на процесс (POOL_SIZE в DATABASES).
+
+С POOL_SIZE = 0 бэкенд ведёт себя как стандартный. С пулом ставьте
+CONN_MAX_AGE = 0: Django закрывает соединение в конце запроса, и оно
+возвращается в пул, а не держится потоком. Пул ограничивает соединения
+одного процесса; общее число соединений со всех серверов приложений
+ограничивайте PgBouncer'ом.
+"""
+import threading
+
+import psycopg2
+import psycopg2.extras
+from django.db.backends.postgresql import base, creation
+from psycopg2 import extensions
+
+from ..pool import ConnectionPool, PoolTimeout
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, conn_params, size, timeout):
+    # Параметры входят в ключ: тестовая база - отдельный пул.
+    key = (alias, tuple(sorted(conn_params.items())))
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(
+                lambda: psycopg2.connect(**conn_params), size, timeout
+            )
+        return _pools[key]
+
+
+def close_pools():
+    """Закрывает свободные соединения всех пулов процесса."""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close_idle()
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+
+    def destroy_test_db(self, *args, **kwargs):
+        # Соединения из пула не дают удалить тестовую базу.
+        close_pools()
+        return super().destroy_test_db(*args, **kwargs)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+    pool = None
+
+    def get_new_connection(self, conn_params):
+        size = self.settings_dict.get('POOL_SIZE', 0)
+        if not size:
+            return super().get_new_connection(conn_params)
+        self.pool = get_pool(
+            self.alias, conn_params, size,
+            self.settings_dict.get('POOL_TIMEOUT', 30),
+        )
+        try:
+            connection = self.pool.acquire()
+        except PoolTimeout as error:
+            raise psycopg2.OperationalError(str(error)) from error
+        options = self.settings_dict['OPTIONS']
+        self.isolation_level = options.get(
+            'isolation_level', connection.isolation_level
+        )
+        if self.isolation_level != connection.isolation_level:
+            connection.set_session(isolation_level=self.isolation_level)
+        psycopg2.extras.register_default_jsonb(
+            conn_or_curs=connection, loads=lambda x: x
+        )
+        return connection
+
+    def _close(self):
+        if self.pool is None or self.connection is None:
+            return super()._close()
+        connection = self.connection
+        with self.wrap_database_errors:
+            reusable = not connection.closed
+            if reusable and connection.get_transaction_status() != (
+                extensions.TRANSACTION_STATUS_IDLE
+            ):
+                try:
+                    connection.rollback()
+                except psycopg2.Error:
+                    reusable = False
+            self.pool.release(connection, reusable)
@@ -0,0 +1,51 @@
+"""SQLite с настройками из SQLITE_PRAGMAS и BEGIN IMMEDIATE для записи."""
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+PRAGMA_CHOICES = {
+    'journal_mode': {'delete', 'truncate', 'persist', 'memory', 'wal', 'off'},
+    'synchronous': {'off', 'normal', 'full', 'extra'},
+}
+
+
+def pragma_statements(pragmas):
+    """Проверяет SQLITE_PRAGMAS и превращает их в команды PRAGMA."""
+    for name, value in pragmas.items():
+        if not name.isidentifier():
+            raise ImproperlyConfigured(f'Неизвестная PRAGMA {name!r}.')
+        choices = PRAGMA_CHOICES.get(name)
+        if choices is not None:
+            value = str(value).lower()
+            if value not in choices:
+                raise ImproperlyConfigured(
+                    f'SQLITE_PRAGMAS[{name!r}]: недопустимое {value!r}.'
+                )
+        else:
+            value = int(value)
+        yield f'PRAGMA {name} = {value}'
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    # Следующая транзакция начнётся BEGIN IMMEDIATE (см. write_atomic).
+    begin_immediate = False
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for statement in pragma_statements(
+            getattr(settings, 'SQLITE_PRAGMAS', {})
+        ):
+            conn.execute(statement)
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        # Django открывает atomic() отложенным BEGIN: снимок берётся при
+        # первом чтении, блокировка записи - позже. Если за это время
+        # записал кто-то другой, SQLite сразу отвечает «database is
+        # locked», не дожидаясь busy_timeout. BEGIN IMMEDIATE берёт
+        # блокировку записи первой и честно ждёт её, но и держит её
+        # всю транзакцию - поэтому только для блоков, которые пишут.
+        if self.begin_immediate:
+            self.cursor().execute('BEGIN IMMEDIATE')
+        else:
+            super()._start_transaction_under_autocommit()
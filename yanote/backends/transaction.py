@@ -0,0 +1,22 @@
+from contextlib import contextmanager
+
+from django.db import transaction
+
+
+@contextmanager
+def write_atomic(using=None, savepoint=True):
+    """transaction.atomic() для блоков, которые пишут в базу.
+
+    На SQLite (yanote.backends.sqlite3) внешний блок начинается с BEGIN
+    IMMEDIATE и ждёт блокировку записи сразу. Вложенные блоки и другие
+    базы работают как обычный atomic(); читающим блокам хватает его.
+    """
+    connection = transaction.get_connection(using)
+    previous = getattr(connection, 'begin_immediate', False)
+    connection.begin_immediate = True
+    try:
+        with transaction.atomic(using=using, savepoint=savepoint):
+            connection.begin_immediate = previous
+            yield
+    finally:
+        connection.begin_immediate = previous
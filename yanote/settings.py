@@ -1,14 +1,32 @@
+import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
 from django.urls import reverse_lazy
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
-SECRET_KEY = 'django-insecure-yipnj$#j!ajarq%k55z4kuf3x79)91h0h42o9!1ho(z=!%mt=#'
+# Настройки окружения: в бою задаются переменными, значения по умолчанию
+# годятся только для разработки и тестов.
+DEBUG = os.environ.get('DJANGO_DEBUG') == '1'
 
-DEBUG = False
+# Выставляют тестовые настройки (yanote.test_settings).
+TESTING = os.environ.get('DJANGO_TESTING') == '1'
 
-ALLOWED_HOSTS = ['*']
+# Ключ из репозитория публичен: с ним подделываются сессии (в том числе
+# signed_cookies), поэтому без DJANGO_SECRET_KEY запуск разрешён только
+# при разработке и в тестах.
+SECRET_KEY = os.environ.get('DJANGO_SECRET_KEY')
+if not SECRET_KEY:
+    if not (DEBUG or TESTING):
+        raise ImproperlyConfigured(
+            'Задайте DJANGO_SECRET_KEY (или DJANGO_DEBUG=1 для разработки).'
+        )
+    SECRET_KEY = (
+        'django-insecure-yipnj$#j!ajarq%k55z4kuf3x79)91h0h42o9!1ho(z=!%mt=#'
+    )
+
+ALLOWED_HOSTS = os.environ.get('DJANGO_ALLOWED_HOSTS', '*').split(',')
 
 
 INSTALLED_APPS = [
@@ -31,14 +49,35 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Замеры запросов, SQL и шаблонов по представлениям (notes:metrics).
+NOTES_INSTRUMENTATION = os.environ.get('NOTES_INSTRUMENTATION') == '1'
+if NOTES_INSTRUMENTATION:
+    MIDDLEWARE.insert(0, 'notes.middleware.InstrumentationMiddleware')
+
+# Бюджеты SQL-запросов представлений (атрибут query_budget) в DEBUG:
+# исключение при превышении или только предупреждение в логе.
+NOTES_QUERY_BUDGET_RAISE = True
+if DEBUG:
+    MIDDLEWARE.append('notes.middleware.QueryBudgetMiddleware')
+
 ROOT_URLCONF = 'yanote.urls'
 
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+if not DEBUG:
+    # Шаблоны разбираются один раз на процесс, а не на каждый рендер.
+    TEMPLATE_LOADERS = [
+        ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+    ]
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': TEMPLATE_LOADERS,
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -52,13 +91,86 @@ TEMPLATES = [
 WSGI_APPLICATION = 'yanote.wsgi.application'
 
 
-DATABASES = {
+# Постоянные соединения: не открывать соединение на каждый запрос.
+CONN_MAX_AGE = int(os.environ.get('CONN_MAX_AGE', 60))
+
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite')
+
+if DB_ENGINE == 'postgresql':
+    # Пул соединений на процесс (yanote.backends.postgresql); 0 - без пула.
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 0))
+    DATABASES = {
+        'default': {
+            'ENGINE': 'yanote.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'yanote'),
+            'USER': os.environ.get('DB_USER', 'yanote'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+            # С пулом соединение возвращается в него в конце запроса.
+            'CONN_MAX_AGE': 0 if DB_POOL_SIZE else CONN_MAX_AGE,
+            'POOL_SIZE': DB_POOL_SIZE,
+            'POOL_TIMEOUT': int(os.environ.get('DB_POOL_TIMEOUT', 30)),
+            'OPTIONS': {
+                'connect_timeout': int(
+                    os.environ.get('DB_CONNECT_TIMEOUT', 5)
+                ),
+            },
+        }
+    }
+elif DB_ENGINE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'yanote.backends.sqlite3',
+            'NAME': os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'CONN_MAX_AGE': CONN_MAX_AGE,
+        }
+    }
+else:
+    raise ImproperlyConfigured(f'Неизвестный DB_ENGINE {DB_ENGINE!r}.')
+
+# PRAGMA для каждого нового соединения (yanote.backends.sqlite3).
+# WAL позволяет читать во время записи, busy_timeout (мс) заставляет
+# писателя ждать блокировку вместо ошибки «database is locked».
+SQLITE_PRAGMAS = {
+    'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'wal'),
+    'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'normal'),
+    'cache_size': int(os.environ.get('SQLITE_CACHE_SIZE', -64000)),
+    'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 ** 2)),
+    'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000)),
+}
+
+# Общий кэш для нескольких процессов: например,
+# DJANGO_CACHE_BACKEND=django.core.cache.backends.memcached.PyMemcacheCache
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': os.environ.get(
+            'DJANGO_CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache',
+        ),
+        'LOCATION': os.environ.get('DJANGO_CACHE_LOCATION', ''),
     }
 }
 
+# Сессии: cached_db читает сессию из кэша, а в базу ходит только при
+# промахе; signed_cookies хранит сессию в подписанной cookie. cache
+# и cached_db требуют общего для процессов кэша (notes.checks).
+SESSION_ENGINES = ('db', 'cache', 'cached_db', 'signed_cookies')
+SESSION_MODE = os.environ.get('DJANGO_SESSION_ENGINE', 'db')
+if SESSION_MODE not in SESSION_ENGINES:
+    raise ImproperlyConfigured(
+        f'DJANGO_SESSION_ENGINE: одно из {", ".join(SESSION_ENGINES)}.'
+    )
+SESSION_ENGINE = f'django.contrib.sessions.backends.{SESSION_MODE}'
+
+# DJANGO_AUTH_BACKEND=notes.auth.CachedModelBackend берёт пользователя
+# сессии из кэша, а не из auth_user. Нужен общий для всех процессов кэш:
+# сброс записи в LocMemCache виден только своему процессу (notes.checks).
+AUTHENTICATION_BACKENDS = [os.environ.get(
+    'DJANGO_AUTH_BACKEND', 'django.contrib.auth.backends.ModelBackend',
+)]
+NOTES_AUTH_CACHE = {'ALIAS': 'default', 'TIMEOUT': 300}
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -87,3 +199,61 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('notes:home')
+
+NOTES_PAGE_SIZE = 20
+
+# Сколько заметок читать и отрисовывать за раз в потоковом списке.
+NOTES_STREAM_CHUNK_SIZE = 500
+
+# Кэш чтений заметок. LocMemLRUCache свой у каждого процесса: после
+# правки в одном остальные до timeout секунд отдают прежние данные.
+# Общий кэш для нескольких процессов:
+# {'BACKEND': 'notes.cache.DjangoCacheBackend', 'OPTIONS': {'alias': 'default'}}
+NOTES_CACHE = {
+    'BACKEND': 'notes.cache.LocMemLRUCache',
+    'OPTIONS': {'max_entries': 1024, 'timeout': 5},
+}
+
+# История версий: полный снимок текста раз в столько версий (остальные -
+# разницы с предыдущей) и сколько последних версий оставляет
+# compact_revisions.
+NOTES_REVISION_SNAPSHOT_EVERY = 20
+NOTES_REVISIONS_KEEP = 100
+
+# Сжатие текстов заметок длиннее THRESHOLD символов (notes.fields):
+# zlib или lzma; None - хранить как есть. Уже сжатые тексты читаются
+# при любом значении, сжать старые заметки - manage.py compress_notes.
+NOTES_COMPRESSION = {
+    'ALGORITHM': os.environ.get('NOTES_COMPRESSION_ALGORITHM', 'zlib'),
+    'THRESHOLD': int(os.environ.get('NOTES_COMPRESSION_THRESHOLD', 32768)),
+}
+
+# Кэш отрисованных фрагментов списка и заметки ({% notecache %}).
+NOTES_FRAGMENT_CACHE = True
+
+# С какого числа строк админка заметок оценивает размер таблицы
+# вместо точного COUNT(*) (notes.pagination.EstimatedCountPaginator).
+NOTES_ADMIN_COUNT_ESTIMATE_FROM = 100000
+
+# Асинхронные варианты представлений заметок для запуска под ASGI.
+NOTES_ASYNC_VIEWS = False
+
+# Максимум заметок в одной пачке JSON API.
+NOTES_API_BATCH_LIMIT = 500
+
+# Markdown заметок (notes.markup): тексты от стольких символов
+# отрисовываются фоновой задачей, а не в запросе на сохранение.
+NOTES_MARKDOWN_INLINE_LIMIT = 32768
+
+# Фоновые задачи (notes.jobs): операции над THRESHOLD и более заметками
+# уходят в очередь, её разбирает manage.py run_jobs. Задача обрабатывает
+# заметки пачками по BATCH_SIZE; упавшая повторяется через RETRY_DELAY
+# секунд (с удвоением) до MAX_ATTEMPTS раз; задача, которую воркер
+# держит дольше TIMEOUT секунд, считается брошенной и берётся снова.
+NOTES_JOBS = {
+    'THRESHOLD': 1000,
+    'BATCH_SIZE': 500,
+    'MAX_ATTEMPTS': 3,
+    'RETRY_DELAY': 30,
+    'TIMEOUT': 600,
+}
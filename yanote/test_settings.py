@@ -0,0 +1,6 @@
+"""Настройки тестов: общие настройки без обязательного DJANGO_SECRET_KEY."""
+import os
+
+os.environ.setdefault('DJANGO_TESTING', '1')
+
+from .settings import *  # noqa: E402, F401, F403